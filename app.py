@@ -1,14 +1,9 @@
 from app import create_app
-from database import init_db
 import os
 
-# 创建应用实例
+# 创建应用实例（不在导入时访问数据库；建表和导入数据使用 flask dbbio init / seed）
 app = create_app()
 
-# 初始化数据库 - 现在在应用上下文中执行
-with app.app_context():
-    init_db()
-
 if __name__ == '__main__':
     # 确保静态文件和模板目录存在
     if not os.path.exists('app/static'):
@@ -18,6 +13,10 @@ if __name__ == '__main__':
     
     # 运行应用
     if os.environ.get('FLASK_ENV') == 'development':
+        # 本地开发时直接初始化数据库
+        from database import init_db
+        with app.app_context():
+            init_db()
         app.run(debug=True, host='0.0.0.0', port=5000)
     else:
-        pass
\ No newline at end of file
+        pass
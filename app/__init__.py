@@ -28,15 +28,33 @@ def create_app():
             'pool_size': 10,
             'max_overflow': 20,
         },
-        SQLALCHEMY_POOL_TIMEOUT=30
+        SQLALCHEMY_POOL_TIMEOUT=30,
+        # /metrics 会公开各端点的调用情况，默认关闭，仅在内网可访问时开启
+        METRICS_ENABLED=os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes'),
     )
     
-    # 初始化扩展
+    # 初始化扩展（指标的连接池类需在创建引擎前设置）
+    from .metrics import metrics
+    metrics.init_app(app)
+
     db.init_app(app)
     migrate.init_app(app, db)
+
+    from .cache import cache
+    cache.init_app(app)
+
+    from .search import search_index
+    search_index.init_app(app)
+
+    from .images import image_store
+    image_store.init_app(app)
     
     # 注册蓝图
     from .routes import main_bp
     app.register_blueprint(main_bp)
+
+    # 命令行：flask dbbio init / seed
+    from .commands import dbbio_cli
+    app.cli.add_command(dbbio_cli)
     
     return app
\ No newline at end of file
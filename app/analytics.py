@@ -0,0 +1,342 @@
+import math
+import time
+from array import array
+from collections import Counter
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import select
+from . import db
+from .cache import cache
+from .models import PlantResource, InsectResource
+from .pagination import STREAM_CHUNK_SIZE
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 NumPy 时以纯 Python 逐行统计，结果相同
+    np = None
+
+# 字符串维度：维度名 -> 列名，快照中按字典编码
+CATEGORY_FIELDS = {
+    PlantResource: {
+        'family': 'family',
+        'genus': 'genus',
+        'country': 'country',
+        'province': 'state_province',
+    },
+    InsectResource: {
+        'order': 'order_name',
+        'family': 'family_name',
+        'genus': 'genus_name',
+        'country': 'country',
+        'province': 'province',
+    },
+}
+
+# 数值维度：维度名 -> 列名，日期列取年份
+NUMERIC_FIELDS = {
+    PlantResource: {
+        'year': 'event_date',
+        'elevation': 'minimum_elevation_in_meters',
+        'latitude': 'decimal_latitude',
+        'longitude': 'decimal_longitude',
+    },
+    InsectResource: {
+        'year': 'collection_date',
+        'elevation': 'altitude',
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+    },
+}
+
+# 数值维度分组的默认区间宽度（可用 <维度>_band 参数指定）
+DEFAULT_BANDS = {
+    'year': 1,
+    'elevation': 500,
+    'latitude': 1,
+    'longitude': 1,
+}
+
+# 数据变化后快照最多每隔多少秒重建一次（期间返回稍旧的结果）
+REFRESH_INTERVAL = 60
+
+# 最多同时分组的维度数
+MAX_GROUP_BY = 3
+
+# 默认/最多返回的分组数
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+
+# 分组组合数不超过该值时用 bincount 计数，否则先排序去重
+BINCOUNT_LIMIT = 1 << 22
+
+# 单个数值维度最多的分组区间数（按全表取值范围与区间宽度计算）
+MAX_BINS = 100000
+
+
+def _number(value):
+    """数值维度的取值：日期取年份，空值为 NaN"""
+    if value is None:
+        return math.nan
+    if isinstance(value, (date, datetime)):
+        return float(value.year)
+    return float(value)
+
+
+def _band_value(index, band):
+    """区间序号 -> 区间下限，整数时返回 int"""
+    value = index * band
+    return int(value) if float(value).is_integer() else value
+
+
+class ColumnarSnapshot:
+    """单个资源表的列式快照
+
+    字符串列按字典编码：codes[维度][i] 为第 i 条记录的取值在 values[维度] 中的下标，空值为 -1；
+    数值列为 float64 数组，空值为 NaN。安装了 NumPy 时各列为 ndarray，聚合为向量化运算。
+    """
+
+    def __init__(self, model, version):
+        self.model = model
+        self.version = version
+        self.built_at = time.time()
+        self.size = 0
+        self.values = {}
+        self.lookups = {}
+        self.codes = {}
+        self.numbers = {}
+        self.extents = {}
+
+    @classmethod
+    def build(cls, model, version, chunk_size=STREAM_CHUNK_SIZE):
+        """按块读取全表的维度列构建快照，不构造 ORM 实例"""
+        snapshot = cls(model, version)
+        categories = CATEGORY_FIELDS[model]
+        numerics = NUMERIC_FIELDS[model]
+        columns = ([getattr(model, field) for field in categories.values()] +
+                   [getattr(model, field) for field in numerics.values()])
+
+        lookups = {name: {} for name in categories}
+        codes = {name: array('i') for name in categories}
+        numbers = {name: array('d') for name in numerics}
+        statement = select(*columns).execution_options(yield_per=chunk_size)
+        for row in db.session.execute(statement):
+            for name, value in zip(categories, row):
+                if value is None or value == '':
+                    codes[name].append(-1)
+                    continue
+                lookup = lookups[name]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                codes[name].append(code)
+            for name, value in zip(numerics, row[len(categories):]):
+                numbers[name].append(_number(value))
+            snapshot.size += 1
+
+        snapshot.lookups = lookups
+        snapshot.values = {name: list(lookup) for name, lookup in lookups.items()}
+        if np is not None:
+            codes = {name: np.frombuffer(column, dtype=np.intc) for name, column in codes.items()}
+            numbers = {name: np.frombuffer(column, dtype=np.float64) for name, column in numbers.items()}
+        snapshot.codes = codes
+        snapshot.numbers = numbers
+        # 各数值列的取值范围，用于限制分组区间数
+        for name, column in numbers.items():
+            if np is not None:
+                present = column[~np.isnan(column)]
+                extent = (float(present.min()), float(present.max())) if present.size else None
+            else:
+                present = [value for value in column if not math.isnan(value)]
+                extent = (min(present), max(present)) if present else None
+            snapshot.extents[name] = extent
+        return snapshot
+
+    def aggregate(self, group_by=(), filters=None, ranges=None, bands=None):
+        """按维度分组计数
+
+        group_by: 维度名列表；filters: {字符串维度: 取值}；ranges: {数值维度: (最小值, 最大值)}，
+        任一端可为 None；bands: {数值维度: 区间宽度}。
+        返回 (符合条件的记录数, [(各维度取值元组, 记录数), ...])，数值维度的取值为区间下限；
+        区间宽度过小、分组区间超过 MAX_BINS 个时抛出 ValueError
+        """
+        filters = filters or {}
+        ranges = ranges or {}
+        bands = {name: (bands or {}).get(name) or DEFAULT_BANDS[name]
+                 for name in group_by if name in self.numbers}
+        for name, band in bands.items():
+            extent = self.extents.get(name)
+            if extent is None:
+                continue
+            low, high = (value / band for value in extent)
+            if not (math.isfinite(low) and math.isfinite(high)) or \
+                    math.floor(high) - math.floor(low) + 1 > MAX_BINS:
+                raise ValueError(f'{name}_band 过小，分组区间不能超过 {MAX_BINS} 个')
+
+        # 取值不存在的筛选条件不会匹配任何记录
+        codes = {}
+        for name, value in filters.items():
+            code = self.lookups[name].get(value)
+            if code is None:
+                return 0, []
+            codes[name] = code
+
+        if np is not None:
+            return self._aggregate_numpy(group_by, codes, ranges, bands)
+        return self._aggregate_python(group_by, codes, ranges, bands)
+
+    def _aggregate_numpy(self, group_by, codes, ranges, bands):
+        mask = np.ones(self.size, dtype=bool)
+        for name, code in codes.items():
+            mask &= self.codes[name] == code
+        for name, (low, high) in ranges.items():
+            if low is not None:
+                mask &= self.numbers[name] >= low
+            if high is not None:
+                mask &= self.numbers[name] <= high
+        total = int(mask.sum())
+        if not group_by or not total:
+            return total, [((), total)] if total else []
+
+        # 各维度转换为非负整数键（0 表示空值），组合数在 int64 范围内时再组合为一个键
+        keys = []
+        for name in group_by:
+            if name in self.codes:
+                key = self.codes[name][mask].astype(np.int64) + 1
+                keys.append((name, key, len(self.values[name]) + 1, None))
+            else:
+                bins = np.floor(self.numbers[name][mask] / bands[name])
+                present = ~np.isnan(bins)
+                low = int(bins[present].min()) if present.any() else 0
+                high = int(bins[present].max()) if present.any() else 0
+                key = np.zeros(len(bins), dtype=np.int64)
+                # 先以浮点数减去下限，区间序号超出 int64 时也不会溢出
+                key[present] = (bins[present] - low).astype(np.int64) + 1
+                keys.append((name, key, high - low + 2, low))
+
+        size = math.prod(cardinality for _, _, cardinality, _ in keys)
+        if size > np.iinfo(np.int64).max:
+            # 组合键会溢出时按各维度键的行去重
+            rows, counts = np.unique(np.column_stack([key for _, key, _, _ in keys]),
+                                     axis=0, return_counts=True)
+            columns = list(rows.T)
+        else:
+            combined = np.zeros(total, dtype=np.int64)
+            for _, key, cardinality, _ in keys:
+                combined = combined * cardinality + key
+            if size <= BINCOUNT_LIMIT:
+                counts = np.bincount(combined, minlength=size)
+                groups = np.flatnonzero(counts)
+                counts = counts[groups]
+            else:
+                groups, counts = np.unique(combined, return_counts=True)
+            # 按各维度的基数依次拆分组合键
+            columns = []
+            for _, _, cardinality, _ in reversed(keys):
+                groups, key = np.divmod(groups, cardinality)
+                columns.append(key)
+            columns.reverse()
+
+        decoded = []
+        for (name, _, _, low), key in zip(keys, columns):
+            if low is None:
+                values = [None] + self.values[name]
+                decoded.append([values[k] for k in key.tolist()])
+            else:
+                band = bands[name]
+                decoded.append([None if k == 0 else _band_value(k - 1 + low, band)
+                                for k in key.tolist()])
+        return total, list(zip(zip(*decoded), counts.tolist()))
+
+    def _aggregate_python(self, group_by, codes, ranges, bands):
+        counter = Counter()
+        for i in range(self.size):
+            if any(self.codes[name][i] != code for name, code in codes.items()):
+                continue
+            matched = True
+            for name, (low, high) in ranges.items():
+                value = self.numbers[name][i]
+                if math.isnan(value) or (low is not None and value < low) or \
+                        (high is not None and value > high):
+                    matched = False
+                    break
+            if not matched:
+                continue
+
+            key = []
+            for name in group_by:
+                if name in self.codes:
+                    code = self.codes[name][i]
+                    key.append(None if code < 0 else self.values[name][code])
+                else:
+                    value = self.numbers[name][i]
+                    key.append(None if math.isnan(value)
+                               else _band_value(math.floor(value / bands[name]), bands[name]))
+            counter[tuple(key)] += 1
+        total = sum(counter.values())
+        return total, list(counter.items())
+
+
+class AnalyticsStore:
+    """各工作进程内的列式快照
+
+    资源数据变化后（缓存版本号变化）快照在下次请求时重建，
+    但两次重建至少间隔 ANALYTICS_REFRESH_INTERVAL 秒，频繁写入时返回稍旧的结果
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+
+    def get(self, model):
+        snapshot = self.snapshots.get(model)
+        version = cache.version(model.__tablename__)
+        interval = current_app.config.get('ANALYTICS_REFRESH_INTERVAL', REFRESH_INTERVAL)
+        if snapshot is None or (snapshot.version != version and
+                                time.time() - snapshot.built_at >= interval):
+            snapshot = self.snapshots[model] = ColumnarSnapshot.build(model, version)
+        return snapshot
+
+
+analytics = AnalyticsStore()
+
+
+def parse_aggregate_args(model, args):
+    """解析 /api/aggregate 的参数，参数错误时抛出 ValueError
+
+    返回 (aggregate 的关键字参数, 返回的分组数)
+    """
+    categories = CATEGORY_FIELDS[model]
+    numerics = NUMERIC_FIELDS[model]
+
+    group_by = [name.strip() for name in args.get('group_by', '').split(',') if name.strip()]
+    for name in group_by:
+        if name not in categories and name not in numerics:
+            raise ValueError(f"不支持按 {name} 分组，可选: {', '.join(list(categories) + list(numerics))}")
+    if len(set(group_by)) != len(group_by) or len(group_by) > MAX_GROUP_BY:
+        raise ValueError(f'group_by 最多 {MAX_GROUP_BY} 个不重复的维度')
+
+    filters = {name: args[name] for name in categories if args.get(name)}
+
+    ranges = {}
+    bands = {}
+    for name in numerics:
+        bounds = []
+        for suffix in ('min', 'max'):
+            value = args.get(f'{name}_{suffix}')
+            try:
+                bounds.append(float(value) if value not in (None, '') else None)
+            except ValueError:
+                raise ValueError(f'{name}_{suffix} 必须是数值')
+        if bounds != [None, None]:
+            ranges[name] = tuple(bounds)
+        band = args.get(f'{name}_band')
+        if band:
+            try:
+                bands[name] = float(band)
+            except ValueError:
+                raise ValueError(f'{name}_band 必须是数值')
+            if not (math.isfinite(bands[name]) and bands[name] > 0):
+                raise ValueError(f'{name}_band 必须是大于 0 的有限数值')
+
+    limit = args.get('limit', DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_LIMIT))
+    return {'group_by': group_by, 'filters': filters, 'ranges': ranges, 'bands': bands}, limit
@@ -0,0 +1,294 @@
+import math
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import Date, DateTime, Float, String, delete, insert, select, update, bindparam, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from . import db
+from .geohash import encode_geohash
+from .models import parse_date
+from .signals import notify_change
+
+# 单个请求最多包含的操作数（upsert 与 delete 之和），可由 BATCH_MAX_ITEMS 配置
+BATCH_MAX_ITEMS = 1000
+
+# 由数据库生成、不能写入的接口字段
+READ_ONLY_FIELDS = ('id', 'created_at', 'updated_at')
+
+
+class BatchError(Exception):
+    """批量操作未执行：status 为响应状态码，results 为各项的结果（请求格式错误时为空）"""
+
+    def __init__(self, message, status=400, results=None):
+        super().__init__(message)
+        self.status = status
+        self.results = results or []
+
+    def to_dict(self):
+        return {'error': str(self), 'applied': False, 'results': self.results}
+
+
+def convert_text(length):
+    def convert(value):
+        if value is None or value == '':
+            return None
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError('应为字符串')
+        value = str(value)
+        if length and len(value) > length:
+            raise ValueError(f'长度超过 {length} 个字符')
+        return value
+    return convert
+
+
+def convert_float(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError('应为数值')
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        raise ValueError('不是有效的数值')
+    if not math.isfinite(number):
+        raise ValueError('不是有效的数值')
+    return number
+
+
+def convert_date(value):
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        raise ValueError('应为日期字符串')
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError('无法识别的日期格式')
+    return parsed
+
+
+@lru_cache(maxsize=None)
+def writable_fields(model):
+    """可写入的接口字段：{接口字段名: (列名, 转换函数)}"""
+    fields = {}
+    for key, column in model.API_FIELDS.items():
+        if key in READ_ONLY_FIELDS:
+            continue
+        column_type = model.__table__.columns[column].type
+        if isinstance(column_type, (Date, DateTime)):
+            convert = convert_date
+        elif isinstance(column_type, Float):
+            convert = convert_float
+        else:
+            convert = convert_text(column_type.length if isinstance(column_type, String) else None)
+        fields[key] = (column, convert)
+    return fields
+
+
+def parse_values(model, item):
+    """upsert 项（接口字段名 -> 值）转换为 列名 -> 值，有错误时抛出 ValueError"""
+    fields = writable_fields(model)
+    values = {}
+    errors = []
+    for key, value in item.items():
+        if key == 'id':
+            continue
+        if key not in fields:
+            errors.append(f'只读字段: {key}' if key in model.API_FIELDS else f'未知字段: {key}')
+            continue
+        column, convert = fields[key]
+        try:
+            values[column] = convert(value)
+        except ValueError as e:
+            errors.append(f'{key}: {e}')
+    if errors:
+        raise ValueError('；'.join(errors))
+    return values
+
+
+def parse_id(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError('id 应为正整数')
+    return value
+
+
+def _snapshots(model, ids):
+    """按主键读取记录快照（与 signals.snapshot 相同的 列名 -> 值 字典）"""
+    if not ids:
+        return {}
+    keys = [attr.key for attr in inspect(model).column_attrs]
+    rows = db.session.execute(
+        select(*[getattr(model, key) for key in keys]).where(model.id.in_(ids)).with_for_update()
+    )
+    return {row[0]: dict(zip(keys, row)) for row in rows}
+
+
+def _geohash(model, values, old=None):
+    """经纬度有变化时重新计算 geohash（Core update 不经过列的插入默认值）"""
+    latitude_key, longitude_key = model.GEO_FIELDS
+    if latitude_key not in values and longitude_key not in values:
+        return
+    old = old or {}
+    values['geohash'] = encode_geohash(values.get(latitude_key, old.get(latitude_key)),
+                                       values.get(longitude_key, old.get(longitude_key)))
+
+
+def _insert(model, records):
+    """以 executemany 插入记录，返回按参数顺序的新主键"""
+    table = model.__table__
+    if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+        statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        return list(db.session.execute(statement, records).scalars())
+    # 不支持批量 RETURNING 的数据库（如 MySQL）逐条插入以取得主键，仍在同一事务中
+    return [db.session.execute(insert(table), record).inserted_primary_key[0] for record in records]
+
+
+def _update(model, changes):
+    """按主键更新记录：写入字段相同的项合为一条 executemany 语句"""
+    table = model.__table__
+    groups = {}
+    for id, values in changes:
+        groups.setdefault(tuple(sorted(values)), []).append(dict(values, _id=id))
+    for params in groups.values():
+        # SET 子句取自参数的键（updated_at 由列的 onupdate 设置）
+        statement = update(table).where(table.c.id == bindparam('_id'))
+        db.session.execute(statement, params)
+
+
+def parse_batch(model, data):
+    """校验请求并返回 (upserts, deletes, results)，有错误时抛出 BatchError
+
+    upserts 为 [(下标, id 或 None, 列名 -> 值)]，deletes 为 [(下标, id)]；
+    results 为各项的初始结果，顺序为全部 upsert 项后接全部 delete 项
+    """
+    if not isinstance(data, dict):
+        raise BatchError('请求体应为 JSON 对象 {"upsert": [...], "delete": [...]}')
+    upsert_items = data.get('upsert') or []
+    delete_items = data.get('delete') or []
+    if not isinstance(upsert_items, list) or not isinstance(delete_items, list):
+        raise BatchError('upsert 和 delete 应为数组')
+    max_items = current_app.config.get('BATCH_MAX_ITEMS', BATCH_MAX_ITEMS)
+    if len(upsert_items) + len(delete_items) > max_items:
+        raise BatchError(f'单次最多 {max_items} 项操作', status=413)
+    if not upsert_items and not delete_items:
+        raise BatchError('没有要执行的操作')
+
+    upserts = []
+    deletes = []
+    results = []
+    seen = set()
+    for index, item in enumerate(upsert_items):
+        result = {'op': 'upsert', 'index': index, 'id': None}
+        results.append(result)
+        try:
+            if not isinstance(item, dict):
+                raise ValueError('应为 JSON 对象')
+            id = parse_id(item['id']) if item.get('id') is not None else None
+            result['id'] = id
+            if id is not None:
+                if id in seen:
+                    raise ValueError('同一记录在请求中出现多次')
+                seen.add(id)
+            upserts.append((index, id, parse_values(model, item)))
+        except ValueError as e:
+            result['error'] = str(e)
+    for index, item in enumerate(delete_items):
+        result = {'op': 'delete', 'index': index, 'id': item}
+        results.append(result)
+        try:
+            id = parse_id(item)
+            if id in seen:
+                raise ValueError('同一记录在请求中出现多次')
+            seen.add(id)
+            deletes.append((index, id))
+        except ValueError as e:
+            result['error'] = str(e)
+    return upserts, deletes, results
+
+
+def _fail(message, results, status=400):
+    """有任一项出错时整批不执行：其余各项标记为 skipped"""
+    for result in results:
+        result['status'] = 'error' if 'error' in result else 'skipped'
+    return BatchError(message, status, results)
+
+
+def apply_batch(model, data):
+    """在一个事务中执行批量 upsert 和 delete
+
+    data 为 {"upsert": [记录, ...], "delete": [id, ...]}，记录的键为接口字段名（同列表API），
+    带 id 的记录只更新给出的字段，不带 id 的为新记录。先校验全部项，任一项出错（字段或取值无效、
+    记录不存在、同一记录出现多次）时整批不执行，抛出 BatchError 并给出各项结果。
+    删除以一条 IN 语句执行，更新按写入的字段分组、新增合为一组，各以一条 executemany 语句执行
+    （不支持批量 RETURNING 的数据库逐条新增，见 _insert）；
+    提交后按删除、更新、新增的顺序通知订阅方（统计、分类树等增量更新）
+    """
+    upserts, deletes, results = parse_batch(model, data)
+    errors = sum('error' in result for result in results)
+    if errors:
+        raise _fail(f'{errors} 项有错误，未执行任何操作', results)
+
+    by_result = {(result['op'], result['index']): result for result in results}
+    updates = [(index, id, values) for index, id, values in upserts if id is not None]
+    inserts = [(index, values) for index, id, values in upserts if id is None]
+    delete_ids = [id for _, id in deletes]
+
+    try:
+        # 锁定要修改的记录（SQLite 在写入时锁定整个数据库），同时取得变化前的快照
+        old = _snapshots(model, [id for _, id, _ in updates] + delete_ids)
+        missing = 0
+        for op, items in (('upsert', updates), ('delete', deletes)):
+            for index, id, *_ in items:
+                if id not in old:
+                    by_result[(op, index)]['error'] = '记录不存在'
+                    missing += 1
+        if missing:
+            db.session.rollback()
+            raise _fail(f'{missing} 项的记录不存在，未执行任何操作', results)
+
+        if delete_ids:
+            db.session.execute(delete(model.__table__).where(model.__table__.c.id.in_(delete_ids)))
+
+        changes = []
+        for index, id, values in updates:
+            values = dict(values)
+            _geohash(model, values, old[id])
+            if values:
+                changes.append((id, values))
+        _update(model, changes)
+
+        new_ids = []
+        if inserts:
+            # executemany 要求每条记录的键相同，未给出的字段为 NULL；geohash 由列默认值计算
+            template = dict.fromkeys(column for column, _ in writable_fields(model).values())
+            new_ids = _insert(model, [dict(template, **values) for _, values in inserts])
+            for (index, _), id in zip(inserts, new_ids):
+                by_result[('upsert', index)]['id'] = id
+
+        new = _snapshots(model, [id for _, id, _ in updates] + new_ids)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.warning('批量写入 %s 失败: %s', model.__tablename__, e)
+        raise _fail(f'写入数据库失败: {getattr(e, "orig", None) or e}', results, status=409)
+
+    created = {index for index, _ in inserts}
+    for result in results:
+        if result['op'] == 'delete':
+            result['status'] = 'deleted'
+        else:
+            result['status'] = 'created' if result['index'] in created else 'updated'
+
+    if delete_ids:
+        notify_change(model, 'delete', old=[old[id] for id in delete_ids])
+    if updates:
+        notify_change(model, 'update', old=[old[id] for _, id, _ in updates],
+                      new=[new[id] for _, id, _ in updates])
+    if new_ids:
+        notify_change(model, 'insert', new=[new[id] for id in new_ids])
+
+    return {
+        'applied': True,
+        'created': len(new_ids),
+        'updated': len(updates),
+        'deleted': len(delete_ids),
+        'results': results,
+    }
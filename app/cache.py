@@ -0,0 +1,85 @@
+import time
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .models import CacheVersion
+from .signals import resource_changed
+
+
+class VersionedCache:
+    """进程内缓存，缓存项绑定资源的版本号
+
+    版本号保存在 cache_versions 表中，任一工作进程写入数据后递增版本号，
+    其他进程在 CACHE_VERSION_TTL 秒内读到新版本号后重新计算缓存项。
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._versions = {}
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_VERSION_TTL', 1.0)
+        app.config.setdefault('CACHE_DEFAULT_TTL', 3600)
+        app.config.setdefault('CACHE_MAX_ENTRIES', 10000)
+
+    def version(self, name):
+        """读取资源的当前版本号（本地短暂缓存，避免每次访问数据库）"""
+        now = time.monotonic()
+        cached = self._versions.get(name)
+        if cached and now - cached[1] < current_app.config['CACHE_VERSION_TTL']:
+            return cached[0]
+
+        version = db.session.execute(
+            select(CacheVersion.version).where(CacheVersion.name == name)
+        ).scalar() or 0
+        self._versions[name] = (version, now)
+        return version
+
+    def bump(self, name):
+        """递增资源版本号，使相关缓存全部失效"""
+        statement = (update(CacheVersion)
+                     .where(CacheVersion.name == name)
+                     .values(version=CacheVersion.version + 1))
+        result = db.session.execute(statement)
+        if result.rowcount == 0:
+            db.session.add(CacheVersion(name=name, version=1))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # 其他进程同时插入了该资源的版本行，回滚后改为递增
+            db.session.rollback()
+            db.session.execute(statement)
+            db.session.commit()
+        self._versions.pop(name, None)
+
+    def get(self, name, key, compute, ttl=None):
+        """读取缓存项，版本号变化或过期时调用 compute 重新计算"""
+        version = self.version(name)
+        now = time.monotonic()
+        entry = self._entries.get((name, key))
+        if entry and entry[0] == version and entry[1] > now:
+            return entry[2]
+
+        value = compute()
+        if ttl is None:
+            ttl = current_app.config['CACHE_DEFAULT_TTL']
+        self._entries.pop((name, key), None)
+        self._entries[(name, key)] = (version, now + ttl, value)
+        # 缓存项过多时淘汰最早写入的（如大量不同的筛选条件）
+        while len(self._entries) > current_app.config['CACHE_MAX_ENTRIES']:
+            del self._entries[next(iter(self._entries))]
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self._versions.clear()
+
+
+cache = VersionedCache()
+
+
+@resource_changed.connect
+def _invalidate(sender, **kwargs):
+    """资源有任何变化时递增其版本号"""
+    cache.bump(sender.__tablename__)
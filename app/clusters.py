@@ -0,0 +1,153 @@
+from collections import defaultdict
+from sqlalchemy import select, insert, update, delete, func, literal, or_
+from . import db
+from .geo import split_bbox, range_filter
+from .geohash import cell_bounds, cell_count, cover_ranges
+from .models import RESOURCE_MODELS, MapCluster
+from .signals import resource_changed, update_or_insert
+
+# 聚合金字塔的层数（geohash 前缀长度 1 至 8，8 位约 38 x 19 米）
+MAX_PRECISION = 8
+
+# 单次请求最多返回的格子数，范围相对缩放级别过大时改用更粗的层级
+MAX_CLUSTERS = 2000
+
+
+def zoom_precision(zoom):
+    """地图缩放级别对应的聚合层级：格子宽度约为瓦片宽度的四分之一"""
+    precision = 1
+    while precision < MAX_PRECISION and (5 * (precision + 1) + 1) // 2 <= zoom + 2:
+        precision += 1
+    return precision
+
+
+def overlaps(a, b):
+    """两个矩形 (最小经度, 最小纬度, 最大经度, 最大纬度) 是否相交"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def rebuild(model):
+    """按 geohash 前缀分组重建模型的全部聚合层级"""
+    resource = model.__tablename__
+    latitude, longitude = (getattr(model, field) for field in model.GEO_FIELDS)
+    db.session.execute(delete(MapCluster).where(MapCluster.resource == resource))
+    for precision in range(1, MAX_PRECISION + 1):
+        cell = func.substr(model.geohash, 1, precision)
+        db.session.execute(insert(MapCluster).from_select(
+            ['resource', 'precision', 'cell', 'count', 'latitude_sum', 'longitude_sum'],
+            select(literal(resource), literal(precision), cell,
+                   func.count(), func.sum(latitude), func.sum(longitude))
+            .where(model.geohash.isnot(None))
+            .group_by(cell)
+        ))
+    db.session.commit()
+
+
+def apply_change(model, old=(), new=()):
+    """按变化前后的记录快照增量更新各层级的格子"""
+    resource = model.__tablename__
+    lat_field, lon_field = model.GEO_FIELDS
+
+    # (层级, 格子) -> [记录数, 纬度和, 经度和] 的增量
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for records, sign in ((old, -1), (new, 1)):
+        for record in records:
+            geohash = record.get('geohash')
+            if not geohash:
+                continue
+            for precision in range(1, MAX_PRECISION + 1):
+                delta = deltas[(precision, geohash[:precision])]
+                delta[0] += sign
+                delta[1] += sign * record[lat_field]
+                delta[2] += sign * record[lon_field]
+
+    for (precision, cell), (count, latitude_sum, longitude_sum) in deltas.items():
+        if not count and not latitude_sum and not longitude_sum:
+            continue
+        key = (MapCluster.resource == resource,
+               MapCluster.precision == precision,
+               MapCluster.cell == cell)
+        statement = update(MapCluster).where(*key).values(
+            count=MapCluster.count + count,
+            latitude_sum=MapCluster.latitude_sum + latitude_sum,
+            longitude_sum=MapCluster.longitude_sum + longitude_sum,
+        )
+        if count > 0:
+            update_or_insert(statement, insert(MapCluster).values(
+                resource=resource, precision=precision, cell=cell, count=count,
+                latitude_sum=latitude_sum, longitude_sum=longitude_sum))
+        else:
+            db.session.execute(statement)
+            if count < 0:
+                db.session.execute(delete(MapCluster).where(*key, MapCluster.count <= 0))
+    db.session.commit()
+
+
+def ensure_built(model):
+    """还没有聚合数据（如刚升级的数据库）但有带坐标的记录时全量构建"""
+    resource = model.__tablename__
+    built = db.session.execute(
+        select(MapCluster.cell).where(MapCluster.resource == resource).limit(1)
+    ).first()
+    if built is None and db.session.execute(
+            select(model.id).where(model.geohash.isnot(None)).limit(1)).first():
+        rebuild(model)
+
+
+def get_clusters(model, bbox, precision):
+    """读取矩形范围内指定层级的格子，返回 [{cell, lat, lon, count}, ...]
+
+    lat、lon 为格子内记录的平均坐标
+    """
+    ensure_built(model)
+    boxes = split_bbox(bbox)
+    conditions = []
+    for box in boxes:
+        # 区间前缀不能比格子更长，否则会漏掉包含整个范围的粗格子
+        condition = range_filter(MapCluster.cell, cover_ranges(*box, max_precision=precision))
+        if condition is None:
+            # 范围接近全球，直接读取整层
+            conditions = []
+            break
+        conditions.append(condition)
+
+    query = select(MapCluster.cell, MapCluster.count,
+                   MapCluster.latitude_sum, MapCluster.longitude_sum).where(
+        MapCluster.resource == model.__tablename__,
+        MapCluster.precision == precision,
+    )
+    if conditions:
+        query = query.where(or_(*conditions))
+
+    clusters = []
+    for cell, count, latitude_sum, longitude_sum in db.session.execute(query):
+        # 区间按较粗的前缀展开，去掉与范围不相交的格子
+        if not any(overlaps(cell_bounds(cell), box) for box in boxes):
+            continue
+        clusters.append({
+            'cell': cell,
+            'lat': round(latitude_sum / count, 6),
+            'lon': round(longitude_sum / count, 6),
+            'count': count,
+        })
+    return clusters
+
+
+def clusters_precision(bbox, zoom):
+    """请求使用的层级：按缩放级别选择，格子数超过 MAX_CLUSTERS 时逐级变粗"""
+    precision = zoom_precision(zoom)
+    while precision > 1 and sum(cell_count(*box, precision)
+                                for box in split_bbox(bbox)) > MAX_CLUSTERS:
+        precision -= 1
+    return precision
+
+
+@resource_changed.connect
+def _on_change(sender, action, old, new):
+    """写操作后增量更新聚合，批量导入后全量重建"""
+    if sender not in RESOURCE_MODELS.values():
+        return
+    if action == 'reload':
+        rebuild(sender)
+    else:
+        apply_change(sender, old, new)
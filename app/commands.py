@@ -0,0 +1,66 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+# flask dbbio <命令>：数据库初始化和部署相关的命令
+dbbio_cli = AppGroup('dbbio', help='数据库初始化和维护命令')
+
+
+@dbbio_cli.command('init')
+def init_command():
+    """建表并建立关键词搜索索引（可重复执行）"""
+    from .seed import create_schema
+    create_schema()
+    click.echo('数据库表和搜索索引已就绪')
+
+
+@dbbio_cli.command('seed')
+@click.option('--plants', 'plants_path', type=click.Path(dir_okay=False),
+              help='植物 CSV 文件（默认为项目根目录的 plants.csv）')
+@click.option('--insects', 'insects_path', type=click.Path(dir_okay=False),
+              help='昆虫 CSV 文件（默认为项目根目录的 insects.csv）')
+def seed_command(plants_path, insects_path):
+    """数据库中还没有数据时导入 CSV 数据（或示例数据）"""
+    from .seed import seed_db
+    seed_db(plants_path, insects_path)
+
+
+@dbbio_cli.command('recompute-stats')
+@click.option('--force', is_flag=True, help='不论距上次重算多久都全量重算')
+def recompute_stats_command(force):
+    """全量重算统计快照，修正增量维护的偏差（可由 cron 定期执行）"""
+    from .models import RESOURCE_MODELS
+    from .stats import recompute, refresh_stats
+    for name, model in RESOURCE_MODELS.items():
+        stats = recompute(model) if force else refresh_stats(model)
+        click.echo(f'{name}: {stats.total} 条记录，上次重算于 {stats.recomputed_at:%Y-%m-%d %H:%M:%S}')
+
+
+def warm_up(app):
+    """在 gunicorn 主进程中预热：构建各工作进程共用的快照和汇总表
+
+    preload 模式下工作进程由主进程 fork，列式快照等内存数据以写时复制共享，
+    汇总表（统计、分类树、地图聚合）只由主进程检查和构建一次，统计快照过期时在此全量重算。
+    数据库不可用时只记录警告，工作进程照常启动并在请求时按需构建
+    """
+    from . import db
+    from .analytics import analytics
+    from .clusters import ensure_built as ensure_clusters
+    from .models import RESOURCE_MODELS
+    from .stats import refresh_stats
+    from .taxonomy import ensure_built as ensure_taxonomy
+
+    with app.app_context():
+        try:
+            for model in RESOURCE_MODELS.values():
+                ensure_clusters(model)
+                ensure_taxonomy(model)
+                refresh_stats(model)
+                analytics.get(model)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning('预热失败，改为在请求时按需构建: %s', e)
+        finally:
+            db.session.remove()
+            # 连接不能跨进程共享，fork 前关闭主进程的全部连接
+            db.engine.dispose()
@@ -0,0 +1,154 @@
+import csv
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import quoteattr
+from flask import Response, stream_with_context
+from .models import import_columns, format_image_paths
+from .pagination import STREAM_CHUNK_SIZE, _buffered
+
+# Darwin Core 术语的命名空间
+DWC_NAMESPACE = 'http://rs.tdwg.org/dwc/terms/'
+
+# DwC-A 中记录的类型（标本）
+BASIS_OF_RECORD = 'PreservedSpecimen'
+
+# CSV 导出时需要还原为导入格式的列
+CSV_FORMATTERS = {
+    'image_url': format_image_paths,
+}
+
+
+class _Echo:
+    """csv.writer 的输出目标：write 直接返回写入的内容"""
+
+    def write(self, value):
+        return value
+
+
+class _ZipSink:
+    """ZipFile 的输出目标：不可 seek，写入的数据暂存到下次 drain"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def format_value(value):
+    """导出的字段值：空值为空字符串，日期为 ISO 格式"""
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_columns(model):
+    """CSV 导出的 (列名, 表头)，表头与导入时一致，导出的文件可以重新导入"""
+    field_names = {value: key for key, value in getattr(model, 'FIELD_MAPPING', {}).items()}
+    columns = [('id', 'id')]
+    for key in import_columns(model):
+        column = model.__table__.columns[key]
+        columns.append((key, column.comment or field_names.get(key, key)))
+    return columns
+
+
+def dwc_columns(model):
+    """DwC-A 导出的 (列名, DwC 术语)，第一列为记录 id"""
+    return [('id', 'id')] + list(model.DWC_TERMS.items())
+
+
+def iter_rows(query, model, keys, formatters=None, chunk_size=STREAM_CHUNK_SIZE):
+    """按主键顺序逐块读取指定列，只构造行元组而不构造 ORM 实例
+
+    yield_per 使用服务器端游标（MySQL 为流式结果），内存占用与结果数量无关。
+    formatters 为 列名 -> 转换函数，先于 format_value 应用
+    """
+    columns = [getattr(model, key) for key in keys]
+    converters = [(formatters or {}).get(key) for key in keys]
+    query = query.with_entities(*columns).order_by(None).order_by(model.id)
+    for row in query.yield_per(chunk_size):
+        yield [format_value(convert(value) if convert else value)
+               for convert, value in zip(converters, row)]
+
+
+def iter_csv(rows, header):
+    """逐行输出 CSV 文本"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(query, model, filename):
+    """流式输出 CSV 文件（UTF-8 带 BOM，Excel 可以直接打开）"""
+    columns = csv_columns(model)
+    rows = iter_rows(query, model, [key for key, _ in columns], CSV_FORMATTERS)
+
+    def generate():
+        yield '\ufeff'
+        yield from _buffered(iter_csv(rows, [header for _, header in columns]))
+
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
+def meta_xml(terms, location='occurrence.txt'):
+    """DwC-A 的 meta.xml：核心文件为记录（Occurrence），第一列为 id"""
+    fields = [f'    <field index="{index}" term="{DWC_NAMESPACE}{term}"/>'
+              for index, term in enumerate(terms) if index]
+    fields.append(f'    <field default={quoteattr(BASIS_OF_RECORD)} term="{DWC_NAMESPACE}basisOfRecord"/>')
+    return '\n'.join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<archive xmlns="http://rs.tdwg.org/dwc/text/">',
+        '  <core encoding="UTF-8" fieldsTerminatedBy="," linesTerminatedBy="\\r\\n" '
+        'fieldsEnclosedBy="&quot;" ignoreHeaderLines="1" '
+        f'rowType="{DWC_NAMESPACE}Occurrence">',
+        f'    <files><location>{location}</location></files>',
+        '    <id index="0"/>',
+        *fields,
+        '  </core>',
+        '</archive>',
+        '',
+    ])
+
+
+def iter_dwca(rows, terms):
+    """逐块输出 DwC-A 压缩包：meta.xml 和 occurrence.txt
+
+    压缩包写入不可 seek 的输出目标（使用数据描述符记录长度），边压缩边输出
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('meta.xml', meta_xml(terms))
+        with archive.open('occurrence.txt', 'w', force_zip64=True) as entry:
+            for chunk in _buffered(iter_csv(rows, terms)):
+                entry.write(chunk.encode('utf-8'))
+                data = sink.drain()
+                if data:
+                    yield data
+    yield sink.drain()
+
+
+def dwca_response(query, model, filename):
+    """流式输出 Darwin Core Archive 压缩包"""
+    columns = dwc_columns(model)
+    rows = iter_rows(query, model, [key for key, _ in columns])
+    return Response(stream_with_context(iter_dwca(rows, [term for _, term in columns])),
+                    mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
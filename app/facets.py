@@ -0,0 +1,45 @@
+from sqlalchemy import func
+from . import db
+from .cache import cache
+from .models import PlantResource, InsectResource
+
+# 列表页筛选项：名称 -> 字段
+FACETS = {
+    PlantResource: {
+        'families': 'family',
+        'countries': 'country',
+        'habitats': 'habitat',
+    },
+    InsectResource: {
+        'families': 'family_name',
+        'provinces': 'province',
+    },
+}
+
+
+def _facet_counts(model, field):
+    """统计字段每个取值的记录数，按取值排序"""
+    column = getattr(model, field)
+    rows = (db.session.query(column, func.count())
+            .filter(column.isnot(None), column != '')
+            .group_by(column)
+            .order_by(column)
+            .all())
+    return [(value, count) for value, count in rows]
+
+
+def get_facets(model):
+    """获取模型全部筛选项及其记录数，结果缓存至数据变化为止
+
+    返回 {名称: [(取值, 记录数), ...]}
+    """
+    return cache.get(
+        model.__tablename__, 'facets',
+        lambda: {name: _facet_counts(model, field)
+                 for name, field in FACETS[model].items()}
+    )
+
+
+def get_total(model):
+    """获取模型的总记录数（缓存）"""
+    return cache.get(model.__tablename__, 'total', lambda: model.query.count())
@@ -0,0 +1,130 @@
+import math
+from sqlalchemy import and_, or_
+from .geohash import cover_ranges
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, iter_keyset, keyset_page
+
+# 地球平均半径（米）和每度纬度对应的距离
+EARTH_RADIUS = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+
+def parse_bbox(value):
+    """解析 bbox 参数：最小经度,最小纬度,最大经度,最大纬度"""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('bbox 格式应为 最小经度,最小纬度,最大经度,最大纬度')
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError('经度应在 -180 到 180 之间')
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise ValueError('纬度应在 -90 到 90 之间，且最小纬度不大于最大纬度')
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def radius_bbox(latitude, longitude, radius):
+    """圆形范围的外接矩形，跨越 180 度经线时最小经度大于最大经度"""
+    dlat = radius / METERS_PER_DEGREE
+    min_lat = max(latitude - dlat, -90.0)
+    max_lat = min(latitude + dlat, 90.0)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    dlon = dlat / cos_lat if cos_lat > 1e-12 else 360.0
+    if dlon >= 180:
+        return -180.0, min_lat, 180.0, max_lat
+
+    min_lon = longitude - dlon
+    max_lon = longitude + dlon
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """两点间的大圆距离（米）"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def coordinates(model):
+    """模型的 (纬度, 经度) 列"""
+    latitude, longitude = model.GEO_FIELDS
+    return getattr(model, latitude), getattr(model, longitude)
+
+
+def split_bbox(bbox):
+    """跨越 180 度经线的矩形拆成两个，其余原样返回"""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon > max_lon:
+        return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+    return [tuple(bbox)]
+
+
+def range_filter(column, ranges):
+    """geohash 列落在任一区间内的条件，没有区间时返回 None"""
+    conditions = [column >= lower if upper is None else and_(column >= lower, column < upper)
+                  for lower, upper in ranges]
+    return or_(*conditions) if conditions else None
+
+
+def filter_bbox(query, model, bbox):
+    """按矩形范围过滤，先用 geohash 索引区间缩小范围，再精确比较经纬度"""
+    latitude, longitude = coordinates(model)
+
+    conditions = []
+    for box_min_lon, box_min_lat, box_max_lon, box_max_lat in split_bbox(bbox):
+        cells = range_filter(model.geohash, cover_ranges(box_min_lon, box_min_lat,
+                                                         box_max_lon, box_max_lat))
+        conditions.append(and_(
+            cells if cells is not None else model.geohash.isnot(None),
+            latitude.between(box_min_lat, box_max_lat),
+            longitude.between(box_min_lon, box_max_lon),
+        ))
+    return query.filter(or_(*conditions))
+
+
+def sort_key(model):
+    """范围查询分页使用的主键表达式
+
+    写作 id + 0 使主键索引不可用：SQLite 没有统计信息时，
+    会为满足 ORDER BY id LIMIT n 而按主键扫描全表，而不使用 geohash 索引
+    """
+    return model.id + 0
+
+
+def within_bbox(query, model, bbox, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """矩形范围查询，按主键游标分页，返回 (记录列表, 下一页游标)"""
+    return keyset_page(filter_bbox(query, model, bbox), model, cursor, limit, sort_key(model))
+
+
+def within_radius(query, model, latitude, longitude, radius, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """圆形范围查询，按主键游标分页
+
+    先按外接矩形走索引取出候选记录，再逐条计算距离。
+    返回 ([(记录, 距离米), ...], 下一页游标)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = filter_bbox(query, model, radius_bbox(latitude, longitude, radius))
+    key = sort_key(model)
+    if cursor is not None:
+        query = query.filter(key > cursor)
+
+    lat_field, lon_field = model.GEO_FIELDS
+    results = []
+    for item in iter_keyset(query, model, key=key):
+        distance = haversine(latitude, longitude,
+                             getattr(item, lat_field), getattr(item, lon_field))
+        if distance <= radius:
+            results.append((item, distance))
+            if len(results) > limit:
+                break
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = results[-1][0].id
+    return results, next_cursor
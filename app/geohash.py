@@ -0,0 +1,126 @@
+# geohash 使用的 base32 字符表（按字典序排列）
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# 存储的 geohash 长度，9 位约 5 米精度
+GEOHASH_PRECISION = 9
+
+# 范围查询时最多展开的 geohash 格子数，格子越多精度越高但查询条件越长
+MAX_CELLS = 32
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """将经纬度编码为 geohash，坐标缺失或超出范围时返回 None"""
+    if latitude is None or longitude is None:
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        # 偶数位编码经度，奇数位编码纬度
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (interval[0] + interval[1]) / 2
+        if coordinate >= mid:
+            value = value * 2 + 1
+            interval[0] = mid
+        else:
+            value = value * 2
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """给定长度的 geohash 格子大小 (经度跨度, 纬度跨度)"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 360.0 / 2 ** lon_bits, 180.0 / 2 ** lat_bits
+
+
+def _next_prefix(cell):
+    """字典序紧随该前缀所有 geohash 之后的字符串，全为 z 时返回 None"""
+    chars = list(cell)
+    while chars:
+        index = BASE32.index(chars[-1])
+        if index + 1 < len(BASE32):
+            chars[-1] = BASE32[index + 1]
+            return ''.join(chars)
+        chars.pop()
+    return None
+
+
+def cell_bounds(cell):
+    """geohash 格子的范围 (最小经度, 最小纬度, 最大经度, 最大纬度)"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return lon_range[0], lat_range[0], lon_range[1], lat_range[1]
+
+
+def cell_span(min_lon, min_lat, max_lon, max_lat, precision):
+    """矩形范围在给定长度下覆盖的格子下标范围 (x0, x1, y0, y1)"""
+    width, height = cell_size(precision)
+    columns = 2 ** ((5 * precision + 1) // 2)
+    rows = 2 ** (5 * precision // 2)
+    return (min(int((min_lon + 180) / width), columns - 1),
+            min(int((max_lon + 180) / width), columns - 1),
+            min(int((min_lat + 90) / height), rows - 1),
+            min(int((max_lat + 90) / height), rows - 1))
+
+
+def cell_count(min_lon, min_lat, max_lon, max_lat, precision):
+    """矩形范围在给定长度下覆盖的格子数"""
+    x0, x1, y0, y1 = cell_span(min_lon, min_lat, max_lon, max_lat, precision)
+    return (x1 - x0 + 1) * (y1 - y0 + 1)
+
+
+def cover_ranges(min_lon, min_lat, max_lon, max_lat, max_cells=MAX_CELLS,
+                 max_precision=GEOHASH_PRECISION):
+    """覆盖矩形范围的 geohash 区间列表 [(下界, 上界), ...]
+
+    选择使格子数不超过 max_cells 的最长前缀（不超过 max_precision 位），
+    相邻格子合并为一个区间。范围过大（一位前缀也超过 max_cells 个格子）时返回空列表。
+    """
+    for precision in range(max_precision, 0, -1):
+        if cell_count(min_lon, min_lat, max_lon, max_lat, precision) <= max_cells:
+            break
+    else:
+        return []
+
+    width, height = cell_size(precision)
+    x0, x1, y0, y1 = cell_span(min_lon, min_lat, max_lon, max_lat, precision)
+
+    cells = sorted(
+        encode_geohash(-90 + (y + 0.5) * height, -180 + (x + 0.5) * width, precision)
+        for x in range(x0, x1 + 1)
+        for y in range(y0, y1 + 1)
+    )
+
+    ranges = []
+    for cell in cells:
+        upper = _next_prefix(cell)
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1] = (ranges[-1][0], upper)
+        else:
+            ranges.append((cell, upper))
+    return ranges
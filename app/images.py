@@ -0,0 +1,237 @@
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, url_for
+from sqlalchemy import select, delete
+from werkzeug.security import safe_join
+from . import db
+from .cache import cache
+from .models import InsectResource, ImageDerivative
+from .signals import resource_changed
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 未安装时不生成缩略图，页面直接引用原图
+    Image = ImageOps = None
+
+# 派生图规格：名称 -> 最大宽高
+VARIANTS = {
+    'preview': (1024, 1024),
+    'thumb': (240, 240),
+}
+
+# 派生图的 JPEG 质量
+JPEG_QUALITY = 82
+
+# 派生图在静态目录中的子目录
+DERIVED_DIR = 'derived'
+
+# 写操作后在后台生成派生图的进程池（每个 Web 进程一个，任务依次执行）
+_executor = None
+
+
+def image_sources(value):
+    """拆分 image_url 字段中以 | 分隔的图像路径"""
+    return [path for path in (value or '').split('|') if path]
+
+
+def source_path(static_folder, source):
+    """原图在静态目录中的路径，不在静态目录内（绝对路径、../、指向外部的链接）时返回 None"""
+    path = safe_join(static_folder, source)
+    if path is None:
+        return None
+    root = os.path.realpath(static_folder)
+    if os.path.commonpath([root, os.path.realpath(path)]) != root:
+        return None
+    return path
+
+
+def derivative_name(digest, variant):
+    """按原图内容和规格计算派生图路径，内容不变路径就不变，可以长期缓存"""
+    width, height = VARIANTS[variant]
+    key = hashlib.sha256(f'{digest}:{variant}:{width}x{height}:{JPEG_QUALITY}'.encode()).hexdigest()[:24]
+    return f'{DERIVED_DIR}/{key[:2]}/{key}.jpg'
+
+
+def render(static_folder, source):
+    """为一张原图生成全部规格的派生图（在工作进程中执行）
+
+    返回 [{source, variant, path, width, height}, ...]
+    """
+    path = source_path(static_folder, source)
+    if path is None:
+        raise ValueError('图像路径不在静态目录内')
+    with open(path, 'rb') as file:
+        data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    results = []
+    with Image.open(io.BytesIO(data)) as original:
+        # JPEG 解码时直接按 1/2、1/4、1/8 缩小，避免解码全尺寸原图
+        largest = max(max(size) for size in VARIANTS.values())
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        # 从大到小依次缩小，小规格复用上一级的结果
+        for variant, size in sorted(VARIANTS.items(), key=lambda item: -max(item[1])):
+            image = image.copy()
+            image.thumbnail(size, Image.LANCZOS)
+            path = derivative_name(digest, variant)
+            target = os.path.join(static_folder, path)
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                temporary = f'{target}.{os.getpid()}.tmp'
+                image.save(temporary, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+                os.replace(temporary, target)
+            results.append({'source': source, 'variant': variant, 'path': path,
+                            'width': image.width, 'height': image.height})
+    return results
+
+
+def _render_safely(static_folder, source):
+    """render 的包装：原图缺失或无法解码时返回错误信息而不是抛出异常"""
+    try:
+        return render(static_folder, source), None
+    except Exception as e:
+        return [], f'{source}: {e}'
+
+
+class ImageStore:
+    """图像派生图（缩略图、预览图）的生成和查找
+
+    派生图以内容寻址的文件名写入静态目录，由 nginx 按不可变资源缓存；
+    原图与派生图的对应关系保存在 image_derivatives 表中。
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('IMAGE_WORKERS', None)
+        app.add_template_global(self.image_url)
+
+    def available(self):
+        return Image is not None
+
+    def manifest(self):
+        """原图 -> {规格: 派生图路径}，缓存至派生图有变化为止"""
+        def load():
+            result = {}
+            for source, variant, path in db.session.execute(
+                    select(ImageDerivative.source, ImageDerivative.variant, ImageDerivative.path)):
+                result.setdefault(source, {})[variant] = path
+            return result
+        return cache.get(ImageDerivative.__tablename__, 'manifest', load)
+
+    def image_url(self, source, variant=None):
+        """图像的访问地址，有派生图时返回对应规格，否则返回原图"""
+        if variant:
+            path = self.manifest().get(source, {}).get(variant)
+            if path:
+                return url_for('static', filename=path)
+        return url_for('static', filename=source)
+
+    def build(self, sources, workers=None):
+        """为原图生成派生图并记录对应关系，已生成过的原图跳过
+
+        workers 为工作进程数（默认取 IMAGE_WORKERS 或 CPU 核数），为 0 时在当前进程中生成。
+        返回 {generated, skipped, failed}
+        """
+        sources = sorted(set(sources))
+        if not self.available():
+            current_app.logger.warning('未安装 Pillow，跳过生成缩略图')
+            return {'generated': 0, 'skipped': len(sources), 'failed': 0}
+
+        static_folder = current_app.static_folder
+        # image_url 可由用户填写，只处理静态目录中的文件
+        rejected = [source for source in sources if source_path(static_folder, source) is None]
+        if rejected:
+            current_app.logger.warning('忽略静态目录以外的图像路径: %s', ', '.join(rejected))
+
+        done = self.manifest()
+        pending = [source for source in sources
+                   if source not in rejected and set(done.get(source, ())) != set(VARIANTS)]
+
+        if workers is None:
+            workers = current_app.config['IMAGE_WORKERS'] or os.cpu_count() or 1
+        if workers and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(_render_safely, [static_folder] * len(pending),
+                                             pending, chunksize=8))
+        else:
+            outcomes = [_render_safely(static_folder, source) for source in pending]
+
+        failed = 0
+        for results, error in outcomes:
+            if error:
+                failed += 1
+                current_app.logger.warning(f'生成缩略图失败 {error}')
+                continue
+            for result in results:
+                db.session.execute(delete(ImageDerivative).where(
+                    ImageDerivative.source == result['source'],
+                    ImageDerivative.variant == result['variant']))
+                db.session.add(ImageDerivative(**result))
+        db.session.commit()
+        if pending:
+            cache.bump(ImageDerivative.__tablename__)
+        return {'generated': len(pending) - failed,
+                'skipped': len(sources) - len(pending) - len(rejected),
+                'failed': failed + len(rejected)}
+
+    def build_all(self, workers=None):
+        """为全部昆虫记录的图像生成派生图"""
+        sources = set()
+        for (value,) in db.session.execute(
+                select(InsectResource.image_url).where(InsectResource.image_url.isnot(None))):
+            sources.update(image_sources(value))
+        return self.build(sources, workers)
+
+
+image_store = ImageStore()
+
+
+def run_build(sources=None):
+    """进程池入口：在后台进程中创建应用并生成派生图，sources 为 None 时为全部记录生成"""
+    from . import create_app
+    app = create_app()
+    with app.app_context():
+        if sources is None:
+            image_store.build_all()
+        else:
+            image_store.build(sources, workers=0)
+
+
+def _submit(sources=None):
+    """将生成任务交给后台进程执行，进程池异常退出后重新创建"""
+    global _executor
+    for _ in range(2):
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=1)
+        try:
+            _executor.submit(run_build, sources)
+            return
+        except (BrokenProcessPool, RuntimeError):
+            _executor = None
+    raise RuntimeError('无法启动生成缩略图的进程')
+
+
+@resource_changed.connect
+def _on_change(sender, action, old, new):
+    """新增或修改昆虫记录、批量导入后在后台生成派生图，写操作不等待
+
+    生成完成前页面引用原图
+    """
+    if sender is not InsectResource or not image_store.available():
+        return
+    if action == 'reload':
+        sources = None
+    else:
+        sources = [source for record in new for source in image_sources(record.get('image_url'))]
+        if not sources:
+            return
+    try:
+        _submit(sources)
+    except RuntimeError as e:
+        current_app.logger.warning('生成缩略图失败: %s', e)
@@ -0,0 +1,343 @@
+import codecs
+import csv
+import io
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from sqlalchemy import insert
+from . import db
+
+# 默认每批插入的记录数
+DEFAULT_BATCH_SIZE = 1000
+
+# 依次尝试的文件编码
+CANDIDATE_ENCODINGS = ['utf-8-sig', 'gbk', 'gb2312', 'utf-8']
+
+# 编码检测读取的字节数
+SNIFF_SIZE = 256 * 1024
+
+# 并行解析的进程数，1 为在当前进程中逐行解析
+PARSE_WORKERS = 1
+
+# 并行解析时每块的大约字节数
+PARSE_CHUNK_SIZE = 4 * 1024 * 1024
+
+# 编码只按文件开头检测，之后的内容按 surrogateescape 读取：
+# 无法按该编码解码的字节变为 U+DC80～U+DCFF，所在的行写入错误文件
+UNDECODABLE = re.compile('[\udc80-\udcff]')
+
+
+def detect_encoding(csv_file_path, encodings=CANDIDATE_ENCODINGS, sample_size=SNIFF_SIZE):
+    """读取文件开头一段字节检测编码，只读取一次，不加载整个文件"""
+    with open(csv_file_path, 'rb') as file:
+        sample = file.read(sample_size)
+        at_eof = not file.read(1)
+
+    for encoding in encodings:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            # 样本末尾可能截断多字节字符，未读完时不要求完整解码
+            decoder.decode(sample, final=at_eof)
+        except UnicodeDecodeError:
+            continue
+        return encoding
+    raise ValueError(f"无法识别CSV文件编码，已尝试: {', '.join(encodings)}")
+
+
+def check_decoded(convert, encoding):
+    """包装行转换器：行中有无法解码的字节时抛出 ValueError（而不是中断整个导入）"""
+    def convert_checked(values):
+        if UNDECODABLE.search('\x1f'.join(values)):
+            raise ValueError(f'包含无法按 {encoding} 解码的字节')
+        return convert(values)
+    return convert_checked
+
+
+def read_csv_header(csv_file_path, encoding):
+    """读取CSV文件表头"""
+    with open(csv_file_path, 'r', encoding=encoding, newline='') as file:
+        return next(csv.reader(file), [])
+
+
+def iter_csv_rows(csv_file_path, encoding, start_line=0):
+    """逐行读取CSV文件（跳过表头和空行），产生 (行号, 值列表)，内存占用与文件大小无关
+
+    start_line 为已处理的最后一行的行号，用于从中断处继续导入；
+    无法解码的字节保留为代理字符，由 check_decoded 按行报错
+    """
+    with open(csv_file_path, 'r', encoding=encoding, errors='surrogateescape', newline='') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for values in reader:
+            if values and reader.line_num > start_line:
+                yield reader.line_num, values
+
+
+def plan_chunks(csv_file_path, chunk_size=PARSE_CHUNK_SIZE, block_size=1024 * 1024):
+    """将表头之后的内容按字节切分为约 chunk_size 大小的块，切分点对齐到记录边界
+
+    引号内的字段可以跨行（如 plants.csv 的 recordedBy），只有之前的双引号个数为偶数
+    （不在引号内）的换行才是记录边界。UTF-8 和 GBK 的多字节字符不含双引号和换行的字节值，
+    可以直接按字节判断。返回 [(起始偏移, 结束偏移, 起始偏移之前的行数), ...]
+    """
+    boundaries = []
+    target = 0
+    quotes = lines = 0
+    base = 0
+    with open(csv_file_path, 'rb') as file:
+        while block := file.read(block_size):
+            pos = 0
+            while pos < len(block):
+                if base + pos < target:
+                    # 距离下一个切分点较远，整段统计引号和换行
+                    skip = min(target - base, len(block))
+                    quotes += block.count(b'"', pos, skip)
+                    lines += block.count(b'\n', pos, skip)
+                    pos = skip
+                    continue
+                newline = block.find(b'\n', pos)
+                if newline < 0:
+                    quotes += block.count(b'"', pos)
+                    break
+                quotes += block.count(b'"', pos, newline)
+                lines += 1
+                pos = newline + 1
+                if quotes % 2 == 0:
+                    boundaries.append((base + pos, lines))
+                    target = base + pos + chunk_size
+            base += len(block)
+
+    # 第一个边界为表头结束处
+    chunks = []
+    for index, (start, lines_before) in enumerate(boundaries):
+        end = boundaries[index + 1][0] if index + 1 < len(boundaries) else base
+        if end > start:
+            chunks.append((start, end, lines_before))
+    return chunks
+
+
+def convert_rows(rows, convert):
+    """逐行转换，产生 (行号, 原始值, 记录, 错误)，转换失败时记录为 None"""
+    for line, row in rows:
+        try:
+            yield line, row, convert(row), None
+        except Exception as e:
+            yield line, row, None, e
+
+
+# 工作进程中按 (模型, 表头) 缓存的行转换器，同一进程处理的各块复用日期解析缓存
+_chunk_mappers = {}
+
+
+def parse_chunk(model, csv_file_path, encoding, start, end, lines_before, header, start_line=0):
+    """解析并转换一块记录（在工作进程中执行），返回 (行号, 原始值, 记录, 错误) 列表
+
+    行号与逐行读取时 csv.reader 的 line_num 一致；错误转换为字符串以便跨进程传递
+    """
+    mapper = _chunk_mappers.get((model, header))
+    if mapper is None:
+        mapper = _chunk_mappers[(model, header)] = check_decoded(model.compile_mapper(header),
+                                                                 encoding)
+
+    with open(csv_file_path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(encoding, 'surrogateescape')
+
+    reader = csv.reader(io.StringIO(text, newline=''))
+    rows = ((lines_before + reader.line_num, values) for values in reader
+            if values and lines_before + reader.line_num > start_line)
+    return [(line, row, record, None if error is None else str(error))
+            for line, row, record, error in convert_rows(rows, mapper)]
+
+
+def iter_parallel_records(model, csv_file_path, encoding, header, workers,
+                          start_line=0, chunk_size=PARSE_CHUNK_SIZE):
+    """按记录边界分块，在进程池中并行解析和转换，按文件顺序产生 (行号, 原始值, 记录, 错误)
+
+    同时最多有 workers * 2 块在解析或等待写入，内存占用与文件大小无关
+    """
+    header = tuple(header)
+    chunks = plan_chunks(csv_file_path, chunk_size)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for index, (start, end, lines_before) in enumerate(chunks):
+            # 继续导入时跳过已全部处理过的块
+            if index + 1 < len(chunks) and chunks[index + 1][2] <= start_line:
+                continue
+            pending.append(executor.submit(parse_chunk, model, csv_file_path, encoding,
+                                           start, end, lines_before, header, start_line))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def iter_csv_records(model, csv_file_path, encoding, header, start_line=0, workers=None):
+    """读取并转换CSV记录，产生 (行号, 原始值, 记录, 错误)
+
+    workers 默认取 IMPORT_PARSE_WORKERS，大于 1 时分块并行解析，结果与逐行解析一致
+    """
+    if workers is None:
+        workers = current_app.config.get('IMPORT_PARSE_WORKERS', PARSE_WORKERS)
+    if workers > 1:
+        return iter_parallel_records(model, csv_file_path, encoding, header, workers, start_line)
+    mapper = check_decoded(model.compile_mapper(tuple(header)), encoding)
+    return convert_rows(iter_csv_rows(csv_file_path, encoding, start_line), mapper)
+
+
+class RejectWriter:
+    """将无法导入的行写入 CSV 文件，出现第一条错误行时才创建文件
+
+    append 为 True 时（继续导入）追加到已有的文件，count 从 count 参数开始计数
+    """
+
+    def __init__(self, path, header=None, append=False, count=0):
+        self.path = path
+        self.header = list(header or [])
+        self.append = append
+        self.count = count
+        self._file = None
+        self._writer = None
+
+    def write(self, line, values, error):
+        self.count += 1
+        if self.path is None:
+            return
+        if self._writer is None:
+            if self.append and os.path.exists(self.path):
+                self._file = open(self.path, 'a', encoding='utf-8', errors='replace', newline='')
+                self._writer = csv.writer(self._file)
+            else:
+                # 无法解码的字节（代理字符）写为 ?
+                self._file = open(self.path, 'w', encoding='utf-8-sig', errors='replace', newline='')
+                self._writer = csv.writer(self._file)
+                self._writer.writerow(['_line', '_error'] + self.header)
+        self._writer.writerow([line, str(error)] + list(values))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def reject_path_for(csv_file_path):
+    """默认的错误行文件路径：与源文件同目录，后缀为 .rejects.csv"""
+    return os.path.splitext(csv_file_path)[0] + '.rejects.csv'
+
+
+def _insert_batch(model, batch, rejects, checkpoint=None):
+    """以 executemany 插入一批记录，返回成功条数
+
+    整批失败时逐行重试，只有出错的行写入错误文件，不影响同批其他行。
+    checkpoint(行号, 新增条数, 失败总数) 与插入在同一事务中执行，用于记录导入进度
+    """
+    statement = insert(model.__table__)
+    try:
+        db.session.execute(statement, [record for _, _, record in batch])
+        if checkpoint:
+            checkpoint(batch[-1][0], len(batch), rejects.count)
+        db.session.commit()
+        return len(batch)
+    except Exception:
+        db.session.rollback()
+
+    inserted = 0
+    for line, row, record in batch:
+        try:
+            db.session.execute(statement, [record])
+            if checkpoint:
+                checkpoint(line, 1, rejects.count)
+            db.session.commit()
+            inserted += 1
+        except Exception as e:
+            db.session.rollback()
+            rejects.write(line, row, e)
+    if checkpoint:
+        checkpoint(batch[-1][0], 0, rejects.count)
+        db.session.commit()
+    return inserted
+
+
+def bulk_load(model, rows, convert, batch_size=None, reject_path=None, header=None,
+              checkpoint=None, should_stop=None, rejects=None):
+    """批量导入数据
+
+    rows 为 (行号, 原始值列表) 的可迭代对象，convert 将原始值转换为 列名 -> 值 的字典；
+    convert 为 None 时 rows 为已转换的 (行号, 原始值, 记录, 错误)（见 convert_rows）。
+    转换或插入失败的行连同表头 header 写入 reject_path，返回导入统计信息。
+
+    checkpoint 见 _insert_batch；should_stop() 在每批提交后调用，返回 True 时停止导入
+    （已提交的批次保留，可从 checkpoint 记录的行号继续）。rejects 为已有的 RejectWriter。
+    """
+    if batch_size is None:
+        batch_size = current_app.config.get('IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+    if rejects is None:
+        rejects = RejectWriter(reject_path, header)
+    start = time.perf_counter()
+    inserted = 0
+    stopped = False
+    batch = []
+    line = None
+    if convert is not None:
+        rows = convert_rows(rows, convert)
+
+    try:
+        for line, row, record, error in rows:
+            if error is not None:
+                rejects.write(line, row, error)
+                continue
+
+            batch.append((line, row, record))
+            if len(batch) >= batch_size:
+                inserted += _insert_batch(model, batch, rejects, checkpoint)
+                batch = []
+                elapsed = time.perf_counter() - start
+                print(f"已导入 {inserted} 条记录 ({inserted / elapsed:.0f} 行/秒)")
+                if should_stop and should_stop():
+                    stopped = True
+                    break
+
+        if batch:
+            inserted += _insert_batch(model, batch, rejects, checkpoint)
+        elif checkpoint and line is not None and not stopped:
+            # 最后几行全部转换失败时也要记录进度
+            checkpoint(line, 0, rejects.count)
+            db.session.commit()
+    finally:
+        rejects.close()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'inserted': inserted,
+        'rejected': rejects.count,
+        'stopped': stopped,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(inserted / elapsed, 1) if elapsed else None,
+    }
+    print(f"数据导入完成: 成功 {inserted} 条, 失败 {rejects.count} 条, "
+          f"用时 {elapsed:.2f} 秒 ({stats['rows_per_second']} 行/秒)")
+    if rejects.count and reject_path:
+        print(f"失败的行已写入: {reject_path}")
+    return stats
+
+
+def load_csv(model, csv_file_path, batch_size=None, reject_path=None, encoding=None, workers=None):
+    """从CSV文件批量导入模型数据
+
+    表头只解析一次得到行转换器（model.compile_mapper），之后流式转换和插入；
+    workers 大于 1 时由多个进程分块解析转换，仍由当前进程按文件顺序写入
+    """
+    if encoding is None:
+        encoding = detect_encoding(csv_file_path)
+    if reject_path is None:
+        reject_path = reject_path_for(csv_file_path)
+
+    header = read_csv_header(csv_file_path, encoding)
+    records = iter_csv_records(model, csv_file_path, encoding, header, workers=workers)
+    return bulk_load(model, records, None, batch_size, reject_path, header)
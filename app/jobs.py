@@ -0,0 +1,196 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update
+from werkzeug.utils import secure_filename
+from . import db
+from .importer import (detect_encoding, read_csv_header, iter_csv_records, bulk_load,
+                       RejectWriter, reject_path_for)
+from .models import RESOURCE_MODELS, ImportJob
+from .signals import notify_change
+
+# 每个 Web 进程中执行导入任务的进程数
+IMPORT_WORKERS = 1
+
+# 执行中的任务超过该时间（秒）没有提交新批次时视为已中断（如进程被重启），允许继续导入
+STALE_SECONDS = 300
+
+# 尚未结束的任务状态
+ACTIVE_STATUSES = ('pending', 'running', 'cancelling')
+
+_executor = None
+
+
+def count_lines(path, chunk_size=1024 * 1024):
+    """统计文件行数（按换行符计数，用于估算进度）"""
+    lines = 0
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            lines += chunk.count(b'\n')
+    return lines
+
+
+def import_folder():
+    """上传的 CSV 文件的保存目录，默认为 instance/imports"""
+    folder = current_app.config.get('IMPORT_FOLDER') or os.path.join(current_app.instance_path, 'imports')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def save_upload(file):
+    """保存上传的 CSV 文件，文件名加上时间前缀避免覆盖，返回保存路径"""
+    filename = secure_filename(file.filename or '') or 'upload.csv'
+    path = os.path.join(import_folder(), f'{datetime.utcnow():%Y%m%d%H%M%S}_{filename}')
+    file.save(path)
+    return path
+
+
+def _submit(job_id):
+    """将任务交给进程池执行，进程池异常退出后重新创建"""
+    global _executor
+    for _ in range(2):
+        if _executor is None:
+            workers = current_app.config.get('IMPORT_WORKERS', IMPORT_WORKERS)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            _executor.submit(run_job, job_id)
+            return
+        except (BrokenProcessPool, RuntimeError):
+            _executor = None
+    raise RuntimeError('无法启动导入进程')
+
+
+def create_job(resource, path):
+    """创建导入任务并提交执行，resource 为 RESOURCE_MODELS 中的名称"""
+    job = ImportJob(resource=RESOURCE_MODELS[resource].__tablename__, path=path)
+    db.session.add(job)
+    db.session.commit()
+    _submit(job.id)
+    return job
+
+
+def is_stale(job):
+    return (job.status in ACTIVE_STATUSES and job.updated_at is not None
+            and job.updated_at < datetime.utcnow() - timedelta(seconds=STALE_SECONDS))
+
+
+def cancel_job(job):
+    """取消任务：等待中或已中断的任务直接取消，执行中的任务在当前批次提交后停止
+
+    返回是否已请求取消
+    """
+    now = datetime.utcnow()
+    if job.status == 'pending' or is_stale(job):
+        values = {'status': 'cancelled', 'finished_at': now}
+    elif job.status == 'running':
+        values = {'status': 'cancelling'}
+    else:
+        return False
+    result = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id, ImportJob.status == job.status)
+        .values(updated_at=now, **values)
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
+
+def resume_job(job):
+    """从最后提交的批次之后继续导入已取消、失败或中断的任务，返回是否已提交"""
+    if job.status not in ('cancelled', 'failed') and not is_stale(job):
+        return False
+    # 以读到的状态和心跳时间为条件，避免并发请求重复提交
+    result = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id,
+               ImportJob.status == job.status,
+               ImportJob.updated_at == job.updated_at)
+        .values(status='pending', error=None, finished_at=None, updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    if not result.rowcount:
+        return False
+    _submit(job.id)
+    return True
+
+
+def run_job(job_id):
+    """进程池入口：在工作进程中创建应用并执行任务（使用新的数据库连接池）"""
+    from . import create_app
+    app = create_app()
+    with app.app_context():
+        execute(job_id)
+
+
+def _finish(job_id, status, error=None):
+    now = datetime.utcnow()
+    db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id)
+        .values(status=status, error=error, finished_at=now, updated_at=now)
+    )
+    db.session.commit()
+
+
+def execute(job_id):
+    """执行导入任务
+
+    每批记录与任务进度在同一事务中提交，任务中断后从 last_line 之后继续不会重复导入；
+    每批提交后检查任务状态，被取消时停止。导入结束后通知各订阅方重建派生数据。
+    """
+    # 只有等待中的任务可以开始，避免同一任务被重复执行
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.status == 'pending')
+        .values(status='running', start_line=ImportJob.last_line,
+                started_at=now, updated_at=now)
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return
+
+    job = db.session.get(ImportJob, job_id)
+    model = next(model for model in RESOURCE_MODELS.values()
+                 if model.__tablename__ == job.resource)
+    path, last_line, rejected, inserted = job.path, job.last_line, job.rejected, job.inserted
+
+    def checkpoint(line, count, rejected):
+        db.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id)
+            .values(last_line=line, inserted=ImportJob.inserted + count,
+                    rejected=rejected, updated_at=datetime.utcnow())
+        )
+
+    def should_stop():
+        return db.session.execute(
+            select(ImportJob.status).where(ImportJob.id == job_id)
+        ).scalar() != 'running'
+
+    try:
+        if job.encoding is None:
+            job.encoding = detect_encoding(path)
+        if job.total_lines is None:
+            job.total_lines = count_lines(path)
+        encoding = job.encoding
+        db.session.commit()
+
+        header = read_csv_header(path, encoding)
+        rejects = RejectWriter(reject_path_for(path), header,
+                               append=last_line > 0, count=rejected)
+        stats = bulk_load(model, iter_csv_records(model, path, encoding, header, last_line),
+                          None, header=header, checkpoint=checkpoint,
+                          should_stop=should_stop, rejects=rejects)
+        _finish(job_id, 'cancelled' if stats['stopped'] else 'completed')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'导入任务 {job_id} 失败: {e}')
+        _finish(job_id, 'failed', str(e))
+    finally:
+        # 本次执行提交过记录（包括失败或取消前已提交的批次）时重建派生数据
+        if db.session.execute(
+                select(ImportJob.inserted).where(ImportJob.id == job_id)).scalar() > inserted:
+            notify_change(model, 'reload')
@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# 请求耗时直方图的分桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 每个请求的 SQL 语句数直方图的分桶上限
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# 从连接池获取连接的耗时直方图的分桶上限（秒）
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class Histogram:
+    """累计分桶计数（与 Prometheus 直方图相同，le 为包含上限）"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket', dict(labels, le=str(bound)), cumulative
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+class EndpointStats:
+    """单个端点的请求耗时、SQL 语句数、SQL 耗时和行数"""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_seconds = 0.0
+        self.rows = 0
+
+
+class TimedQueuePool(QueuePool):
+    """记录获取连接耗时（含排队等待、新建连接和 pre_ping）的连接池"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            metrics.record_pool_timeout()
+            raise
+        finally:
+            metrics.record_pool_wait(time.perf_counter() - start)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        label_text = ','.join(f'{key}="{_escape(item)}"' for key, item in labels.items())
+        name = f'{name}{{{label_text}}}'
+    if isinstance(value, float):
+        value = repr(round(value, 6))
+    return f'{name} {value}'
+
+
+class Metrics:
+    """按端点统计请求耗时和 SQL 执行情况，以 Prometheus 文本格式输出
+
+    SQL 语句由 SQLAlchemy 的 before/after_cursor_execute 事件计时，只统计请求中执行的语句；
+    行数为数据库驱动报告的 rowcount（MySQL 为查询返回的行数和写操作影响的行数，
+    SQLite 只报告写操作）。各工作进程分别统计，dbbio_worker_info 标明来自哪个进程
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空统计（gunicorn 工作进程 fork 后调用，不继承主进程预热时的数据）"""
+        self.started_at = time.time()
+        self.requests = {}
+        self.endpoints = {}
+        self.pool_wait = Histogram(POOL_WAIT_BUCKETS)
+        self.pool_timeouts = 0
+
+    def init_app(self, app):
+        """需在 db.init_app 之前调用：连接池类在创建引擎时生效"""
+        app.config.setdefault('METRICS_ENABLED', False)
+        app.config.setdefault('METRICS_SERVER_TIMING', False)
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        # SQLite 内存数据库由 Flask-SQLAlchemy 改用 StaticPool，不受影响
+        options.setdefault('poolclass', TimedQueuePool)
+        if app.config['METRICS_ENABLED']:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+
+    def _before_request(self):
+        # [开始时间, SQL 语句数, SQL 耗时, 行数]
+        g._metrics = [time.perf_counter(), 0, 0.0, 0]
+
+    def _after_request(self, response):
+        state = g.pop('_metrics', None)
+        if state is None:
+            return response
+        start, queries, sql_seconds, rows = state
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or '<unmatched>'
+        key = (endpoint, request.method, str(response.status_code))
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.latency.observe(elapsed)
+            stats.queries.observe(queries)
+            stats.sql_seconds += sql_seconds
+            stats.rows += rows
+
+        if current_app.config['METRICS_SERVER_TIMING']:
+            response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.1f}, '
+                                 f'db;dur={sql_seconds * 1000:.1f};desc="{queries} queries"')
+        return response
+
+    def record_query(self, seconds, rows):
+        if not has_request_context():
+            return
+        state = g.get('_metrics')
+        if state is not None:
+            state[1] += 1
+            state[2] += seconds
+            state[3] += max(rows, 0)
+
+    def record_pool_wait(self, seconds):
+        with self.lock:
+            self.pool_wait.observe(seconds)
+
+    def record_pool_timeout(self):
+        with self.lock:
+            self.pool_timeouts += 1
+
+    def samples(self, pool=None):
+        """[(指标名, 类型, 说明, [(样本名, 标签, 值), ...]), ...]"""
+        families = [
+            ('dbbio_worker_info', 'gauge', '输出本页指标的工作进程',
+             [('dbbio_worker_info', {'pid': str(os.getpid())}, 1)]),
+            ('dbbio_process_start_time_seconds', 'gauge', '开始统计的时间（Unix 时间戳）',
+             [('dbbio_process_start_time_seconds', {}, self.started_at)]),
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            families += [
+                ('dbbio_http_requests_total', 'counter', '按端点、方法和状态码统计的请求数',
+                 [('dbbio_http_requests_total',
+                   {'endpoint': endpoint, 'method': method, 'status': status}, count)
+                  for (endpoint, method, status), count in sorted(self.requests.items())]),
+                ('dbbio_http_request_duration_seconds', 'histogram', '请求处理耗时（流式响应计至开始输出）',
+                 [sample for endpoint, stats in endpoints
+                  for sample in stats.latency.samples('dbbio_http_request_duration_seconds',
+                                                      {'endpoint': endpoint})]),
+                ('dbbio_sql_queries_per_request', 'histogram', '每个请求执行的 SQL 语句数',
+                 [sample for endpoint, stats in endpoints
+                  for sample in stats.queries.samples('dbbio_sql_queries_per_request',
+                                                      {'endpoint': endpoint})]),
+                ('dbbio_sql_duration_seconds_total', 'counter', '请求中 SQL 语句的累计执行时间',
+                 [('dbbio_sql_duration_seconds_total', {'endpoint': endpoint}, stats.sql_seconds)
+                  for endpoint, stats in endpoints]),
+                ('dbbio_sql_rows_total', 'counter', '请求中 SQL 语句的累计行数（驱动报告的 rowcount）',
+                 [('dbbio_sql_rows_total', {'endpoint': endpoint}, stats.rows)
+                  for endpoint, stats in endpoints]),
+                ('dbbio_db_pool_wait_seconds', 'histogram', '从连接池获取连接的耗时',
+                 list(self.pool_wait.samples('dbbio_db_pool_wait_seconds', {}))),
+                ('dbbio_db_pool_timeouts_total', 'counter', '获取连接超时的次数',
+                 [('dbbio_db_pool_timeouts_total', {}, self.pool_timeouts)]),
+            ]
+
+        if isinstance(pool, QueuePool):
+            families += [
+                ('dbbio_db_pool_size', 'gauge', '连接池大小（pool_size）',
+                 [('dbbio_db_pool_size', {}, pool.size())]),
+                ('dbbio_db_pool_checked_out', 'gauge', '当前借出的连接数',
+                 [('dbbio_db_pool_checked_out', {}, pool.checkedout())]),
+                ('dbbio_db_pool_overflow', 'gauge', '当前超出 pool_size 的连接数（上限为 max_overflow）',
+                 [('dbbio_db_pool_overflow', {}, max(pool.overflow(), 0))]),
+            ]
+        return families
+
+    def render(self, pool=None):
+        """Prometheus 文本格式（version 0.0.4）"""
+        lines = []
+        for name, kind, help_text, samples in self.samples(pool):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(_format_sample(*sample) for sample in samples)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if starts:
+        metrics.record_query(time.perf_counter() - starts.pop(), cursor.rowcount)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # 执行出错时不会触发 after_cursor_execute，丢弃该语句的开始时间
+    connection = context.connection
+    if connection is not None and connection.info.get('query_start'):
+        connection.info['query_start'].pop()
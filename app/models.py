@@ -1,12 +1,124 @@
 from . import db
 import os
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Text, String, Integer, Float, DateTime, Date
-from datetime import datetime, timedelta
+from sqlalchemy import Text, String, Integer, Float, DateTime, Date, event
+from sqlalchemy.orm import deferred, load_only, undefer
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 import re
+from .geohash import encode_geohash
 
-class PlantResource(db.Model):
+class RowMapper:
+    """按表头预先解析好的行转换器
+
+    steps 为 (下标, 列名, 转换函数) 元组，每行只需按下标取值并转换，
+    不再逐键做命名转换和属性检查
+    """
+
+    def __init__(self, columns, steps):
+        self.template = dict.fromkeys(columns)
+        self.steps = tuple(steps)
+        self.width = max((index for index, _, _ in self.steps), default=-1) + 1
+
+    def __call__(self, values):
+        """将一行值列表转换为 列名 -> 值 的字典"""
+        if len(values) < self.width:
+            values = list(values) + [None] * (self.width - len(values))
+        record = self.template.copy()
+        for index, column, convert in self.steps:
+            record[column] = convert(values[index])
+        return record
+
+
+class ImportMixin:
+    """从字典创建记录的通用方法，子类实现 compile_mapper(header)"""
+
+    @classmethod
+    def from_dict(cls, data):
+        """从字典创建实例"""
+        return cls(**cls.parse_record(data))
+
+    @classmethod
+    def parse_record(cls, data):
+        """将字典转换为 列名 -> 值 的字典，供批量插入使用"""
+        keys = tuple(data)
+        return cls.compile_mapper(keys)([data[key] for key in keys])
+
+
+class SerializeMixin:
+    """接口序列化的通用方法，子类定义 API_FIELDS（接口字段名 -> 列名）和 LIST_COLUMNS
+
+    较大的文本列按用途分组延迟加载（deferred），完整记录的查询需加上 full_options()，
+    列表和 fields= 查询用 load_options() 只加载需要的列
+    """
+
+    def to_dict(self, fields=None):
+        """将模型转换为字典，fields 为要输出的接口字段名元组（默认全部）"""
+        return {key: convert(getattr(self, column))
+                for key, column, convert in self.api_steps(fields)}
+
+    @classmethod
+    @lru_cache(maxsize=64)
+    def api_steps(cls, fields=None):
+        """to_dict 的 (接口字段名, 列名, 转换函数)，每组字段只解析一次"""
+        steps = []
+        for key in fields or cls.API_FIELDS:
+            column = cls.API_FIELDS[key]
+            if isinstance(cls.__table__.columns[column].type, (Date, DateTime)):
+                convert = format_date
+            else:
+                convert = keep_value
+            steps.append((key, column, convert))
+        return tuple(steps)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """解析 fields 参数（逗号分隔的接口字段名），为空时返回 None（全部字段）
+
+        字段名不存在时抛出 ValueError
+        """
+        fields = tuple(dict.fromkeys(key.strip() for key in (value or '').split(',') if key.strip()))
+        unknown = [key for key in fields if key not in cls.API_FIELDS]
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(unknown)}")
+        return fields or None
+
+    @classmethod
+    def full_options(cls):
+        """加载全部列（包括延迟加载的列组）的查询选项"""
+        return undefer('*')
+
+    @classmethod
+    def load_options(cls, fields=None, extra=()):
+        """只加载 fields 对应的列及 extra 中的列名；fields 为 None 时加载全部列"""
+        if fields is None:
+            return cls.full_options()
+        columns = dict.fromkeys([cls.API_FIELDS[key] for key in fields] + list(extra))
+        return load_only(*[getattr(cls, column) for column in columns])
+
+    @classmethod
+    def list_options(cls):
+        """列表页查询选项：只加载 LIST_COLUMNS"""
+        return load_only(*[getattr(cls, column) for column in cls.LIST_COLUMNS])
+
+
+def geohash_default(latitude_key, longitude_key):
+    """geohash 列的默认值：按插入的经纬度计算，批量导入的 Core insert 同样有效"""
+    def default(context):
+        params = context.get_current_parameters()
+        return encode_geohash(params.get(latitude_key), params.get(longitude_key))
+    return default
+
+
+class PlantResource(ImportMixin, SerializeMixin, db.Model):
     __tablename__ = 'plant_resources'
+    __table_args__ = (
+        # 列表页按科、国家筛选（科+国家组合同样适用），也用于筛选项统计
+        db.Index('ix_plant_family_country', 'family', 'country'),
+        db.Index('ix_plant_country', 'country'),
+        # 按经纬度范围查询
+        db.Index('ix_plant_geohash', 'geohash'),
+    )
     
     # 主键
     id = db.Column(Integer, primary_key=True)
@@ -26,7 +138,7 @@ class PlantResource(db.Model):
     # 采集信息
     recorded_by = db.Column(String(100))
     record_number = db.Column(String(50))
-    event_date = db.Column(String(50))
+    event_date = db.Column(Date)
     identified_by = db.Column(String(100))
     
     # 地理位置信息
@@ -34,13 +146,14 @@ class PlantResource(db.Model):
     state_province = db.Column(String(100))
     city = db.Column(String(100))
     county = db.Column(String(100))
-    locality = db.Column(Text)
+    locality = deferred(db.Column(Text), group='details')
     decimal_latitude = db.Column(Float)
     decimal_longitude = db.Column(Float)
+    geohash = db.Column(String(12), default=geohash_default('decimal_latitude', 'decimal_longitude'))
     
     # 环境信息
     minimum_elevation_in_meters = db.Column(Float)
-    habitat = db.Column(Text)
+    habitat = deferred(db.Column(Text), group='details')
     habit = db.Column(String(100))
     
     # 时间戳
@@ -48,94 +161,130 @@ class PlantResource(db.Model):
     updated_at = db.Column(DateTime, default=datetime.utcnow, 
                           onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        """将模型转换为字典"""
-        return {
-            'id': self.id,
-            'classification': self.classification,
-            'kingdom': self.kingdom,
-            'chineseKingdomName': self.chinese_kingdom_name,  # 注意这里使用驼峰命名
-            'family': self.family,
-            'chineseFamilyName': self.chinese_family_name,    # 注意这里使用驼峰命名
-            'genus': self.genus,
-            'chineseGenusName': self.chinese_genus_name,      # 注意这里使用驼峰命名
-            'scientificName': self.scientific_name,           # 注意这里使用驼峰命名
-            'vernacularName': self.vernacular_name,           # 注意这里使用驼峰命名
-            'identificationID': self.identification_id,       # 注意这里使用驼峰命名
-            'recordedBy': self.recorded_by,                   # 注意这里使用驼峰命名
-            'recordNumber': self.record_number,               # 注意这里使用驼峰命名
-            'eventDate': self.event_date,                     # 注意这里使用驼峰命名
-            'identifiedBy': self.identified_by,               # 注意这里使用驼峰命名
-            'country': self.country,
-            'stateProvince': self.state_province,             # 注意这里使用驼峰命名
-            'city': self.city,
-            'county': self.county,
-            'locality': self.locality,
-            'decimalLatitude': self.decimal_latitude,         # 注意这里使用驼峰命名
-            'decimalLongitude': self.decimal_longitude,       # 注意这里使用驼峰命名
-            'minimumElevationInMeters': self.minimum_elevation_in_meters,  # 注意这里使用驼峰命名
-            'habitat': self.habitat,
-            'habit': self.habit,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    # 接口字段名 -> 列名，按 to_dict 的输出顺序；日期和时间列输出为 ISO 格式
+    API_FIELDS = {
+        'id': 'id',
+        'classification': 'classification',
+        'kingdom': 'kingdom',
+        'chineseKingdomName': 'chinese_kingdom_name',
+        'family': 'family',
+        'chineseFamilyName': 'chinese_family_name',
+        'genus': 'genus',
+        'chineseGenusName': 'chinese_genus_name',
+        'scientificName': 'scientific_name',
+        'vernacularName': 'vernacular_name',
+        'identificationID': 'identification_id',
+        'recordedBy': 'recorded_by',
+        'recordNumber': 'record_number',
+        'eventDate': 'event_date',
+        'identifiedBy': 'identified_by',
+        'country': 'country',
+        'stateProvince': 'state_province',
+        'city': 'city',
+        'county': 'county',
+        'locality': 'locality',
+        'decimalLatitude': 'decimal_latitude',
+        'decimalLongitude': 'decimal_longitude',
+        'minimumElevationInMeters': 'minimum_elevation_in_meters',
+        'habitat': 'habitat',
+        'habit': 'habit',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+    # 列表页显示的列，列表查询只加载这些列
+    LIST_COLUMNS = ('id', 'scientific_name', 'family', 'vernacular_name', 'country', 'state_province')
     
     def to_json(self):
         """将模型转换为JSON字符串"""
         import json
         return json.dumps(self.to_dict(), ensure_ascii=False, default=str)
     
+    # 字段映射：将驼峰命名的键映射到蛇形命名的属性
+    FIELD_MAPPING = {
+        'chineseKingdomName': 'chinese_kingdom_name',
+        'chineseFamilyName': 'chinese_family_name',
+        'chineseGenusName': 'chinese_genus_name',
+        'scientificName': 'scientific_name',
+        'vernacularName': 'vernacular_name',
+        'identificationID': 'identification_id',
+        'recordedBy': 'recorded_by',
+        'recordNumber': 'record_number',
+        'eventDate': 'event_date',
+        'identifiedBy': 'identified_by',
+        'stateProvince': 'state_province',
+        'decimalLatitude': 'decimal_latitude',
+        'decimalLongitude': 'decimal_longitude',
+        'minimumElevationInMeters': 'minimum_elevation_in_meters'
+    }
+    
+    # 数值字段和日期字段
+    FLOAT_FIELDS = ('decimal_latitude', 'decimal_longitude', 'minimum_elevation_in_meters')
+    DATE_FIELDS = ('event_date',)
+    
+    # 计算 geohash 的 (纬度, 经度) 字段
+    GEO_FIELDS = ('decimal_latitude', 'decimal_longitude')
+
+    # 导出 Darwin Core Archive 时各列对应的 DwC 术语
+    DWC_TERMS = {
+        'classification': 'higherClassification',
+        'kingdom': 'kingdom',
+        'family': 'family',
+        'genus': 'genus',
+        'scientific_name': 'scientificName',
+        'vernacular_name': 'vernacularName',
+        'identification_id': 'identificationID',
+        'recorded_by': 'recordedBy',
+        'record_number': 'recordNumber',
+        'event_date': 'eventDate',
+        'identified_by': 'identifiedBy',
+        'country': 'country',
+        'state_province': 'stateProvince',
+        'city': 'municipality',
+        'county': 'county',
+        'locality': 'locality',
+        'decimal_latitude': 'decimalLatitude',
+        'decimal_longitude': 'decimalLongitude',
+        'minimum_elevation_in_meters': 'minimumElevationInMeters',
+        'habitat': 'habitat',
+    }
+    
     @classmethod
-    def from_dict(cls, data):
-        """从字典创建实例"""
-        instance = cls()
-        
-        # 字段映射：将驼峰命名的键映射到蛇形命名的属性
-        field_mapping = {
-            'chineseKingdomName': 'chinese_kingdom_name',
-            'chineseFamilyName': 'chinese_family_name',
-            'chineseGenusName': 'chinese_genus_name',
-            'scientificName': 'scientific_name',
-            'vernacularName': 'vernacular_name',
-            'identificationID': 'identification_id',
-            'recordedBy': 'recorded_by',
-            'recordNumber': 'record_number',
-            'eventDate': 'event_date',
-            'identifiedBy': 'identified_by',
-            'stateProvince': 'state_province',
-            'decimalLatitude': 'decimal_latitude',
-            'decimalLongitude': 'decimal_longitude',
-            'minimumElevationInMeters': 'minimum_elevation_in_meters'
-        }
-        
-        # 设置属性
-        for key, value in data.items():
-            # 检查是否需要映射字段名
-            field_name = field_mapping.get(key, key)
-            
-            # 将驼峰命名的键转换为蛇形命名
-            if field_name not in field_mapping.values():
-                # 如果不是特殊映射的字段，尝试将驼峰转换为蛇形
-                field_name = camel_to_snake(key)
-            
-            if hasattr(instance, field_name):
-                # 处理数值字段
-                if field_name in ['decimal_latitude', 'decimal_longitude', 'minimum_elevation_in_meters']:
-                    try:
-                        value = float(value) if value else None
-                    except (ValueError, TypeError):
-                        value = None
-                
-                setattr(instance, field_name, value)
-        
-        return instance 
+    @lru_cache(maxsize=32)
+    def compile_mapper(cls, header):
+        """根据表头（驼峰命名的键）生成行转换器，每个表头只解析一次"""
+        columns = import_columns(cls)
+        steps = []
+        for index, key in enumerate(header):
+            if not isinstance(key, str):
+                continue
+            # 特殊映射的字段直接取映射结果，其余将驼峰转换为蛇形
+            field_name = cls.FIELD_MAPPING.get(key) or camel_to_snake(key)
+            if field_name not in columns:
+                continue
+            if field_name in cls.FLOAT_FIELDS:
+                convert = parse_float
+            elif field_name in cls.DATE_FIELDS:
+                convert = DateParser()
+            else:
+                convert = keep_value
+            steps.append((index, field_name, convert))
+        return RowMapper(columns, steps)
 
 # 序列号,Leiqun,测序状态,Id,中名,门,门名称,纲,纲名称,目,目名称,中文科名,科名称,属名,种本名,种下名称,
 # Cite1,Cite2,资源编码,国家,省,省代码,县,具体地点,经度,纬度,海拔,描述,生境,寄主,图像,记录地址,
 # 保存单位,单位代码,采集人,采集时间,采集号,标本号,鉴定人,鉴定时间,标本属性,保藏方式,实物状态,共享方式,获取途径,
 # 文献,联系人,单位地址,邮编,电话,Email,项目名称,项目编号,上报时间,取材点,基因编号,基因名称,基因描述,基因别名,测序时间,测序人,课题代码
-class InsectResource(db.Model):
+class InsectResource(ImportMixin, SerializeMixin, db.Model):
     __tablename__ = 'insect_resources'
+    __table_args__ = (
+        # 列表页按科、省份等值筛选，再按采集时间范围筛选
+        db.Index('ix_insect_family_province_date', 'family_name', 'province', 'collection_date'),
+        db.Index('ix_insect_province_date', 'province', 'collection_date'),
+        db.Index('ix_insect_collection_date', 'collection_date'),
+        # 按经纬度范围查询
+        db.Index('ix_insect_geohash', 'geohash'),
+    )
     
     # 主键
     id = db.Column(Integer, primary_key=True)
@@ -161,8 +310,8 @@ class InsectResource(db.Model):
     infraspecies_name = db.Column(String(100), comment='种下名称')
     
     # 引用信息
-    citation1 = db.Column(Text, comment='Cite1')
-    citation2 = db.Column(Text, comment='Cite2')
+    citation1 = deferred(db.Column(Text, comment='Cite1'), group='citations')
+    citation2 = deferred(db.Column(Text, comment='Cite2'), group='citations')
     
     # 资源信息
     resource_code = db.Column(String(50), comment='资源编码')
@@ -170,25 +319,26 @@ class InsectResource(db.Model):
     province = db.Column(String(50), comment='省')
     province_code = db.Column(String(50), comment='省代码')
     county = db.Column(String(50), comment='县')
-    locality = db.Column(Text, comment='具体地点')
+    locality = deferred(db.Column(Text, comment='具体地点'), group='details')
     longitude = db.Column(Float, comment='经度')
     latitude = db.Column(Float, comment='纬度')
+    geohash = db.Column(String(12), default=geohash_default('latitude', 'longitude'))
     altitude = db.Column(Float, comment='海拔')
-    description = db.Column(Text, comment='描述')
-    habitat = db.Column(Text, comment='生境')
-    host = db.Column(Text, comment='寄主')
+    description = deferred(db.Column(Text, comment='描述'), group='details')
+    habitat = deferred(db.Column(Text, comment='生境'), group='details')
+    host = deferred(db.Column(Text, comment='寄主'), group='details')
     image_url = db.Column(Text, comment='图像')
-    record_address = db.Column(Text, comment='记录地址')
+    record_address = deferred(db.Column(Text, comment='记录地址'), group='details')
     
     # 保存信息
     preservation_institution = db.Column(String(200), comment='保存单位')
     institution_code = db.Column(String(50), comment='单位代码')
     collector = db.Column(String(100), comment='采集人')
-    collection_date = db.Column(String(50), comment='采集时间')
+    collection_date = db.Column(Date, comment='采集时间')
     collection_number = db.Column(String(50), comment='采集号')
     specimen_number = db.Column(String(50), comment='标本号')
     identifier = db.Column(String(100), comment='鉴定人')
-    identification_date = db.Column(String(50), comment='鉴定时间')
+    identification_date = db.Column(Date, comment='鉴定时间')
     specimen_attribute = db.Column(String(100), comment='标本属性')
     preservation_method = db.Column(String(100), comment='保藏方式')
     physical_state = db.Column(String(100), comment='实物状态')
@@ -196,27 +346,27 @@ class InsectResource(db.Model):
     access_method = db.Column(String(100), comment='获取途径')
     
     # 文献和联系信息
-    literature = db.Column(Text, comment='文献')
-    contact_person = db.Column(String(100), comment='联系人')
-    institution_address = db.Column(Text, comment='单位地址')
-    postcode = db.Column(String(20), comment='邮编')
-    phone = db.Column(String(50), comment='电话')
-    email = db.Column(String(100), comment='Email')
+    literature = deferred(db.Column(Text, comment='文献'), group='contact')
+    contact_person = deferred(db.Column(String(100), comment='联系人'), group='contact')
+    institution_address = deferred(db.Column(Text, comment='单位地址'), group='contact')
+    postcode = deferred(db.Column(String(20), comment='邮编'), group='contact')
+    phone = deferred(db.Column(String(50), comment='电话'), group='contact')
+    email = deferred(db.Column(String(100), comment='Email'), group='contact')
     
     # 项目信息
     project_name = db.Column(String(200), comment='项目名称')
     project_code = db.Column(String(50), comment='项目编号')
-    report_date = db.Column(String(50), comment='上报时间')
+    report_date = db.Column(Date, comment='上报时间')
     sampling_point = db.Column(String(200), comment='取材点')
     
     # 基因信息
-    gene_code = db.Column(String(50), comment='基因编号')
-    gene_name = db.Column(String(100), comment='基因名称')
-    gene_description = db.Column(Text, comment='基因描述')
-    gene_alias = db.Column(String(100), comment='基因别名')
+    gene_code = deferred(db.Column(String(50), comment='基因编号'), group='gene')
+    gene_name = deferred(db.Column(String(100), comment='基因名称'), group='gene')
+    gene_description = deferred(db.Column(Text, comment='基因描述'), group='gene')
+    gene_alias = deferred(db.Column(String(100), comment='基因别名'), group='gene')
     
     # 测序信息
-    sequencing_date = db.Column(String(50), comment='测序时间')
+    sequencing_date = db.Column(Date, comment='测序时间')
     sequencer = db.Column(String(100), comment='测序人')
     project_task_code = db.Column(String(50), comment='课题代码')
     
@@ -226,241 +376,464 @@ class InsectResource(db.Model):
                           onupdate=datetime.utcnow)
     
    
-    def to_dict(self):
-        """将模型转换为字典"""
-        return {
-            # 基本信息
-            'id': self.id,
-            'serialNumber': self.serial_number,
-            'leiqun': self.leiqun,
-            'sequencingStatus': self.sequencing_status,
-            'originalId': self.original_id,
-            'chineseName': self.chinese_name,
-            
-            # 分类信息
-            'phylum': self.phylum,
-            'phylumName': self.phylum_name,
-            'class': self.class_,
-            'className': self.class_name,
-            'order': self.order,
-            'orderName': self.order_name,
-            'chineseFamilyName': self.chinese_family_name,
-            'familyName': self.family_name,
-            'genusName': self.genus_name,
-            'speciesName': self.species_name,
-            'infraspeciesName': self.infraspecies_name,
-            
-            # 引用信息
-            'citation1': self.citation1,
-            'citation2': self.citation2,
-            
-            # 资源信息
-            'resourceCode': self.resource_code,
-            'country': self.country,
-            'province': self.province,
-            'provinceCode': self.province_code,
-            'county': self.county,
-            'locality': self.locality,
-            'longitude': self.longitude,
-            'latitude': self.latitude,
-            'altitude': self.altitude,
-            'description': self.description,
-            'habitat': self.habitat,
-            'host': self.host,
-            'imageUrl': self.image_url,
-            'recordAddress': self.record_address,
-            
-            # 保存信息
-            'preservationInstitution': self.preservation_institution,
-            'institutionCode': self.institution_code,
-            'collector': self.collector,
-            'collectionDate': self.collection_date.isoformat() if self.collection_date else None,
-            'collectionNumber': self.collection_number,
-            'specimenNumber': self.specimen_number,
-            'identifier': self.identifier,
-            'identificationDate': self.identification_date.isoformat() if self.identification_date else None,
-            'specimenAttribute': self.specimen_attribute,
-            'preservationMethod': self.preservation_method,
-            'physicalState': self.physical_state,
-            'sharingMethod': self.sharing_method,
-            'accessMethod': self.access_method,
-            
-            # 文献和联系信息
-            'literature': self.literature,
-            'contactPerson': self.contact_person,
-            'institutionAddress': self.institution_address,
-            'postcode': self.postcode,
-            'phone': self.phone,
-            'email': self.email,
-            
-            # 项目信息
-            'projectName': self.project_name,
-            'projectCode': self.project_code,
-            'reportDate': self.report_date.isoformat() if self.report_date else None,
-            'samplingPoint': self.sampling_point,
-            
-            # 基因信息
-            'geneCode': self.gene_code,
-            'geneName': self.gene_name,
-            'geneDescription': self.gene_description,
-            'geneAlias': self.gene_alias,
-            
-            # 测序信息
-            'sequencingDate': self.sequencing_date.isoformat() if self.sequencing_date else None,
-            'sequencer': self.sequencer,
-            'projectTaskCode': self.project_task_code,
-            
-            # 时间戳
-            'createdAt': self.created_at.isoformat() if self.created_at else None,
-            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
-        }
+    # 接口字段名 -> 列名，按 to_dict 的输出顺序；日期和时间列输出为 ISO 格式
+    API_FIELDS = {
+        # 基本信息
+        'id': 'id',
+        'serialNumber': 'serial_number',
+        'leiqun': 'leiqun',
+        'sequencingStatus': 'sequencing_status',
+        'originalId': 'original_id',
+        'chineseName': 'chinese_name',
+
+        # 分类信息
+        'phylum': 'phylum',
+        'phylumName': 'phylum_name',
+        'class': 'class_',
+        'className': 'class_name',
+        'order': 'order',
+        'orderName': 'order_name',
+        'chineseFamilyName': 'chinese_family_name',
+        'familyName': 'family_name',
+        'genusName': 'genus_name',
+        'speciesName': 'species_name',
+        'infraspeciesName': 'infraspecies_name',
+
+        # 引用信息
+        'citation1': 'citation1',
+        'citation2': 'citation2',
+
+        # 资源信息
+        'resourceCode': 'resource_code',
+        'country': 'country',
+        'province': 'province',
+        'provinceCode': 'province_code',
+        'county': 'county',
+        'locality': 'locality',
+        'longitude': 'longitude',
+        'latitude': 'latitude',
+        'altitude': 'altitude',
+        'description': 'description',
+        'habitat': 'habitat',
+        'host': 'host',
+        'imageUrl': 'image_url',
+        'recordAddress': 'record_address',
+
+        # 保存信息
+        'preservationInstitution': 'preservation_institution',
+        'institutionCode': 'institution_code',
+        'collector': 'collector',
+        'collectionDate': 'collection_date',
+        'collectionNumber': 'collection_number',
+        'specimenNumber': 'specimen_number',
+        'identifier': 'identifier',
+        'identificationDate': 'identification_date',
+        'specimenAttribute': 'specimen_attribute',
+        'preservationMethod': 'preservation_method',
+        'physicalState': 'physical_state',
+        'sharingMethod': 'sharing_method',
+        'accessMethod': 'access_method',
+
+        # 文献和联系信息
+        'literature': 'literature',
+        'contactPerson': 'contact_person',
+        'institutionAddress': 'institution_address',
+        'postcode': 'postcode',
+        'phone': 'phone',
+        'email': 'email',
+
+        # 项目信息
+        'projectName': 'project_name',
+        'projectCode': 'project_code',
+        'reportDate': 'report_date',
+        'samplingPoint': 'sampling_point',
+
+        # 基因信息
+        'geneCode': 'gene_code',
+        'geneName': 'gene_name',
+        'geneDescription': 'gene_description',
+        'geneAlias': 'gene_alias',
+
+        # 测序信息
+        'sequencingDate': 'sequencing_date',
+        'sequencer': 'sequencer',
+        'projectTaskCode': 'project_task_code',
+
+        # 时间戳
+        'createdAt': 'created_at',
+        'updatedAt': 'updated_at',
+    }
+
+    # 列表页显示的列，列表查询只加载这些列
+    LIST_COLUMNS = ('id', 'image_url', 'chinese_name', 'family_name', 'genus_name', 'species_name',
+                    'country', 'province', 'collection_date')
     
     def to_json(self):
         """将模型转换为JSON字符串"""
         import json
         return json.dumps(self.to_dict(), ensure_ascii=False, default=str)
     
+    # 数值字段和日期字段
+    FLOAT_FIELDS = ('longitude', 'latitude', 'altitude')
+    DATE_FIELDS = ('collection_date', 'identification_date', 'report_date', 'sequencing_date')
+    
+    # 计算 geohash 的 (纬度, 经度) 字段
+    GEO_FIELDS = ('latitude', 'longitude')
+
+    # 导出 Darwin Core Archive 时各列对应的 DwC 术语
+    DWC_TERMS = {
+        'chinese_name': 'vernacularName',
+        'phylum_name': 'phylum',
+        'class_name': 'class',
+        'order_name': 'order',
+        'family_name': 'family',
+        'genus_name': 'genus',
+        'species_name': 'specificEpithet',
+        'infraspecies_name': 'infraspecificEpithet',
+        'country': 'country',
+        'province': 'stateProvince',
+        'county': 'county',
+        'locality': 'locality',
+        'latitude': 'decimalLatitude',
+        'longitude': 'decimalLongitude',
+        'altitude': 'verbatimElevation',
+        'habitat': 'habitat',
+        'description': 'occurrenceRemarks',
+        'institution_code': 'institutionCode',
+        'collector': 'recordedBy',
+        'collection_date': 'eventDate',
+        'collection_number': 'recordNumber',
+        'specimen_number': 'catalogNumber',
+        'identifier': 'identifiedBy',
+        'identification_date': 'dateIdentified',
+        'preservation_method': 'preparations',
+    }
+    
     @classmethod
-    def from_dict(cls, row):
-        """从字典创建实例"""
-        instance = cls()
-        
-        # 创建数据字典
-        data = {
-            # 基本信息
-            'serialNumber': row.get('序列号', '').strip(),
-            'leiqun': row.get('Leiqun', '').strip(),
-            'sequencingStatus': row.get('测序状态', '').strip(),
-            'originalId': row.get('Id', '').strip(),
-            'chineseName': row.get('中名', '').strip(),
-            
-            # 分类信息
-            'phylum': row.get('门', '').strip(),
-            'phylumName': row.get('门名称', '').strip(),
-            'class': row.get('纲', '').strip(),
-            'className': row.get('纲名称', '').strip(),
-            'order': row.get('目', '').strip(),
-            'orderName': row.get('目名称', '').strip(),
-            'chineseFamilyName': row.get('中文科名', '').strip(),
-            'familyName': row.get('科名称', '').strip(),
-            'genusName': row.get('属名', '').strip(),
-            'speciesName': row.get('种本名', '').strip(),
-            'infraspeciesName': row.get('种下名称', '').strip(),
-            
-            # 引用信息
-            'citation1': row.get('Cite1', '').strip(),
-            'citation2': row.get('Cite2', '').strip(),
-            
-            # 资源信息
-            'resourceCode': row.get('资源编码', '').strip(),
-            'country': row.get('国家', '').strip(),
-            'province': row.get('省', '').strip(),
-            'provinceCode': row.get('省代码', '').strip(),
-            'county': row.get('县', '').strip(),
-            'locality': row.get('具体地点', '').strip(),
-            'longitude': parse_float(row.get('经度')),
-            'latitude': parse_float(row.get('纬度')),
-            'altitude': parse_float(row.get('海拔')),
-            'description': row.get('描述', '').strip(),
-            'habitat': row.get('生境', '').strip(),
-            'host': row.get('寄主', '').strip(),
-            'imageUrl': row.get('图像', '').strip(),
-            'recordAddress': row.get('记录地址', '').strip(),
-            
-            # 保存信息
-            'preservationInstitution': row.get('保存单位', '').strip(),
-            'institutionCode': row.get('单位代码', '').strip(),
-            'collector': row.get('采集人', '').strip(),
-            'collectionDate': row.get('采集时间', '').strip(),
-            'collectionNumber': row.get('采集号', '').strip(),
-            'specimenNumber': row.get('标本号', '').strip(),
-            'identifier': row.get('鉴定人', '').strip(),
-            'identificationDate': row.get('鉴定时间', '').strip(),
-            'specimenAttribute': row.get('标本属性', '').strip(),
-            'preservationMethod': row.get('保藏方式', '').strip(),
-            'physicalState': row.get('实物状态', '').strip(),
-            'sharingMethod': row.get('共享方式', '').strip(),
-            'accessMethod': row.get('获取途径', '').strip(),
-            
-            # 文献和联系信息
-            'literature': row.get('文献', '').strip(),
-            'contactPerson': row.get('联系人', '').strip(),
-            'institutionAddress': row.get('单位地址', '').strip(),
-            'postcode': row.get('邮编', '').strip(),
-            'phone': row.get('电话', '').strip(),
-            'email': row.get('Email', '').strip(),
-            
-            # 项目信息
-            'projectName': row.get('项目名称', '').strip(),
-            'projectCode': row.get('项目编号', '').strip(),
-            'reportDate': row.get('上报时间', '').strip(),
-            'samplingPoint': row.get('取材点', '').strip(),
-            
-            # 基因信息
-            'geneCode': row.get('基因编号', '').strip(),
-            'geneName': row.get('基因名称', '').strip(),
-            'geneDescription': row.get('基因描述', '').strip(),
-            'geneAlias': row.get('基因别名', '').strip(),
-            
-            # 测序信息
-            'sequencingDate': row.get('测序时间', '').strip(),
-            'sequencer': row.get('测序人', '').strip(),
-            'projectTaskCode': row.get('课题代码', '').strip()
-        }
-        
-        # 处理日期字段
-        for date_field in ['collectionDate', 'identificationDate', 'reportDate', 'sequencingDate']:
-            if data[date_field]:
-                data[date_field] = parse_date(data[date_field])
+    @lru_cache(maxsize=32)
+    def compile_mapper(cls, header):
+        """根据中文表头生成行转换器，每个表头只解析一次
+
+        表头与列的对应关系取自各列的 comment
+        """
+        columns = import_columns(cls)
+        headers = {column.comment: column.key
+                   for column in cls.__table__.columns if column.comment}
+        steps = []
+        for index, key in enumerate(header):
+            field_name = headers.get(key.strip() if isinstance(key, str) else key)
+            if field_name is None:
+                continue
+            if field_name in cls.FLOAT_FIELDS:
+                convert = parse_float
+            elif field_name in cls.DATE_FIELDS:
+                # 每个日期列单独推断主要格式
+                convert = DateParser()
+            elif field_name == 'image_url':
+                convert = parse_image_paths
+            else:
+                convert = strip_value
+            steps.append((index, field_name, convert))
+        return RowMapper(columns, steps)
+    
 
-        # 处理图像Url
-        if data['imageUrl']:
-            data['imageUrl'] = '|'.join([os.path.join('images', url) for url in re.split(r'\s*、\s*', data['imageUrl']) if url.strip()])
+# 接口中的资源名称 -> 模型（导入、统计、地图聚合、分类树等共用）
+RESOURCE_MODELS = {
+    'plants': PlantResource,
+    'insects': InsectResource,
+}
 
-        # 设置属性
-        for key, value in data.items():
-            field_name = camel_to_snake(key)
-            if hasattr(instance, field_name):
-                setattr(instance, field_name, value)
 
-        return instance
+class CacheVersion(db.Model):
+    """缓存版本号，写操作递增对应资源的版本号，使所有进程中的缓存失效"""
+    __tablename__ = 'cache_versions'
     
+    name = db.Column(String(100), primary_key=True)
+    version = db.Column(Integer, nullable=False, default=0)
+
+
+class ResourceStats(db.Model):
+    """资源统计快照（每个资源表一行），由写操作增量维护并定期全量重算"""
+    __tablename__ = 'resource_stats'
+
+    resource = db.Column(String(100), primary_key=True)
+    total = db.Column(Integer, nullable=False, default=0)
+    families = db.Column(Integer, nullable=False, default=0)
+    countries = db.Column(Integer, nullable=False, default=0)
+    provinces = db.Column(Integer, nullable=False, default=0)
+    genera = db.Column(Integer, nullable=False, default=0)
+    recomputed_at = db.Column(DateTime)
+    updated_at = db.Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'families': self.families,
+            'countries': self.countries,
+            'provinces': self.provinces,
+            'genera': self.genera,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None,
+            'recomputedAt': self.recomputed_at.isoformat() if self.recomputed_at else None,
+        }
+
+
+class FieldValueCount(db.Model):
+    """统计字段每个取值的记录数，用于增量维护不同取值的个数"""
+    __tablename__ = 'field_value_counts'
+
+    resource = db.Column(String(100), primary_key=True)
+    field = db.Column(String(100), primary_key=True)
+    value = db.Column(String(100), primary_key=True)
+    count = db.Column(Integer, nullable=False, default=0)
+
+
+class MapCluster(db.Model):
+    """地图聚合：每个 geohash 前缀长度（层级）下每个格子的记录数和经纬度之和"""
+    __tablename__ = 'map_clusters'
+
+    resource = db.Column(String(100), primary_key=True)
+    precision = db.Column(Integer, primary_key=True, autoincrement=False)
+    cell = db.Column(String(12), primary_key=True)
+    count = db.Column(Integer, nullable=False, default=0)
+    latitude_sum = db.Column(Float, nullable=False, default=0)
+    longitude_sum = db.Column(Float, nullable=False, default=0)
+
+
+class TaxonNode(db.Model):
+    """分类树节点：每个资源表的分类阶元路径（如 科|属|种）及该节点下的记录数
+
+    path 为从根到该节点各级名称以 | 连接，根节点为空字符串；parent 为上一级节点的 path
+    """
+    __tablename__ = 'taxon_nodes'
+    __table_args__ = (
+        db.Index('ix_taxon_nodes_parent', 'resource', 'parent'),
+    )
+
+    resource = db.Column(String(100), primary_key=True)
+    path = db.Column(String(600), primary_key=True)
+    parent = db.Column(String(600))
+    depth = db.Column(Integer, nullable=False, default=0)
+    name = db.Column(String(200), nullable=False, default='')
+    alias = db.Column(String(200))
+    count = db.Column(Integer, nullable=False, default=0)
+
+
+class ImageDerivative(db.Model):
+    """图像派生图：原图路径和规格 -> 按内容命名的派生图路径（均相对于静态目录）"""
+    __tablename__ = 'image_derivatives'
+
+    source = db.Column(String(500), primary_key=True)
+    variant = db.Column(String(20), primary_key=True)
+    path = db.Column(String(100), nullable=False)
+    width = db.Column(Integer, nullable=False)
+    height = db.Column(Integer, nullable=False)
+    created_at = db.Column(DateTime, default=datetime.utcnow)
+
+
+class ImportJob(db.Model):
+    """CSV 后台导入任务
+
+    status: pending（等待执行）/ running / cancelling（已请求取消）/ cancelled / completed / failed。
+    last_line 为最后一个已提交批次的最后一行的行号，与该批次在同一事务中更新，
+    继续导入时从下一行开始。
+    """
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(Integer, primary_key=True)
+    resource = db.Column(String(100), nullable=False)
+    path = db.Column(String(500), nullable=False)
+    encoding = db.Column(String(20))
+    status = db.Column(String(20), nullable=False, default='pending', index=True)
+    total_lines = db.Column(Integer)
+    last_line = db.Column(Integer, nullable=False, default=0)
+    start_line = db.Column(Integer, nullable=False, default=0)
+    inserted = db.Column(Integer, nullable=False, default=0)
+    rejected = db.Column(Integer, nullable=False, default=0)
+    error = db.Column(Text)
+    created_at = db.Column(DateTime, default=datetime.utcnow)
+    started_at = db.Column(DateTime)
+    finished_at = db.Column(DateTime)
+    updated_at = db.Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        # 本次执行的处理速度（继续导入时不含之前已处理的行）
+        rows_per_second = None
+        if self.started_at:
+            end = self.finished_at or self.updated_at
+            elapsed = (end - self.started_at).total_seconds() if end else 0
+            if elapsed > 0:
+                rows_per_second = round((self.last_line - self.start_line) / elapsed, 1)
+        progress = None
+        if self.total_lines:
+            progress = round(min(self.last_line / self.total_lines, 1) * 100, 1)
+        if self.status == 'completed':
+            progress = 100.0
+        return {
+            'id': self.id,
+            'resource': self.resource,
+            'file': os.path.basename(self.path),
+            'status': self.status,
+            'totalLines': self.total_lines,
+            'lastLine': self.last_line,
+            'inserted': self.inserted,
+            'rejected': self.rejected,
+            'progress': progress,
+            'rowsPerSecond': rows_per_second,
+            'error': self.error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+def import_columns(model):
+    """可由导入数据填充的列（不含主键、时间戳和由经纬度计算的 geohash）"""
+    return [column.key for column in model.__table__.columns
+            if column.key not in ('id', 'created_at', 'updated_at', 'geohash')]
+
+
+@event.listens_for(PlantResource, 'before_update')
+@event.listens_for(InsectResource, 'before_update')
+def update_geohash(mapper, connection, target):
+    """修改记录时按新的经纬度重新计算 geohash"""
+    latitude, longitude = target.GEO_FIELDS
+    target.geohash = encode_geohash(getattr(target, latitude), getattr(target, longitude))
 
 def camel_to_snake(name):
     """将驼峰命名转换为蛇形命名"""
     name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
     
+# parse_date 依次尝试的日期格式
+# 各格式能匹配的字符串互不重叠，因此调整尝试顺序不会改变解析结果
+DATE_FORMATS = [
+    '%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d',
+    '%Y-%m', '%Y/%m', '%Y.%m',
+    '%Y年%m月%d日', '%Y年%m月', '%Y年',
+    '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y'
+]
+
+# 日期后附带的时刻（如 2023-11-01 12:17:00），解析时忽略
+TIME_SUFFIX = re.compile(r'[ T]\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?$')
+
+# strptime 指令对应的正则，与标准库 _strptime 的定义一致
+DATE_DIRECTIVES = {
+    'Y': r'(\d\d\d\d)',
+    'm': r'(1[0-2]|0[1-9]|[1-9])',
+    'd': r'(3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])',
+}
+
+def compile_date_format(fmt):
+    """将 strptime 格式编译为正则，返回 (正则, 各分组对应的指令)"""
+    pattern = []
+    directives = []
+    for part in re.split(r'(%[Ymd])', fmt):
+        if part.startswith('%'):
+            pattern.append(DATE_DIRECTIVES[part[1]])
+            directives.append(part[1])
+        else:
+            pattern.append(re.escape(part))
+    return re.compile(''.join(pattern), re.IGNORECASE), tuple(directives)
+
+class DateParser:
+    """日期解析器
+
+    用预编译正则代替逐个尝试 strptime（每次失败都会抛出异常），
+    根据前 SAMPLE_SIZE 个值推断该列的主要格式并优先尝试，
+    相同字符串的解析结果由 LRU 缓存复用。
+    解析结果与逐个 strptime 一致，只有一处不同：所有格式都不匹配时先去掉末尾的时刻（TIME_SUFFIX）
+    再解析，如 2023-11-01 12:17:00 解析为 2023-11-01，而逐个 strptime 只能提取年份得到 2023-01-01。
+    """
+    SAMPLE_SIZE = 100
+
+    def __init__(self, formats=DATE_FORMATS, cache_size=4096, infer=True):
+        self.patterns = [compile_date_format(fmt) for fmt in formats]
+        self.order = list(range(len(self.patterns)))
+        self.hits = [0] * len(self.patterns)
+        self.sampled = 0 if infer else self.SAMPLE_SIZE
+        self._cached_parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def __call__(self, date_str):
+        if not date_str:
+            return None
+        date_str = str(date_str).strip()
+        if date_str == '':
+            return None
+        return self._cached_parse(date_str)
+
+    def _record(self, index):
+        """统计样本中各格式的命中次数，样本足够后按命中次数调整尝试顺序"""
+        self.hits[index] += 1
+        self.sampled += 1
+        if self.sampled == self.SAMPLE_SIZE:
+            self.order.sort(key=lambda i: -self.hits[i])
+
+    def _parse(self, date_str):
+        for index in self.order:
+            regex, directives = self.patterns[index]
+            match = regex.fullmatch(date_str)
+            if match is None:
+                continue
+            values = dict(zip(directives, map(int, match.groups())))
+            try:
+                result = date(values['Y'], values.get('m', 1), values.get('d', 1))
+            except ValueError:
+                continue
+            if self.sampled < self.SAMPLE_SIZE:
+                self._record(index)
+            return result
+
+        # 去掉时刻部分后重新解析
+        time_match = TIME_SUFFIX.search(date_str)
+        if time_match and time_match.start() > 0:
+            return self._parse(date_str[:time_match.start()])
+
+        # 如果所有格式都失败，尝试只提取年份
+        try:
+            year_match = re.search(r'(\d{4})', date_str)
+            if year_match:
+                year = int(year_match.group(1))
+                return datetime(year, 1, 1).date()
+        except (ValueError, IndexError):
+            pass
+
+        return None
+
+_date_parser = DateParser(infer=False)
+
 def parse_date(date_str):
     """解析多种日期格式"""
-    if not date_str or str(date_str).strip() == '':
-        return None
-    
-    date_str = str(date_str).strip()
-    date_formats = [
-        '%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d',
-        '%Y-%m', '%Y/%m', '%Y.%m',
-        '%Y年%m月%d日', '%Y年%m月', '%Y年',
-        '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y'
-    ]
-    
-    for fmt in date_formats:
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    
-    # 如果所有格式都失败，尝试只提取年份
-    try:
-        year_match = re.search(r'(\d{4})', date_str)
-        if year_match:
-            year = int(year_match.group(1))
-            return datetime(year, 1, 1).date()
-    except (ValueError, IndexError):
-        pass
-    
-    return None
+    return _date_parser(date_str)
     
+def format_date(value):
+    """日期字段序列化（兼容以字符串存储的历史数据）"""
+    if not value:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def keep_value(value):
+    """原样保留字段值"""
+    return value
+
+def strip_value(value):
+    """去除字段值首尾空白"""
+    return value.strip() if value is not None else None
+
+def parse_image_paths(value):
+    """将以顿号分隔的图像文件名转换为以 | 分隔的 images/ 路径"""
+    if not value or not value.strip():
+        return value.strip() if value is not None else None
+    return '|'.join([os.path.join('images', url) for url in re.split(r'\s*、\s*', value.strip()) if url.strip()])
+
+def format_image_paths(value):
+    """parse_image_paths 的逆转换：以 | 分隔的 images/ 路径还原为以顿号分隔的文件名"""
+    if not value:
+        return value
+    return '、'.join(os.path.relpath(path, 'images') for path in value.split('|') if path)
+
 def parse_float(value):
     """解析浮点数"""
     if not value or str(value).strip() == '':
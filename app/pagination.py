@@ -0,0 +1,194 @@
+from flask import Response, current_app, stream_with_context
+from . import db
+from .cache import cache
+
+# 游标分页默认/最大每页条数
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# 流式输出时每次从数据库读取的条数
+STREAM_CHUNK_SIZE = 500
+
+# 列表页筛选结果总数的缓存时间（秒），数据变化时立即失效
+COUNT_TTL = 300
+
+# 列表页按页码（OFFSET）翻页的最大页数，之后改为游标翻页
+MAX_OFFSET_PAGE = 20
+
+
+def parse_cursor(value):
+    """解析游标参数（游标即上一页最后一条记录的id）"""
+    if value is None or value == '':
+        return None
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
+
+def keyset_page(query, model, cursor=None, limit=DEFAULT_PAGE_SIZE, key=None):
+    """基于主键的游标分页，返回 (记录列表, 下一页游标)
+
+    使用 WHERE id > cursor ORDER BY id LIMIT n，代价与翻到第几页无关。
+    key 为比较和排序使用的主键表达式，默认为 model.id
+    """
+    if key is None:
+        key = model.id
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor is not None:
+        query = query.filter(key > cursor)
+
+    # 多取一条用于判断是否还有下一页
+    items = query.order_by(key).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1].id
+    return items, next_cursor
+
+
+def iter_keyset(query, model, chunk_size=STREAM_CHUNK_SIZE, key=None):
+    """按主键分块遍历查询结果
+
+    每块处理完后从会话中移除已加载的实例，内存占用与表大小无关
+    """
+    cursor = None
+    while True:
+        items, cursor = keyset_page(query, model, cursor, chunk_size, key)
+        yield from items
+        db.session.expunge_all()
+        if cursor is None:
+            break
+
+
+def count_signature(query):
+    """查询的筛选签名：编译后的 SQL 语句及其参数"""
+    compiled = query.statement.compile()
+    return compiled.string, repr(sorted(compiled.params.items()))
+
+
+def cached_count(query, model):
+    """筛选结果总数，按筛选签名缓存
+
+    缓存 PAGINATION_COUNT_TTL 秒，期间资源有任何写入时立即失效
+    """
+    query = query.order_by(None)
+    ttl = current_app.config.get('PAGINATION_COUNT_TTL', COUNT_TTL)
+    return cache.get(model.__tablename__, ('count',) + count_signature(query),
+                     query.count, ttl)
+
+
+class KeysetPagination:
+    """列表页的游标翻页，只有上一页/下一页，不统计总数
+
+    以 id > after 或 id < before 定位，代价与翻到第几页无关
+    """
+    keyset = True
+    total = None
+
+    def __init__(self, query, model, per_page, after=None, before=None):
+        self.per_page = per_page
+        if before is not None:
+            rows = (query.filter(model.id < before)
+                    .order_by(model.id.desc())
+                    .limit(per_page + 1)
+                    .all())
+            self.items = rows[:per_page][::-1]
+            self.has_prev = len(rows) > per_page
+            self.has_next = True
+        else:
+            if after is not None:
+                query = query.filter(model.id > after)
+            rows = query.order_by(model.id).limit(per_page + 1).all()
+            self.items = rows[:per_page]
+            self.has_prev = after is not None
+            self.has_next = len(rows) > per_page
+
+        self.prev_cursor = self.items[0].id if self.has_prev and self.items else None
+        self.next_cursor = self.items[-1].id if self.has_next and self.items else None
+
+
+def paginate(query, model, page=1, per_page=50, after=None, before=None, keyset=True):
+    """列表页分页
+
+    前 MAX_OFFSET_PAGE 页按页码翻页，总数使用 cached_count；之后或请求带有
+    after/before 游标时改为按主键的游标翻页，不再统计总数。
+    keyset 为 False 时（如按相关度排序的搜索结果）始终按页码翻页，只能翻到第 MAX_OFFSET_PAGE 页。
+    更大的页码按第 MAX_OFFSET_PAGE 页处理，不执行更深的 OFFSET 查询
+    """
+    if keyset and (after is not None or before is not None):
+        return KeysetPagination(query, model, per_page, after, before)
+
+    max_page = current_app.config.get('PAGINATION_MAX_OFFSET_PAGE', MAX_OFFSET_PAGE)
+    page = min(max(page or 1, 1), max_page)
+    if keyset:
+        query = query.order_by(model.id)
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=False)
+    pagination.total = cached_count(query, model)
+    pagination.keyset = False
+    pagination.max_page = max_page
+    pagination.prev_cursor = None
+    pagination.next_cursor = None
+    if keyset and pagination.page >= max_page and pagination.has_next and pagination.items:
+        pagination.next_cursor = pagination.items[-1].id
+    return pagination
+
+
+def link_args(args, exclude=('page', 'after', 'before')):
+    """翻页链接需要保留的查询参数（去掉空值和翻页参数）"""
+    return {key: value for key, value in args.items() if value and key not in exclude}
+
+
+def dumps(obj):
+    """与 jsonify 保持一致的紧凑 JSON 序列化"""
+    return current_app.json.dumps(obj, separators=(',', ':'))
+
+
+def _buffered(chunks, size=STREAM_CHUNK_SIZE):
+    """合并小片段，避免每条记录都触发一次写操作"""
+    buffer = []
+    for chunk in chunks:
+        buffer.append(chunk)
+        if len(buffer) >= size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_json_array(rows, encode):
+    """以 JSON 数组格式逐块输出，encode 将一条记录编码为 JSON 文本"""
+    def generate():
+        yield '['
+        first = True
+        for row in rows:
+            if first:
+                first = False
+                yield encode(row)
+            else:
+                yield ',' + encode(row)
+        yield ']\n'
+
+    return _buffered(generate())
+
+
+def stream_ndjson(rows, encode):
+    """以 NDJSON（每行一条记录）格式逐块输出"""
+    return _buffered(encode(row) + '\n' for row in rows)
+
+
+def streaming_response(rows, serialize=None, fmt='json', encode=None):
+    """构造流式响应，首字节无需等待整表读取完成
+
+    serialize 将记录转换为字典；encode 直接将记录编码为 JSON 文本，提供时代替 serialize
+    """
+    if encode is None:
+        encode = lambda row: dumps(serialize(row))
+    if fmt == 'ndjson':
+        generator = stream_ndjson(rows, encode)
+        mimetype = 'application/x-ndjson'
+    else:
+        generator = stream_json_array(rows, encode)
+        mimetype = 'application/json'
+    return Response(stream_with_context(generator), mimetype=mimetype)
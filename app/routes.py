@@ -1,7 +1,23 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, session, url_for, flash
+from flask import (Blueprint, Response, current_app, render_template, request, jsonify, redirect,
+                   session, url_for, flash, abort)
 from datetime import datetime, timedelta
 from . import db
-from .models import PlantResource, InsectResource
+from .models import PlantResource, InsectResource, RESOURCE_MODELS, ImportJob, parse_date
+from .search import LIST_SEARCH_FIELDS, search_index
+from .facets import get_facets, get_total
+from .stats import get_stats
+from .geo import parse_bbox, within_bbox, within_radius
+from .clusters import clusters_precision, get_clusters
+from .analytics import analytics, parse_aggregate_args
+from .taxonomy import get_node
+from .export import csv_response, dwca_response
+from .serialize import RowEncoder
+from .batch import BatchError, apply_batch
+from .metrics import metrics
+from .jobs import create_job, cancel_job, resume_job, save_upload, import_folder
+from .signals import notify_change, snapshot
+from .pagination import (DEFAULT_PAGE_SIZE, parse_cursor, keyset_page,
+                         iter_keyset, streaming_response, paginate, link_args)
 import os
 
 main_bp = Blueprint('main', __name__)
@@ -10,9 +26,9 @@ main_bp = Blueprint('main', __name__)
 @main_bp.route('/')
 def index():
     """系统首页"""
-    # 获取统计信息
-    plant_count = PlantResource.query.count()
-    insect_count = InsectResource.query.count()
+    # 读取统计快照
+    plant_count = get_stats(PlantResource).total
+    insect_count = get_stats(InsectResource).total
     total_count = plant_count + insect_count
     
     return render_template('index.html', 
@@ -24,14 +40,16 @@ def index():
 @main_bp.route('/api/stats')
 def api_stats():
     """获取统计信息的API接口"""
-    total_plants = PlantResource.query.count()
-    families_count = db.session.query(PlantResource.family).distinct().count()
-    countries_count = db.session.query(PlantResource.country).distinct().count()
+    # 统计快照由写操作增量维护，这里只按主键读取
+    plants = get_stats(PlantResource)
+    insects = get_stats(InsectResource)
     
     return jsonify({
-        'total_plants': total_plants,
-        'families_count': families_count,
-        'countries_count': countries_count
+        'total_plants': plants.total,
+        'families_count': plants.families,
+        'countries_count': plants.countries,
+        'plants': plants.to_dict(),
+        'insects': insects.to_dict()
     })
 
 # 简单的管理员认证（实际应用中应该使用更安全的认证方式）
@@ -59,6 +77,86 @@ def admin_logout():
     flash('已退出管理员模式', 'info')
     return redirect(url_for('main.index'))
 
+# 后台导入任务（仅管理员）
+def import_job_from_request():
+    """根据请求创建导入任务：上传的文件（file）或导入目录中已有的文件名（filename）
+
+    参数错误时抛出 ValueError
+    """
+    data = request.get_json(silent=True) or request.form
+    resource = data.get('resource')
+    if resource not in RESOURCE_MODELS:
+        raise ValueError(f"resource 必须是 {'、'.join(RESOURCE_MODELS)} 之一")
+
+    upload = request.files.get('file')
+    if upload and upload.filename:
+        path = save_upload(upload)
+    else:
+        # 只允许导入目录中的文件，不接受任意服务器路径
+        filename = os.path.basename(data.get('filename') or '')
+        path = os.path.join(import_folder(), filename)
+        if not filename or not os.path.isfile(path):
+            raise ValueError('请上传CSV文件或指定导入目录中的文件名')
+    return create_job(resource, path)
+
+@main_bp.route('/admin/imports', methods=['GET', 'POST'])
+def admin_imports():
+    """数据导入任务管理页面"""
+    if not session.get('is_admin'):
+        return redirect(url_for('main.admin_login'))
+
+    if request.method == 'POST':
+        try:
+            job = import_job_from_request()
+            flash(f'导入任务 #{job.id} 已创建', 'success')
+        except ValueError as e:
+            flash(str(e), 'danger')
+        return redirect(url_for('main.admin_imports'))
+
+    jobs = ImportJob.query.order_by(ImportJob.id.desc()).limit(50).all()
+    return render_template('admin/imports.html', jobs=jobs, resources=RESOURCE_MODELS)
+
+@main_bp.route('/api/import-jobs', methods=['GET', 'POST'])
+def api_import_jobs():
+    """导入任务列表（最近 50 个）；POST 创建任务"""
+    if not session.get('is_admin'):
+        return jsonify({'error': '需要管理员权限'}), 403
+
+    if request.method == 'POST':
+        try:
+            job = import_job_from_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(job.to_dict()), 202
+
+    jobs = ImportJob.query.order_by(ImportJob.id.desc()).limit(50).all()
+    return jsonify({'items': [job.to_dict() for job in jobs]})
+
+@main_bp.route('/api/import-jobs/<int:id>')
+def api_import_job(id):
+    """导入任务的进度和处理速度"""
+    if not session.get('is_admin'):
+        return jsonify({'error': '需要管理员权限'}), 403
+    return jsonify(db.get_or_404(ImportJob, id).to_dict())
+
+@main_bp.route('/api/import-jobs/<int:id>/<action>', methods=['POST'])
+def api_import_job_action(id, action):
+    """取消（cancel）或继续（resume）导入任务"""
+    if not session.get('is_admin'):
+        return jsonify({'error': '需要管理员权限'}), 403
+
+    job = db.get_or_404(ImportJob, id)
+    if action == 'cancel':
+        done = cancel_job(job)
+    elif action == 'resume':
+        done = resume_job(job)
+    else:
+        return jsonify({'error': f'未知操作: {action}'}), 404
+    if not done:
+        return jsonify({'error': f'任务当前状态为 {job.status}，无法执行该操作'}), 409
+    db.session.refresh(job)
+    return jsonify(job.to_dict())
+
 @main_bp.errorhandler(404)
 def not_found_error(error):
     """处理404错误"""
@@ -69,7 +167,7 @@ def internal_error(error):
     """处理500错误"""
     db.session.rollback()
     # 在开发环境中传递错误信息给模板
-    if app.config['ENV'] == 'development':
+    if current_app.debug:
         return render_template('errors/500.html', error=error, now=datetime.now()), 500
     else:
         return render_template('errors/500.html'), 500
@@ -276,6 +374,27 @@ def get_beijing_time(utc_time_str='Tue, 16 Sep 2025 03:46:30 GMT'):
 #                          provinces=provinces,
 #                          projects=projects,
 #                          beijing_time=beijing_time)
+def filter_plants(args):
+    """按列表页的筛选参数（q、family、country、habitat）构建植物查询，导出时共用"""
+    query = PlantResource.query
+    search_query = args.get('q', '')
+    family_filter = args.get('family', '')
+    country_filter = args.get('country', '')
+    habitat_filter = args.get('habitat', '')
+    
+    if search_query:
+        query = search_index.apply(query, PlantResource, search_query, LIST_SEARCH_FIELDS[PlantResource])
+    
+    if family_filter:
+        query = query.filter(PlantResource.family == family_filter)
+    
+    if country_filter:
+        query = query.filter(PlantResource.country == country_filter)
+        
+    if habitat_filter:
+        query = query.filter(PlantResource.habitat.ilike(f'%{habitat_filter}%'))
+    return query
+
 @main_bp.route('/plants')
 def plant_index():
     """植物资源首页"""
@@ -289,37 +408,24 @@ def plant_index():
     country_filter = request.args.get('country', '')
     habitat_filter = request.args.get('habitat', '')
     
-    # 构建查询
-    query = PlantResource.query
+    # 构建查询（只加载列表显示的列）
+    query = filter_plants(request.args).options(PlantResource.list_options())
     
-    if search_query:
-        query = query.filter(
-            (PlantResource.scientific_name.ilike(f'%{search_query}%')) |
-            (PlantResource.vernacular_name.ilike(f'%{search_query}%')) |
-            (PlantResource.family.ilike(f'%{search_query}%'))
-        )
+    # 总数按筛选条件缓存；深度翻页改用游标，搜索结果按相关度排序只能按页码翻页
+    plants = paginate(query, PlantResource, page, per_page,
+                      after=parse_cursor(request.args.get('after')),
+                      before=parse_cursor(request.args.get('before')),
+                      keyset=not search_query)
     
-    if family_filter:
-        query = query.filter(PlantResource.family == family_filter)
-    
-    if country_filter:
-        query = query.filter(PlantResource.country == country_filter)
-        
-    if habitat_filter:
-        query = query.filter(PlantResource.habitat.ilike(f'%{habitat_filter}%'))
-    
-    plants = query.paginate(page=page, per_page=per_page, error_out=False)
-    
-    # 获取筛选选项
-    families = db.session.query(PlantResource.family).distinct().all()
-    countries = db.session.query(PlantResource.country).distinct().all()
-    habitats = db.session.query(PlantResource.habitat).distinct().all()
+    # 获取筛选选项（含各取值的记录数，缓存至数据变化为止）
+    facets = get_facets(PlantResource)
     
     return render_template('plant/index.html', 
                          plants=plants,
-                         families=[f[0] for f in families if f[0]],
-                         countries=[c[0] for c in countries if c[0]],
-                         habitats=[h[0] for h in habitats if h[0]],
+                         families=facets['families'],
+                         countries=facets['countries'],
+                         habitats=facets['habitats'],
+                         page_args=link_args(request.args),
                          search_query=search_query,
                          family_filter=family_filter,
                          country_filter=country_filter,
@@ -328,7 +434,7 @@ def plant_index():
 @main_bp.route('/plant/<int:id>')
 def plant_detail(id):
     """植物详情页"""
-    plant = PlantResource.query.get_or_404(id)
+    plant = PlantResource.query.options(PlantResource.full_options()).get_or_404(id)
     return render_template('plant/detail.html', plant=plant)
 
 @main_bp.route('/plant/add', methods=['GET', 'POST'])
@@ -350,7 +456,7 @@ def plant_add():
                 identification_id=request.form.get('identification_id') or None,
                 recorded_by=request.form.get('recorded_by') or None,
                 record_number=request.form.get('record_number') or None,
-                event_date=request.form.get('event_date') or None,
+                event_date=parse_date(request.form.get('event_date')),
                 identified_by=request.form.get('identified_by') or None,
                 country=request.form.get('country') or None,
                 state_province=request.form.get('state_province') or None,
@@ -366,6 +472,7 @@ def plant_add():
             
             db.session.add(new_plant)
             db.session.commit()
+            notify_change(PlantResource, 'insert', new=[snapshot(new_plant)])
             flash('植物记录添加成功!', 'success')
             return redirect(url_for('main.plant_index'))
             
@@ -380,9 +487,10 @@ def plant_add():
 @main_bp.route('/plant/edit/<int:id>', methods=['GET', 'POST'])
 def plant_edit(id):
     """编辑植物记录"""
-    plant = PlantResource.query.get_or_404(id)
+    plant = PlantResource.query.options(PlantResource.full_options()).get_or_404(id)
     
     if request.method == 'POST':
+        before = snapshot(plant)
         try:
             # 更新记录
             plant.classification = request.form.get('classification') or None
@@ -397,7 +505,7 @@ def plant_edit(id):
             plant.identification_id = request.form.get('identification_id') or None
             plant.recorded_by = request.form.get('recorded_by') or None
             plant.record_number = request.form.get('record_number') or None
-            plant.event_date = request.form.get('event_date') or None
+            plant.event_date = parse_date(request.form.get('event_date'))
             plant.identified_by = request.form.get('identified_by') or None
             plant.country = request.form.get('country') or None
             plant.state_province = request.form.get('state_province') or None
@@ -419,6 +527,7 @@ def plant_edit(id):
             plant.habit = request.form.get('habit') or None
             
             db.session.commit()
+            notify_change(PlantResource, 'update', old=[before], new=[snapshot(plant)])
             flash('植物记录更新成功!', 'success')
             return redirect(url_for('main.plant_detail', id=id))
             
@@ -433,26 +542,111 @@ def plant_edit(id):
 @main_bp.route('/plant/delete/<int:id>', methods=['POST'])
 def plant_delete(id):
     """删除植物记录"""
-    plant = PlantResource.query.get_or_404(id)
+    plant = PlantResource.query.options(PlantResource.full_options()).get_or_404(id)
+    before = snapshot(plant)
     db.session.delete(plant)
     db.session.commit()
+    notify_change(PlantResource, 'delete', old=[before])
     return redirect(url_for('main.plants'))
 
+def api_fields(model):
+    """解析请求的 fields 参数，返回 (fields, 错误响应)"""
+    try:
+        return model.parse_fields(request.args.get('fields')), None
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+
+def api_list(model):
+    """列表API的通用实现
+
+    - 传入 cursor 或 limit 时按主键游标分页，返回 {items, next_cursor}
+    - 否则流式输出全部记录，format=ndjson 时为 NDJSON，默认为 JSON 数组
+    - fields: 逗号分隔的字段名，只查询和输出这些字段（默认全部）
+    只查询需要的列并由 RowEncoder 直接编码为 JSON，不构造 ORM 实例
+    """
+    fields, error = api_fields(model)
+    if error:
+        return error
+    encoder = RowEncoder(model, fields)
+    query = model.query.with_entities(*encoder.columns)
+    if 'cursor' in request.args or 'limit' in request.args:
+        cursor = parse_cursor(request.args.get('cursor'))
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        rows, next_cursor = keyset_page(query, model, cursor, limit)
+        return encoder.page_response(rows, next_cursor)
+
+    fmt = request.args.get('format', 'json')
+    return streaming_response(iter_keyset(query, model), fmt=fmt, encode=encoder.encode)
+
+def api_within(model):
+    """按地理范围查询的API通用实现
+
+    - bbox=最小经度,最小纬度,最大经度,最大纬度：矩形范围
+    - lat、lon、radius（米）：圆形范围，每条记录附带 distance（米）
+    按主键游标分页（cursor、limit），返回 {items, next_cursor}；fields 同列表API
+    """
+    fields, error = api_fields(model)
+    if error:
+        return error
+    # 计算距离需要经纬度列
+    query = model.query.options(model.load_options(fields, extra=model.GEO_FIELDS))
+    cursor = parse_cursor(request.args.get('cursor'))
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    try:
+        if 'bbox' in request.args:
+            bbox = parse_bbox(request.args.get('bbox'))
+            items, next_cursor = within_bbox(query, model, bbox, cursor, limit)
+            return jsonify({
+                'items': [item.to_dict(fields) for item in items],
+                'next_cursor': next_cursor
+            })
+
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lon', type=float)
+        radius = request.args.get('radius', type=float)
+        if latitude is None or longitude is None or radius is None:
+            raise ValueError('需要提供 bbox，或 lat、lon、radius 参数')
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius <= 0:
+            raise ValueError('经纬度超出范围或 radius 不是正数')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results, next_cursor = within_radius(query, model, latitude, longitude, radius,
+                                         cursor, limit)
+    return jsonify({
+        'items': [dict(item.to_dict(fields), distance=round(distance, 1))
+                  for item, distance in results],
+        'next_cursor': next_cursor
+    })
+
 @main_bp.route('/api/plants')
 def api_plants():
-    """获取所有植物记录的API接口"""
-    plants = PlantResource.query.all()
-    return jsonify([plant.to_dict() for plant in plants])
+    """获取植物记录的API接口"""
+    return api_list(PlantResource)
+
+@main_bp.route('/api/plants/within')
+def api_plants_within():
+    """按地理范围查询植物记录的API接口"""
+    return api_within(PlantResource)
 
 @main_bp.route('/api/plants/<int:id>')
 def api_plant_detail(id):
-    """获取单个植物记录的API接口"""
-    plant = PlantResource.query.get_or_404(id)
-    return jsonify(plant.to_dict())
+    """获取单个植物记录的API接口（fields 同列表API）"""
+    fields, error = api_fields(PlantResource)
+    if error:
+        return error
+    encoder = RowEncoder(PlantResource, fields)
+    row = PlantResource.query.with_entities(*encoder.columns).filter(PlantResource.id == id).first()
+    if row is None:
+        abort(404)
+    return encoder.object_response(row)
 
 @main_bp.route('/api/plants/search')
 def api_search_plants():
-    """搜索植物记录的API接口"""
+    """搜索植物记录的API接口（fields 同列表API）"""
+    fields, error = api_fields(PlantResource)
+    if error:
+        return error
     search_query = request.args.get('q', '')
     family_filter = request.args.get('family', '')
     country_filter = request.args.get('country', '')
@@ -463,12 +657,7 @@ def api_search_plants():
     query = PlantResource.query
     
     if search_query:
-        query = query.filter(
-            (PlantResource.scientific_name.ilike(f'%{search_query}%')) |
-            (PlantResource.vernacular_name.ilike(f'%{search_query}%')) |
-            (PlantResource.family.ilike(f'%{search_query}%')) |
-            (PlantResource.genus.ilike(f'%{search_query}%'))
-        )
+        query = search_index.apply(query, PlantResource, search_query)
     
     if family_filter:
         query = query.filter(PlantResource.family == family_filter)
@@ -479,34 +668,152 @@ def api_search_plants():
     if habitat_filter:
         query = query.filter(PlantResource.habitat.ilike(f'%{habitat_filter}%'))
     
-    plants = query.limit(limit).all()
+    encoder = RowEncoder(PlantResource, fields)
+    rows = query.with_entities(*encoder.columns).limit(limit).all()
     
-    return jsonify([plant.to_dict() for plant in plants])
+    return encoder.list_response(rows)
 
 
-# 昆虫资源首页
-@main_bp.route('/insects')
-def insect_index():
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
-    
-    # 获取所有筛选参数
-    search_query = request.args.get('q', '')
-    family_filter = request.args.get('family', '')
-    province_filter = request.args.get('province', '')
-    collection_date_start = request.args.get('collection_date_start', '')
-    collection_date_end = request.args.get('collection_date_end', '')
-    
-    # 构建查询
+@main_bp.route('/api/insects')
+def api_insects():
+    """获取昆虫记录的API接口"""
+    return api_list(InsectResource)
+
+@main_bp.route('/api/insects/within')
+def api_insects_within():
+    """按地理范围查询昆虫记录的API接口"""
+    return api_within(InsectResource)
+
+def api_batch(model):
+    """批量写入API的通用实现（仅管理员）
+
+    请求体为 {"upsert": [记录, ...], "delete": [id, ...]}，记录的键同列表API的字段名，
+    带 id 的记录只更新给出的字段，不带 id 的为新增。全部操作在一个事务中执行，
+    任一项出错时整批不执行；响应的 results 给出每一项的结果
+    """
+    if not session.get('is_admin'):
+        return jsonify({'error': '需要管理员权限'}), 403
+    try:
+        result = apply_batch(model, request.get_json(silent=True))
+    except BatchError as e:
+        return jsonify(e.to_dict()), e.status
+    return jsonify(result)
+
+@main_bp.route('/api/plants/batch', methods=['POST'])
+def api_plants_batch():
+    """批量新增、修改和删除植物记录"""
+    return api_batch(PlantResource)
+
+@main_bp.route('/api/insects/batch', methods=['POST'])
+def api_insects_batch():
+    """批量新增、修改和删除昆虫记录"""
+    return api_batch(InsectResource)
+
+@main_bp.route('/api/map/clusters')
+def api_map_clusters():
+    """地图点聚合API接口
+
+    - zoom: 地图缩放级别（默认0），决定聚合格子的大小
+    - bbox: 最小经度,最小纬度,最大经度,最大纬度（默认全球）
+    - resource: plants 或 insects（默认两者都返回）
+    返回每个格子的记录数和平均坐标，数据来自预先聚合的各层级格子
+    """
+    zoom = request.args.get('zoom', 0, type=int)
+    resource = request.args.get('resource', '')
+    try:
+        bbox = parse_bbox(request.args.get('bbox', '-180,-90,180,90'))
+        if resource and resource not in RESOURCE_MODELS:
+            raise ValueError(f"resource 应为 {' 或 '.join(RESOURCE_MODELS)}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    precision = clusters_precision(bbox, max(zoom, 0))
+    result = {'zoom': zoom, 'precision': precision}
+    for name, model in RESOURCE_MODELS.items():
+        if not resource or resource == name:
+            result[name] = get_clusters(model, bbox, precision)
+    return jsonify(result)
+
+@main_bp.route('/api/aggregate')
+def api_aggregate():
+    """分组统计API接口
+
+    - resource: plants 或 insects（默认 plants）
+    - group_by: 逗号分隔的维度（最多 3 个），字符串维度为 family、genus、country、province
+      （昆虫另有 order），数值维度为 year、elevation、latitude、longitude
+    - <字符串维度>=取值：等值筛选；<数值维度>_min、<数值维度>_max：范围筛选
+    - <数值维度>_band：数值维度分组的区间宽度（默认年份 1、海拔 500、经纬度 1），
+      每个维度最多 MAX_BINS 个区间
+    - limit: 返回的分组数（默认 1000），按记录数从多到少
+    统计在各进程内存中的列式快照上进行，数据变化后快照至多延迟 ANALYTICS_REFRESH_INTERVAL 秒
+    """
+    resource = request.args.get('resource', 'plants')
+    model = RESOURCE_MODELS.get(resource)
+    try:
+        if model is None:
+            raise ValueError(f"resource 应为 {' 或 '.join(RESOURCE_MODELS)}")
+        params, limit = parse_aggregate_args(model, request.args)
+        snapshot = analytics.get(model)
+        total, groups = snapshot.aggregate(**params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    groups.sort(key=lambda group: (-group[1], [(value is None, '' if value is None else value)
+                                                for value in group[0]]))
+    return jsonify({
+        'resource': resource,
+        'groupBy': params['group_by'],
+        'total': total,
+        'groups': [dict(zip(params['group_by'], values), count=count)
+                   for values, count in groups[:limit]],
+        'truncated': len(groups) > limit,
+        'snapshot': {
+            'rows': snapshot.size,
+            'builtAt': datetime.utcfromtimestamp(snapshot.built_at).isoformat(),
+        },
+    })
+
+
+@main_bp.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 文本格式的运行指标：各端点的请求耗时、SQL 语句数和耗时、连接池状态
+
+    各工作进程分别统计；默认不提供，由环境变量 METRICS_ENABLED 开启
+    """
+    if not current_app.config.get('METRICS_ENABLED'):
+        abort(404)
+    return Response(metrics.render(db.engine.pool), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@main_bp.route('/api/taxonomy')
+def api_taxonomy():
+    """分类树API接口（逐级展开）
+
+    - resource: plants 或 insects（默认 plants）
+    - node: 节点路径，各级名称以 | 连接（如 Angiospermae|Rosaceae），默认为根节点
+    返回节点、祖先节点和子节点及各自的记录数，数据来自随写操作增量维护的分类树
+    """
+    resource = request.args.get('resource', 'plants')
+    model = RESOURCE_MODELS.get(resource)
+    if model is None:
+        return jsonify({'error': f"resource 应为 {' 或 '.join(RESOURCE_MODELS)}"}), 400
+
+    result = get_node(model, request.args.get('node', ''))
+    if result is None:
+        return jsonify({'error': '分类节点不存在'}), 404
+    return jsonify(dict(result, resource=resource))
+
+def filter_insects(args):
+    """按列表页的筛选参数（q、family、province、采集时间范围）构建昆虫查询，导出时共用"""
     query = InsectResource.query
+    search_query = args.get('q', '')
+    family_filter = args.get('family', '')
+    province_filter = args.get('province', '')
+    collection_date_start = args.get('collection_date_start', '')
+    collection_date_end = args.get('collection_date_end', '')
     
     # 关键词搜索
     if search_query:
-        query = query.filter(
-            (InsectResource.chinese_name.ilike(f'%{search_query}%')) |
-            (InsectResource.species_name.ilike(f'%{search_query}%')) |
-            (InsectResource.family_name.ilike(f'%{search_query}%'))
-        )
+        query = search_index.apply(query, InsectResource, search_query, LIST_SEARCH_FIELDS[InsectResource])
     
     # 科筛选
     if family_filter:
@@ -530,21 +837,39 @@ def insect_index():
             query = query.filter(InsectResource.collection_date <= end_date)
         except ValueError:
             pass  # 忽略无效日期格式
+    return query
+
+# 昆虫资源首页
+@main_bp.route('/insects')
+def insect_index():
+    page = request.args.get('page', 1, type=int)
+    per_page = 20
     
-    # 执行查询并分页
-    insects = query.paginate(page=page, per_page=per_page, error_out=False)
+    # 获取所有筛选参数
+    search_query = request.args.get('q', '')
+    family_filter = request.args.get('family', '')
+    province_filter = request.args.get('province', '')
+    
+    # 构建查询（只加载列表显示的列）
+    query = filter_insects(request.args).options(InsectResource.list_options())
+    
+    # 执行查询并分页（总数按筛选条件缓存，深度翻页改用游标）
+    insects = paginate(query, InsectResource, page, per_page,
+                       after=parse_cursor(request.args.get('after')),
+                       before=parse_cursor(request.args.get('before')),
+                       keyset=not search_query)
     
-    # 获取筛选选项
-    families = db.session.query(InsectResource.family_name).distinct().all()
-    provinces = db.session.query(InsectResource.province).distinct().all()
+    # 获取筛选选项（含各取值的记录数，缓存至数据变化为止）
+    facets = get_facets(InsectResource)
     
     # 获取总记录数
-    total_count = InsectResource.query.count()
+    total_count = get_total(InsectResource)
     
     return render_template('insect/index.html', 
                          insects=insects,
-                         families=[f[0] for f in families if f[0]],
-                         provinces=[p[0] for p in provinces if p[0]],
+                         families=facets['families'],
+                         provinces=facets['provinces'],
+                         page_args=link_args(request.args),
                          search_query=search_query,
                          family_filter=family_filter,
                          province_filter=province_filter,
@@ -554,7 +879,7 @@ def insect_index():
 @main_bp.route('/insect/<int:id>')
 def insect_detail(id):
     """昆虫详情页"""
-    insect = InsectResource.query.get_or_404(id)
+    insect = InsectResource.query.options(InsectResource.full_options()).get_or_404(id)
     return render_template('insect/detail.html', insect=insect)
 
 # 添加昆虫记录
@@ -631,6 +956,7 @@ def insect_add():
             
             db.session.add(new_insect)
             db.session.commit()
+            notify_change(InsectResource, 'insert', new=[snapshot(new_insect)])
             flash('昆虫记录添加成功!', 'success')
             return redirect(url_for('main.insect_index'))
             
@@ -646,9 +972,10 @@ def insect_add():
 @main_bp.route('/insect/edit/<int:id>', methods=['GET', 'POST'])
 def insect_edit(id):
     """编辑昆虫记录"""
-    insect = InsectResource.query.get_or_404(id)
+    insect = InsectResource.query.options(InsectResource.full_options()).get_or_404(id)
     
     if request.method == 'POST':
+        before = snapshot(insect)
         try:
             # 更新记录
             insect.serial_number = request.form.get('serial_number') or None
@@ -748,6 +1075,7 @@ def insect_edit(id):
             insect.project_task_code = request.form.get('project_task_code') or None
             
             db.session.commit()
+            notify_change(InsectResource, 'update', old=[before], new=[snapshot(insect)])
             flash('昆虫记录更新成功!', 'success')
             return redirect(url_for('main.insect_detail', id=id))
             
@@ -763,8 +1091,31 @@ def insect_edit(id):
 @main_bp.route('/insect/delete/<int:id>', methods=['POST'])
 def insect_delete(id):
     """删除昆虫记录"""
-    insect = InsectResource.query.get_or_404(id)
+    insect = InsectResource.query.options(InsectResource.full_options()).get_or_404(id)
+    before = snapshot(insect)
     db.session.delete(insect)
     db.session.commit()
+    notify_change(InsectResource, 'delete', old=[before])
     flash('昆虫记录已删除!', 'success')
-    return redirect(url_for('main.insect_index'))
\ No newline at end of file
+    return redirect(url_for('main.insect_index'))
+
+# 导出（与列表页相同的筛选参数）
+def export_query(resource):
+    """导出接口的资源名称 -> (模型, 按请求参数筛选的查询)，未知资源返回 404"""
+    if resource == 'plants':
+        return PlantResource, filter_plants(request.args)
+    if resource == 'insects':
+        return InsectResource, filter_insects(request.args)
+    abort(404)
+
+@main_bp.route('/export/<resource>.csv')
+def export_csv(resource):
+    """流式导出 CSV，表头与导入格式一致"""
+    model, query = export_query(resource)
+    return csv_response(query, model, f'{resource}.csv')
+
+@main_bp.route('/export/<resource>-dwca.zip')
+def export_dwca(resource):
+    """流式导出 Darwin Core Archive（meta.xml + occurrence.txt）"""
+    model, query = export_query(resource)
+    return dwca_response(query, model, f'{resource}-dwca.zip')
@@ -0,0 +1,356 @@
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import text, or_, case, false, Integer, Float
+from . import db
+from .models import PlantResource, InsectResource
+from .signals import resource_changed
+
+# 建立搜索索引的字段（按权重从高到低排列），查询默认搜索全部字段
+SEARCH_FIELDS = {
+    PlantResource: ('scientific_name', 'vernacular_name', 'family', 'genus'),
+    InsectResource: ('chinese_name', 'species_name', 'family_name', 'genus_name'),
+}
+
+# 列表页（/plants、/insects）搜索的字段，与原 ilike 查询相同，不匹配属名
+LIST_SEARCH_FIELDS = {
+    PlantResource: ('scientific_name', 'vernacular_name', 'family'),
+    InsectResource: ('chinese_name', 'species_name', 'family_name'),
+}
+
+
+def like_filter(query, model, q, fields=None):
+    """ilike 模糊匹配，作为各后端在短关键词等情况下的兜底实现"""
+    pattern = f'%{q}%'
+    return query.filter(or_(*(getattr(model, field).ilike(pattern)
+                              for field in fields or SEARCH_FIELDS[model])))
+
+
+def phrase(q):
+    """将关键词转为短语查询，避免引号等字符被当作查询语法"""
+    return '"' + q.replace('"', ' ') + '"'
+
+
+class LikeBackend:
+    """不建立索引，直接使用 ilike 全表扫描"""
+    name = 'like'
+
+    def setup(self):
+        pass
+
+    def ready(self):
+        return True
+
+    def apply(self, query, model, q, fields):
+        return like_filter(query, model, q, fields)
+
+
+class SQLiteFTSBackend:
+    """SQLite FTS5 外部内容表
+
+    使用 trigram 分词器支持中文子串匹配，由触发器在增删改时自动同步，
+    批量导入绕过 ORM 时同样有效。按 bm25 排序。
+    """
+    name = 'sqlite-fts5'
+
+    # trigram 分词器要求关键词至少3个字符
+    MIN_QUERY_LENGTH = 3
+
+    @staticmethod
+    def fts_table(model):
+        return f'{model.__tablename__}_fts'
+
+    def _exists(self, model):
+        """索引表及其同步触发器是否都已建立"""
+        fts = self.fts_table(model)
+        names = {fts, f'{fts}_ai', f'{fts}_ad', f'{fts}_au'}
+        existing = db.session.execute(
+            text("SELECT name FROM sqlite_master WHERE tbl_name IN (:table, :fts)"),
+            {'table': model.__tablename__, 'fts': fts}
+        ).scalars()
+        return names <= set(existing)
+
+    def ready(self):
+        return all(self._exists(model) for model in SEARCH_FIELDS)
+
+    def setup(self):
+        for model, fields in SEARCH_FIELDS.items():
+            table = model.__tablename__
+            fts = self.fts_table(model)
+            # 重建数据表（如迁移）会同时删除其触发器，缺少任一对象时补建并重建索引
+            if self._exists(model):
+                continue
+
+            columns = ', '.join(fields)
+            new_values = ', '.join(f'new.{field}' for field in fields)
+            old_values = ', '.join(f'old.{field}' for field in fields)
+            insert_new = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});"
+            delete_old = (f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+                          f"VALUES ('delete', old.id, {old_values});")
+
+            statements = [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, content='{table}', "
+                f"content_rowid='id', tokenize='trigram')",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} "
+                f"BEGIN {delete_old} {insert_new} END",
+                # 为已有数据建立索引
+                f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+            ]
+            for statement in statements:
+                db.session.execute(text(statement))
+        db.session.commit()
+
+    def apply(self, query, model, q, fields):
+        if len(q) < self.MIN_QUERY_LENGTH:
+            return like_filter(query, model, q, fields)
+
+        fts = self.fts_table(model)
+        match = phrase(q)
+        if fields != SEARCH_FIELDS[model]:
+            # 列过滤器：只匹配指定的字段
+            match = f"{{{' '.join(fields)}}}: {match}"
+        matches = text(
+            f"SELECT rowid AS id, bm25({fts}) AS score FROM {fts} WHERE {fts} MATCH :match"
+        ).bindparams(match=match).columns(id=Integer, score=Float).subquery('search_matches')
+        return query.join(matches, matches.c.id == model.id).order_by(matches.c.score)
+
+
+class MySQLFulltextBackend:
+    """MySQL FULLTEXT 索引，使用 ngram 解析器支持中文分词，按相关度排序"""
+    name = 'mysql-fulltext'
+
+    # ngram_token_size 默认为2
+    MIN_QUERY_LENGTH = 2
+
+    @staticmethod
+    def index_name(model):
+        return f'ft_{model.__tablename__}_search'
+
+    def _exists(self, model):
+        return db.session.execute(
+            text("SELECT 1 FROM information_schema.statistics "
+                 "WHERE table_schema = DATABASE() AND table_name = :table "
+                 "AND index_name = :index LIMIT 1"),
+            {'table': model.__tablename__, 'index': self.index_name(model)}
+        ).first() is not None
+
+    def ready(self):
+        return all(self._exists(model) for model in SEARCH_FIELDS)
+
+    def setup(self):
+        # ALTER TABLE 会重建表并可能长时间锁表，只由 flask dbbio init 执行
+        for model, fields in SEARCH_FIELDS.items():
+            if not self._exists(model):
+                db.session.execute(text(
+                    f"ALTER TABLE {model.__tablename__} ADD FULLTEXT INDEX {self.index_name(model)} "
+                    f"({', '.join(fields)}) WITH PARSER ngram"
+                ))
+        db.session.commit()
+
+    def apply(self, query, model, q, fields):
+        if len(q) < self.MIN_QUERY_LENGTH:
+            return like_filter(query, model, q, fields)
+
+        from sqlalchemy.dialects.mysql import match
+        # MATCH 的列须与 FULLTEXT 索引一致，只搜索部分字段时再用 ilike 排除其余字段的命中
+        columns = [getattr(model, field) for field in SEARCH_FIELDS[model]]
+        score = match(*columns, against=phrase(q)).in_boolean_mode()
+        query = query.filter(score)
+        if fields != SEARCH_FIELDS[model]:
+            query = like_filter(query, model, q, fields)
+        return query.order_by(score.desc())
+
+
+class InvertedIndex:
+    """单个模型的内存倒排索引，以字符一元组和二元组为词项（兼容中文）"""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.documents = {}
+        self.postings = defaultdict(set)
+
+    @staticmethod
+    def terms(value):
+        value = value.lower()
+        terms = set(value)
+        terms.update(value[i:i + 2] for i in range(len(value) - 1))
+        return terms
+
+    def add(self, doc_id, values):
+        values = tuple((value or '').lower() for value in values)
+        self.documents[doc_id] = values
+        for value in values:
+            for term in self.terms(value):
+                self.postings[term].add(doc_id)
+
+    def remove(self, doc_id):
+        values = self.documents.pop(doc_id, None)
+        if values is None:
+            return
+        for value in values:
+            for term in self.terms(value):
+                ids = self.postings.get(term)
+                if ids is not None:
+                    ids.discard(doc_id)
+                    if not ids:
+                        del self.postings[term]
+
+    def search(self, q, positions=None):
+        """返回按相关度排序的记录id列表，positions 为参与匹配的字段下标（默认全部）"""
+        q = q.lower()
+        if len(q) == 1:
+            terms = [q]
+        else:
+            terms = [q[i:i + 2] for i in range(len(q) - 1)]
+
+        posting_lists = sorted((self.postings.get(term, set()) for term in terms), key=len)
+        candidates = set.intersection(*posting_lists) if posting_lists else set()
+
+        weight = len(self.fields)
+        if positions is None:
+            positions = range(len(self.fields))
+        scored = []
+        for doc_id in candidates:
+            score = 0
+            values = self.documents[doc_id]
+            for position in positions:
+                value = values[position]
+                if q not in value:
+                    continue
+                # 完全匹配 > 前缀匹配 > 包含，字段越靠前权重越高
+                kind = 3 if value == q else 2 if value.startswith(q) else 1
+                score = max(score, kind * weight - position)
+            if score:
+                scored.append((-score, doc_id))
+        scored.sort()
+        return [doc_id for _, doc_id in scored]
+
+
+class MemoryBackend:
+    """进程内倒排索引，首次查询时构建，通过 resource_changed 信号增量同步
+
+    注意：每个工作进程各自维护索引，适用于开发环境或无全文索引的数据库
+    """
+    name = 'memory'
+
+    # 参与排序的结果数上限，超出部分按主键顺序排在后面
+    RANK_LIMIT = 500
+
+    # 命中的记录数超过此值时改用 ilike 筛选，避免 IN 列表的绑定参数过多
+    MAX_IDS = 5000
+
+    def __init__(self):
+        self.indexes = {}
+        resource_changed.connect(self.on_change)
+
+    def setup(self):
+        self.indexes.clear()
+
+    def ready(self):
+        return True
+
+    def build(self, model):
+        fields = SEARCH_FIELDS[model]
+        index = InvertedIndex(fields)
+        columns = [model.id] + [getattr(model, field) for field in fields]
+        for row in db.session.query(*columns).yield_per(1000):
+            index.add(row[0], row[1:])
+        self.indexes[model] = index
+        return index
+
+    def on_change(self, sender, action, old, new):
+        index = self.indexes.get(sender)
+        if index is None:
+            return
+        if action == 'reload':
+            # 批量变化后下次查询时重建
+            del self.indexes[sender]
+            return
+        for record in old:
+            index.remove(record['id'])
+        for record in new:
+            index.add(record['id'], [record.get(field) for field in index.fields])
+
+    def apply(self, query, model, q, fields):
+        index = self.indexes.get(model) or self.build(model)
+        ids = index.search(q, [index.fields.index(field) for field in fields])
+        if not ids:
+            return query.filter(false())
+        ranking = case({doc_id: rank for rank, doc_id in enumerate(ids[:self.RANK_LIMIT])},
+                       value=model.id, else_=self.RANK_LIMIT)
+        if len(ids) > self.MAX_IDS:
+            # 与倒排索引的结果相同（不区分大小写的子串匹配），仍按前 RANK_LIMIT 条的相关度排序
+            return like_filter(query, model, q, fields).order_by(ranking)
+        return query.filter(model.id.in_(ids)).order_by(ranking)
+
+
+BACKENDS = {
+    LikeBackend.name: LikeBackend,
+    SQLiteFTSBackend.name: SQLiteFTSBackend,
+    MySQLFulltextBackend.name: MySQLFulltextBackend,
+    MemoryBackend.name: MemoryBackend,
+}
+
+
+class SearchIndex:
+    """可插拔的关键词搜索
+
+    SEARCH_BACKEND 配置为 auto 时按数据库类型选择：
+    SQLite 使用 FTS5，MySQL 使用 FULLTEXT，其他数据库使用内存倒排索引。
+    索引只由 flask dbbio init 建立（建表、重建索引可能长时间锁表），
+    请求中发现索引未建立时改用 ilike 查询
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('SEARCH_BACKEND', 'auto')
+        app.extensions['search'] = None
+
+    def _select(self):
+        name = current_app.config['SEARCH_BACKEND']
+        if name == 'auto':
+            dialect = db.engine.dialect.name
+            if dialect == 'sqlite':
+                name = SQLiteFTSBackend.name
+            elif dialect == 'mysql':
+                name = MySQLFulltextBackend.name
+            else:
+                name = MemoryBackend.name
+        return BACKENDS[name]()
+
+    def _resolve(self):
+        backend = self._select()
+        try:
+            if backend.ready():
+                return backend
+            current_app.logger.warning(
+                f'搜索后端 {backend.name} 的索引尚未建立（执行 flask dbbio init），改用 ilike 查询')
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f'搜索后端 {backend.name} 不可用，改用 ilike 查询: {e}')
+        return LikeBackend()
+
+    @property
+    def backend(self):
+        backend = current_app.extensions.get('search')
+        if backend is None:
+            backend = current_app.extensions['search'] = self._resolve()
+        return backend
+
+    def setup(self):
+        """建立或重建搜索索引（由 flask dbbio init 调用）"""
+        backend = self._select()
+        backend.setup()
+        current_app.extensions['search'] = backend
+
+    def apply(self, query, model, q, fields=None):
+        """按关键词过滤查询并按相关度排序，fields 为 SEARCH_FIELDS 中要搜索的字段（默认全部）"""
+        q = q.strip()
+        if not q:
+            return query
+        # 按 SEARCH_FIELDS 中的顺序（即权重）排列
+        fields = tuple(field for field in SEARCH_FIELDS[model] if not fields or field in fields)
+        return self.backend.apply(query, model, q, fields)
+
+
+search_index = SearchIndex()
@@ -0,0 +1,191 @@
+import os
+import datetime
+from flask import current_app
+from . import db
+from .models import PlantResource, InsectResource
+from .search import search_index
+from .importer import detect_encoding, load_csv
+from .signals import notify_change
+
+
+def default_csv_path(name):
+    """项目根目录下的示例数据文件"""
+    return os.path.join(os.path.dirname(current_app.root_path), name)
+
+
+def create_schema():
+    """建表并建立关键词搜索索引（需在应用上下文中调用，可重复执行）"""
+    db.create_all()
+    search_index.setup()
+
+
+def seed_db(plants_csv_file_path=None, insects_csv_file_path=None):
+    """数据库中还没有数据时从 CSV 文件导入（文件不存在或导入失败时添加示例数据）"""
+    # 检查是否已有数据
+    if PlantResource.query.first():
+        print("数据库已有数据，跳过导入")
+        return
+    
+    # 从 CSV 文件导入数据
+    plants_csv_file_path = plants_csv_file_path or default_csv_path('plants.csv')
+    
+    if not os.path.exists(plants_csv_file_path):
+        print(f"CSV文件不存在: {plants_csv_file_path}")
+        # 添加示例数据作为备选
+        add_sample_plant_data()
+        return
+    
+    try:
+        import_plants_data_from_csv(plants_csv_file_path)
+        print("植物数据导入成功")
+    except Exception as e:
+        print(f"植物导入数据时出错: {str(e)}")
+        # 出错时添加示例数据
+        add_sample_plant_data()
+    
+    # 从 CSV 文件导入数据
+    insects_csv_file_path = insects_csv_file_path or default_csv_path('insects.csv')
+    
+    if not os.path.exists(insects_csv_file_path):
+        print(f"CSV文件不存在: {insects_csv_file_path}")
+        # 添加示例数据作为备选
+        add_sample_insect_data()
+        return
+    
+    try:
+        import_insects_data_from_csv(insects_csv_file_path)
+        print("动物数据导入成功")
+    except Exception as e:
+        print(f"动物导入数据时出错: {str(e)}")
+        # 出错时添加示例数据
+        add_sample_insect_data()
+
+def import_plants_data_from_csv(csv_file_path, batch_size=None, reject_path=None):
+    """从CSV文件批量导入数据到数据库，失败的行写入 reject_path"""
+    stats = load_csv(PlantResource, csv_file_path, batch_size, reject_path)
+    notify_change(PlantResource, 'reload')
+    return stats
+
+def add_sample_plant_data():
+    """添加示例数据（当CSV文件不存在或导入失败时使用）"""
+    sample_data = [
+        PlantResource(
+            classification="植物界-被子植物门-双子叶植物纲-蔷薇目-蔷薇科-蔷薇属",
+            kingdom="Plantae",
+            chinese_kingdom_name="植物界",
+            family="Rosaceae",
+            chinese_family_name="蔷薇科",
+            genus="Rosa",
+            chinese_genus_name="蔷薇属",
+            scientific_name="Rosa chinensis",
+            vernacular_name="月季",
+            identification_id="ICN001",
+            recorded_by="张三",
+            record_number="RC2023001",
+            event_date=datetime.date(2023, 5, 10),
+            identified_by="李四",
+            country="中国",
+            state_province="云南省",
+            city="昆明市",
+            county="呈贡区",
+            locality="昆明植物园蔷薇园",
+            decimal_latitude=25.1367,
+            decimal_longitude=102.7433,
+            minimum_elevation_in_meters=1890,
+            habitat="栽培于植物园",
+            habit="灌木"
+        ),
+        PlantResource(
+            classification="植物界-被子植物门-单子叶植物纲-禾本目-禾本科-竹属",
+            kingdom="Plantae",
+            chinese_kingdom_name="植物界",
+            family="Poaceae",
+            chinese_family_name="禾本科",
+            genus="Bambusa",
+            chinese_genus_name="簕竹属",
+            scientific_name="Bambusa multiplex",
+            vernacular_name="孝顺竹",
+            identification_id="ICN002",
+            recorded_by="王五",
+            record_number="BM2023001",
+            event_date=datetime.date(2023, 6, 15),
+            identified_by="赵六",
+            country="中国",
+            state_province="广东省",
+            city="广州市",
+            county="天河区",
+            locality="华南植物园竹园",
+            decimal_latitude=23.1833,
+            decimal_longitude=113.3500,
+            minimum_elevation_in_meters=25,
+            habitat="栽培于植物园",
+            habit="竹类"
+        )
+    ]
+    
+    try:
+        db.session.bulk_save_objects(sample_data)
+        db.session.commit()
+        notify_change(PlantResource, 'reload')
+        print("示例数据已添加")
+    except Exception as e:
+        db.session.rollback()
+        print(f"添加示例数据时出错: {str(e)}")
+        
+def import_insects_data_from_csv(csv_file, batch_size=None, reject_path=None):
+    """从CSV文件批量导入昆虫数据到数据库，失败的行写入 reject_path"""
+    # 检测文件编码后逐行流式导入
+    encoding = detect_encoding(csv_file)
+    print(f"✅ 使用 {encoding} 编码读取CSV文件")
+    
+    stats = load_csv(InsectResource, csv_file, batch_size, reject_path, encoding)
+    notify_change(InsectResource, 'reload')
+    print(f"🎉 数据导入完成！成功导入 {stats['inserted']} 条记录")
+    return stats
+
+
+def add_sample_insect_data():
+    """添加昆虫示例数据"""
+    sample_data = [
+        InsectResource(
+            serial_number="INS001",
+            chinese_name="中华蜜蜂",
+            phylum="节肢动物门",
+            class_="昆虫纲",
+            order="膜翅目",
+            family_name="蜜蜂科",
+            genus_name="蜜蜂属",
+            species_name="中华蜜蜂",
+            country="中国",
+            province="云南省",
+            locality="昆明市郊区",
+            habitat="山区林地",
+            collector="昆虫采集组",
+            collection_date=datetime.date(2023, 6, 15)
+        ),
+        InsectResource(
+            serial_number="INS002",
+            chinese_name="七星瓢虫",
+            phylum="节肢动物门",
+            class_="昆虫纲",
+            order="鞘翅目",
+            family_name="瓢虫科",
+            genus_name="瓢虫属",
+            species_name="七星瓢虫",
+            country="中国",
+            province="四川省",
+            locality="成都市农田",
+            habitat="农田生态系统",
+            collector="昆虫采集组",
+            collection_date=datetime.date(2023, 7, 20)
+        )
+    ]
+    
+    try:
+        db.session.bulk_save_objects(sample_data)
+        db.session.commit()
+        notify_change(InsectResource, 'reload')
+        print("昆虫示例数据已添加")
+    except Exception as e:
+        db.session.rollback()
+        print(f"添加昆虫示例数据时出错: {str(e)}")
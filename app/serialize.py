@@ -0,0 +1,92 @@
+import math
+from json.encoder import encode_basestring, encode_basestring_ascii
+from flask import current_app, jsonify
+from .models import keep_value
+from .pagination import dumps
+
+
+def _float(value):
+    """与 json 模块相同的浮点数文本（NaN、Infinity 同样输出）"""
+    if value != value:
+        return 'NaN'
+    if value == math.inf:
+        return 'Infinity'
+    if value == -math.inf:
+        return '-Infinity'
+    return float.__repr__(value)
+
+
+class RowEncoder:
+    """把 Core 行元组直接编码为与 jsonify(instance.to_dict(fields)) 完全相同的 JSON 文本
+
+    columns 为要查询的列，第一列为主键（供游标分页使用）；每个接口字段按预先计算的
+    ('"键名":', 行内下标, 编码函数) 输出，不构造 ORM 实例和中间字典。
+    键的顺序、是否转义非 ASCII 字符与应用的 JSON 设置一致
+    """
+
+    def __init__(self, model, fields=None):
+        settings = current_app.json
+        self.encode_string = encode_basestring_ascii if settings.ensure_ascii else encode_basestring
+        # 调试模式下 jsonify 输出缩进格式，此时退回到字典 + jsonify
+        self.compact = not (settings.compact is False or
+                            (settings.compact is None and current_app.debug))
+
+        steps = model.api_steps(fields)
+        names = ['id']
+        for _, column, _ in steps:
+            if column not in names:
+                names.append(column)
+        self.columns = [getattr(model, name) for name in names]
+        self.keys = [(key, names.index(column), convert) for key, column, convert in steps]
+
+        parts = sorted(self.keys, key=lambda part: part[0]) if settings.sort_keys else self.keys
+        self.parts = []
+        for key, index, convert in parts:
+            if convert is keep_value:
+                encode = self.value
+            else:
+                encode = lambda value, convert=convert: self.value(convert(value))
+            self.parts.append((self.encode_string(key) + ':', index, encode))
+
+    def value(self, value):
+        if value is None:
+            return 'null'
+        kind = type(value)
+        if kind is str:
+            return self.encode_string(value)
+        if kind is float:
+            return _float(value)
+        if kind is int:
+            return int.__repr__(value)
+        return dumps(value)
+
+    def encode(self, row):
+        """一行 -> JSON 对象文本"""
+        return '{' + ','.join([prefix + encode(row[index])
+                               for prefix, index, encode in self.parts]) + '}'
+
+    def to_dict(self, row):
+        """一行 -> 与 to_dict(fields) 相同的字典"""
+        return {key: convert(row[index]) for key, index, convert in self.keys}
+
+    def _response(self, text):
+        return current_app.response_class(f'{text}\n', mimetype=current_app.json.mimetype)
+
+    def object_response(self, row):
+        """单条记录的响应，等同于 jsonify(instance.to_dict(fields))"""
+        if not self.compact:
+            return jsonify(self.to_dict(row))
+        return self._response(self.encode(row))
+
+    def list_response(self, rows):
+        """记录列表的响应，等同于 jsonify([instance.to_dict(fields), ...])"""
+        if not self.compact:
+            return jsonify([self.to_dict(row) for row in rows])
+        return self._response('[' + ','.join(map(self.encode, rows)) + ']')
+
+    def page_response(self, rows, next_cursor):
+        """游标分页的响应，等同于 jsonify({'items': [...], 'next_cursor': next_cursor})"""
+        if not self.compact:
+            return jsonify({'items': [self.to_dict(row) for row in rows], 'next_cursor': next_cursor})
+        return self._response('{"items":[' + ','.join(map(self.encode, rows)) +
+                              '],"next_cursor":' + self.value(next_cursor) + '}')
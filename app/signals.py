@@ -0,0 +1,40 @@
+from blinker import Namespace
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+from . import db
+
+_signals = Namespace()
+
+# 资源记录发生变化时发出，sender 为模型类
+#   action: 'insert' / 'update' / 'delete' / 'reload'（批量导入等无法逐条描述的变化）
+#   old:    变化前的记录快照列表（update / delete）
+#   new:    变化后的记录快照列表（insert / update）
+resource_changed = _signals.signal('resource-changed')
+
+
+def snapshot(instance):
+    """将模型实例的列值复制为字典，供订阅方比较新旧值"""
+    return {attr.key: getattr(instance, attr.key)
+            for attr in inspect(type(instance)).column_attrs}
+
+
+def notify_change(model, action, old=None, new=None):
+    """通知所有订阅方（搜索索引、缓存等）资源已变化"""
+    resource_changed.send(model, action=action, old=old or [], new=new or [])
+
+
+def update_or_insert(update_statement, insert_statement):
+    """订阅方维护汇总行：先按主键更新，没有该行时插入，返回是否插入了新行
+
+    插入在 SAVEPOINT 中执行，其他进程同时插入了同一行时只回滚这条插入并改为更新，
+    同一事务中之前的写入保留（同 cache.bump）
+    """
+    if db.session.execute(update_statement).rowcount:
+        return False
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert_statement)
+        return True
+    except IntegrityError:
+        db.session.execute(update_statement)
+        return False
@@ -0,0 +1,144 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, update, delete, func, literal
+from . import db
+from .models import PlantResource, InsectResource, ResourceStats, FieldValueCount
+from .signals import resource_changed, update_or_insert
+
+# 统计快照中的不同取值个数：统计项 -> 字段
+STATS_FIELDS = {
+    PlantResource: {
+        'families': 'family',
+        'countries': 'country',
+        'provinces': 'state_province',
+        'genera': 'genus',
+    },
+    InsectResource: {
+        'families': 'family_name',
+        'countries': 'country',
+        'provinces': 'province',
+        'genera': 'genus_name',
+    },
+}
+
+# 全量重算的间隔（秒），用于修正增量维护可能累积的偏差；
+# 重算不在请求中执行，由启动预热和 flask dbbio recompute-stats（可由 cron 定期执行）完成
+RECOMPUTE_INTERVAL = 3600
+
+
+def recompute(model):
+    """全量重算模型的统计快照及各取值的记录数"""
+    resource = model.__tablename__
+    db.session.execute(delete(FieldValueCount).where(FieldValueCount.resource == resource))
+
+    values = {}
+    for name, field in STATS_FIELDS[model].items():
+        column = getattr(model, field)
+        db.session.execute(insert(FieldValueCount).from_select(
+            ['resource', 'field', 'value', 'count'],
+            select(literal(resource), literal(field), column, func.count())
+            .where(column.isnot(None), column != '')
+            .group_by(column)
+        ))
+        values[name] = db.session.execute(
+            select(func.count()).select_from(FieldValueCount)
+            .where(FieldValueCount.resource == resource, FieldValueCount.field == field)
+        ).scalar()
+    values['total'] = db.session.execute(select(func.count(model.id))).scalar()
+
+    now = datetime.utcnow()
+    stats = db.session.get(ResourceStats, resource) or ResourceStats(resource=resource)
+    for name, value in values.items():
+        setattr(stats, name, value)
+    stats.recomputed_at = stats.updated_at = now
+    db.session.add(stats)
+    db.session.commit()
+    return stats
+
+
+def _adjust(resource, field, value, delta):
+    """调整某个取值的记录数，返回不同取值个数的变化"""
+    if value is None or value == '':
+        return 0
+    key = (FieldValueCount.resource == resource,
+           FieldValueCount.field == field,
+           FieldValueCount.value == value)
+
+    statement = update(FieldValueCount).where(*key).values(count=FieldValueCount.count + delta)
+    if delta > 0:
+        return int(update_or_insert(statement, insert(FieldValueCount).values(
+            resource=resource, field=field, value=value, count=delta)))
+    db.session.execute(statement)
+    return -db.session.execute(
+        delete(FieldValueCount).where(*key, FieldValueCount.count <= 0)
+    ).rowcount
+
+
+def apply_change(model, old=(), new=()):
+    """按变化前后的记录快照增量更新统计快照"""
+    resource = model.__tablename__
+    values = {}
+    for name, field in STATS_FIELDS[model].items():
+        # 先合并同一取值的增减，更新时未改动的字段不产生写操作
+        deltas = Counter(record.get(field) for record in new)
+        deltas.subtract(record.get(field) for record in old)
+        change = sum(_adjust(resource, field, value, delta)
+                     for value, delta in deltas.items() if delta)
+        if change:
+            values[name] = getattr(ResourceStats, name) + change
+    if len(new) != len(old):
+        values['total'] = ResourceStats.total + (len(new) - len(old))
+    values['updated_at'] = datetime.utcnow()
+
+    result = db.session.execute(
+        update(ResourceStats).where(ResourceStats.resource == resource).values(**values)
+    )
+    if result.rowcount == 0:
+        # 还没有快照时直接全量计算
+        db.session.rollback()
+        recompute(model)
+        return
+    db.session.commit()
+
+
+def _claim_recompute(resource, previous):
+    """标记开始重算，多个进程同时发现快照过期时只有一个进程执行重算"""
+    result = db.session.execute(
+        update(ResourceStats)
+        .where(ResourceStats.resource == resource, ResourceStats.recomputed_at == previous)
+        .values(recomputed_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def get_stats(model):
+    """读取模型的统计快照（按主键读取一行），还没有快照时全量计算"""
+    stats = db.session.get(ResourceStats, model.__tablename__)
+    if stats is None:
+        return recompute(model)
+    return stats
+
+
+def refresh_stats(model):
+    """距上次全量重算超过 STATS_RECOMPUTE_INTERVAL 秒时重算，返回统计快照"""
+    resource = model.__tablename__
+    stats = get_stats(model)
+    interval = current_app.config.get('STATS_RECOMPUTE_INTERVAL', RECOMPUTE_INTERVAL)
+    if interval and (stats.recomputed_at is None or
+                     stats.recomputed_at < datetime.utcnow() - timedelta(seconds=interval)):
+        if _claim_recompute(resource, stats.recomputed_at):
+            return recompute(model)
+    return stats
+
+
+@resource_changed.connect
+def _on_change(sender, action, old, new):
+    """写操作后增量维护统计快照，批量导入后全量重算"""
+    if sender not in STATS_FIELDS:
+        return
+    if action == 'reload':
+        recompute(sender)
+    else:
+        apply_change(sender, old, new)
@@ -0,0 +1,171 @@
+from sqlalchemy import select, insert, update, delete, func
+from . import db
+from .models import PlantResource, InsectResource, TaxonNode
+from .signals import resource_changed, update_or_insert
+
+# 各资源从上到下的分类阶元：(阶元, 名称字段, 别名字段)，别名如中文名，没有时为 None
+TAXON_RANKS = {
+    PlantResource: [
+        ('kingdom', 'kingdom', 'chinese_kingdom_name'),
+        ('family', 'family', 'chinese_family_name'),
+        ('genus', 'genus', 'chinese_genus_name'),
+        ('species', 'scientific_name', 'vernacular_name'),
+    ],
+    InsectResource: [
+        ('phylum', 'phylum', 'phylum_name'),
+        ('class', 'class_', 'class_name'),
+        ('order', 'order', 'order_name'),
+        ('family', 'family_name', 'chinese_family_name'),
+        ('genus', 'genus_name', None),
+        ('species', 'species_name', 'chinese_name'),
+    ],
+}
+
+# 节点路径中各级名称的分隔符
+SEPARATOR = '|'
+
+
+def lineage(model, record):
+    """记录从上到下各级的 (名称, 别名)，到第一个为空的阶元为止"""
+    nodes = []
+    for _, field, alias_field in TAXON_RANKS[model]:
+        name = record.get(field)
+        if not name:
+            break
+        alias = record.get(alias_field) if alias_field else None
+        nodes.append((str(name).replace(SEPARATOR, ' '), alias or None))
+    return nodes
+
+
+def node_paths(nodes):
+    """各级节点的 (path, parent, depth, name, alias)，第一个为根节点"""
+    yield '', None, 0, '', None
+    path = ''
+    for depth, (name, alias) in enumerate(nodes, 1):
+        parent = path
+        path = f'{parent}{SEPARATOR}{name}' if parent else name
+        yield path, parent, depth, name, alias
+
+
+def rebuild(model):
+    """按分类阶元分组重建模型的整棵分类树
+
+    只对原表做一次 GROUP BY（组数约为物种数），各级节点的记录数在内存中累加
+    """
+    resource = model.__tablename__
+    fields = []
+    for _, field, alias_field in TAXON_RANKS[model]:
+        fields.append(field)
+        if alias_field:
+            fields.append(alias_field)
+    columns = [getattr(model, field) for field in fields]
+
+    nodes = {'': {'resource': resource, 'path': '', 'parent': None, 'depth': 0,
+                  'name': '', 'alias': None, 'count': 0}}
+    for row in db.session.execute(select(*columns, func.count()).group_by(*columns)):
+        record = dict(zip(fields, row))
+        for path, parent, depth, name, alias in node_paths(lineage(model, record)):
+            node = nodes.get(path)
+            if node is None:
+                node = nodes[path] = {'resource': resource, 'path': path, 'parent': parent,
+                                      'depth': depth, 'name': name, 'alias': alias, 'count': 0}
+            elif node['alias'] is None:
+                node['alias'] = alias
+            node['count'] += row[-1]
+
+    db.session.execute(delete(TaxonNode).where(TaxonNode.resource == resource))
+    db.session.execute(insert(TaxonNode), list(nodes.values()))
+    db.session.commit()
+
+
+def apply_change(model, old=(), new=()):
+    """按变化前后的记录快照增量更新各级节点的记录数"""
+    resource = model.__tablename__
+
+    # path -> [记录数增量, parent, depth, name, alias]
+    deltas = {}
+    for records, sign in ((old, -1), (new, 1)):
+        for record in records:
+            for path, parent, depth, name, alias in node_paths(lineage(model, record)):
+                delta = deltas.setdefault(path, [0, parent, depth, name, alias])
+                delta[0] += sign
+                if delta[4] is None:
+                    delta[4] = alias
+
+    for path, (count, parent, depth, name, alias) in deltas.items():
+        if not count:
+            continue
+        key = (TaxonNode.resource == resource, TaxonNode.path == path)
+        values = {'count': TaxonNode.count + count}
+        if alias:
+            values['alias'] = func.coalesce(TaxonNode.alias, alias)
+        statement = update(TaxonNode).where(*key).values(**values)
+        if count > 0:
+            update_or_insert(statement, insert(TaxonNode).values(
+                resource=resource, path=path, parent=parent, depth=depth,
+                name=name, alias=alias, count=count))
+        else:
+            db.session.execute(statement)
+            if path:
+                # 根节点始终保留，作为分类树已构建的标志
+                db.session.execute(delete(TaxonNode).where(*key, TaxonNode.count <= 0))
+    db.session.commit()
+
+
+def ensure_built(model):
+    """还没有分类树（如刚升级的数据库）时全量构建"""
+    if db.session.get(TaxonNode, (model.__tablename__, '')) is None:
+        rebuild(model)
+
+
+def node_dict(model, node):
+    ranks = TAXON_RANKS[model]
+    return {
+        'path': node.path,
+        'name': node.name,
+        'alias': node.alias,
+        'rank': ranks[node.depth - 1][0] if node.depth else None,
+        'depth': node.depth,
+        'count': node.count,
+        'leaf': node.depth >= len(ranks),
+    }
+
+
+def get_node(model, path=''):
+    """读取节点、祖先节点和子节点，节点不存在时返回 None
+
+    返回 {node, ancestors, children, unclassified}，unclassified 为下一级阶元为空的记录数
+    """
+    ensure_built(model)
+    resource = model.__tablename__
+    node = db.session.get(TaxonNode, (resource, path))
+    if node is None:
+        return None
+
+    names = path.split(SEPARATOR) if path else []
+    prefixes = [''] + [SEPARATOR.join(names[:depth]) for depth in range(1, len(names))]
+    ancestors = db.session.execute(
+        select(TaxonNode).where(TaxonNode.resource == resource, TaxonNode.path.in_(prefixes))
+        .order_by(TaxonNode.depth)
+    ).scalars().all() if path else []
+    children = db.session.execute(
+        select(TaxonNode).where(TaxonNode.resource == resource, TaxonNode.parent == path)
+        .order_by(TaxonNode.count.desc(), TaxonNode.name)
+    ).scalars().all()
+    return {
+        'node': node_dict(model, node),
+        'ancestors': [node_dict(model, ancestor) for ancestor in ancestors],
+        'children': [node_dict(model, child) for child in children],
+        'unclassified': node.count - sum(child.count for child in children),
+    }
+
+
+@resource_changed.connect
+def _on_change(sender, action, old, new):
+    """写操作后增量更新分类树，批量导入后全量重建"""
+    if sender not in TAXON_RANKS:
+        return
+    if action == 'reload':
+        rebuild(sender)
+    else:
+        apply_change(sender, old, new)
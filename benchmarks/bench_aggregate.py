@@ -0,0 +1,90 @@
+"""分组统计基准：对比 SQL GROUP BY 与列式快照（/api/aggregate 的实现）
+
+对每个资源按科、省份、年份、海拔区间及其组合分组，检查两种方式的结果一致，
+输出各自的耗时。未安装 NumPy 时测量的是纯 Python 的实现。
+
+用法: python benchmarks/bench_aggregate.py [重复次数]
+（使用 DATABASE_URL 指定的数据库）
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import case, extract, func, select  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models import RESOURCE_MODELS  # noqa: E402
+from app.analytics import (CATEGORY_FIELDS, NUMERIC_FIELDS, DEFAULT_BANDS,  # noqa: E402
+                           ColumnarSnapshot, _band_value, np)
+
+SCENARIOS = [
+    ['family'],
+    ['province'],
+    ['year'],
+    ['elevation'],
+    ['family', 'year'],
+    ['province', 'elevation'],
+]
+
+
+def sql_dimension(model, name):
+    """维度对应的 SQL 表达式：空字符串视为空值，数值维度按区间取序号"""
+    if name in CATEGORY_FIELDS[model]:
+        return func.nullif(getattr(model, CATEGORY_FIELDS[model][name]), '')
+    column = getattr(model, NUMERIC_FIELDS[model][name])
+    if name == 'year':
+        return extract('year', column)
+    # SQLAlchemy 为 SQLite 注册的 floor 是 math.floor，不接受空值
+    return case((column.is_(None), None), else_=func.floor(column / DEFAULT_BANDS[name]))
+
+
+def sql_groups(model, group_by):
+    dimensions = [sql_dimension(model, name) for name in group_by]
+    rows = db.session.execute(select(*dimensions, func.count()).group_by(*dimensions)).all()
+    groups = {}
+    for row in rows:
+        key = []
+        for name, value in zip(group_by, row[:-1]):
+            if value is not None and name in NUMERIC_FIELDS[model]:
+                band = DEFAULT_BANDS[name]
+                value = _band_value(int(value) // band if name == 'year' else int(value), band)
+            key.append(value)
+        groups[tuple(key)] = row[-1]
+    return groups
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    app = create_app()
+    failed = False
+    with app.app_context():
+        print(f"NumPy: {'已安装' if np is not None else '未安装'}")
+        for resource, model in RESOURCE_MODELS.items():
+            seconds, snapshot = best_of(1, ColumnarSnapshot.build, model, 0)
+            print(f'{resource}: {snapshot.size} 条记录，构建快照 {seconds * 1000:.1f} ms')
+            for group_by in SCENARIOS:
+                sql_seconds, expected = best_of(repeat, sql_groups, model, group_by)
+                snapshot_seconds, (_, groups) = best_of(repeat, snapshot.aggregate, group_by)
+                status = 'OK'
+                if dict(groups) != expected:
+                    status = '结果不一致'
+                    failed = True
+                print(f"  {','.join(group_by):<20} SQL {sql_seconds * 1000:8.2f} ms  "
+                      f'快照 {snapshot_seconds * 1000:8.2f} ms  {len(expected):6d} 组  {status}')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""CSV 导入基准：对比逐行解析与分块并行解析的吞吐量
+
+将 CSV 文件重复 N 次生成测试文件（保留表头），分别以不同进程数解析并转换全部记录，
+检查结果与逐行解析完全一致；--load 时再导入临时 SQLite 数据库，测量包含写入的吞吐量。
+
+用法: python benchmarks/bench_import.py [--csv plants.csv] [--repeat 40] [--workers 1,2,4] [--load]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.importer import (detect_encoding, read_csv_header, iter_csv_records,  # noqa: E402
+                          plan_chunks)
+from app.models import PlantResource, InsectResource  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_file(source, repeat, directory):
+    """将源文件的数据部分重复 repeat 次写入临时文件"""
+    encoding = detect_encoding(source)
+    with open(source, 'rb') as file:
+        header = file.readline()
+        body = file.read()
+    if not body.endswith(b'\n'):
+        body += b'\n'
+    path = os.path.join(directory, 'bench.csv')
+    with open(path, 'wb') as file:
+        file.write(header)
+        for _ in range(repeat):
+            file.write(body)
+    return path, encoding
+
+
+def guess_model(header):
+    """按表头判断资源类型：昆虫表头为中文"""
+    return InsectResource if '中名' in header else PlantResource
+
+
+def parse_all(model, path, encoding, header, workers):
+    start = time.perf_counter()
+    records = list(iter_csv_records(model, path, encoding, header, workers=workers))
+    return records, time.perf_counter() - start
+
+
+def load_all(model, path, encoding, workers, directory):
+    """导入临时 SQLite 数据库，返回 (导入统计, 秒数)"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, f'bench{workers}.db')}"
+    from app import create_app, db
+    from app.importer import load_csv
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        stats = load_csv(model, path, reject_path=os.devnull, encoding=encoding, workers=workers)
+        return stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', default=os.path.join(ROOT, 'plants.csv'))
+    parser.add_argument('--repeat', type=int, default=40)
+    parser.add_argument('--workers', default=f'1,2,{os.cpu_count() or 1}')
+    parser.add_argument('--load', action='store_true', help='同时测量导入数据库的吞吐量')
+    args = parser.parse_args()
+    worker_counts = sorted({int(value) for value in args.workers.split(',')} | {1})
+
+    directory = tempfile.mkdtemp(prefix='dbbio-bench-')
+    try:
+        path, encoding = make_file(args.csv, args.repeat, directory)
+        header = read_csv_header(path, encoding)
+        model = guess_model(header)
+        size = os.path.getsize(path)
+        print(f'{model.__tablename__}: {size / 1024 / 1024:.1f} MB，'
+              f'{len(plan_chunks(path))} 块，CPU 核数 {os.cpu_count()}')
+
+        baseline = None
+        for workers in worker_counts:
+            records, seconds = parse_all(model, path, encoding, header, workers)
+            # 错误对象在并行模式下为字符串，比较时统一转换
+            result = [(line, record, None if error is None else str(error))
+                      for line, _, record, error in records]
+            if baseline is None:
+                baseline = result
+            elif result != baseline:
+                print(f'{workers} 进程的解析结果与逐行解析不一致')
+                sys.exit(1)
+            print(f'解析 {workers:>2} 进程 {seconds:7.2f} 秒  {len(records) / seconds:10.0f} 行/秒  '
+                  f'{size / seconds / 1024 / 1024:6.1f} MB/秒')
+
+        if args.load:
+            for workers in worker_counts:
+                stats, seconds = load_all(model, path, encoding, workers, directory)
+                print(f'导入 {workers:>2} 进程 {seconds:7.2f} 秒  '
+                      f"{stats['inserted'] / seconds:10.0f} 行/秒  失败 {stats['rejected']} 行")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
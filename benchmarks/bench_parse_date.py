@@ -0,0 +1,116 @@
+"""parse_date 微基准：对比原逐个 strptime 的实现与 DateParser
+
+带时刻的日期（如 2023-11-01 12:17:00）DateParser 去掉时刻后解析，与原实现的结果不同，
+校验时按预期差异处理
+
+用法: python benchmarks/bench_parse_date.py [样本数]
+"""
+import os
+import random
+import re
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import DATE_FORMATS, TIME_SUFFIX, DateParser  # noqa: E402
+
+
+def legacy_parse_date(date_str):
+    """原实现：依次尝试 strptime，失败后提取年份"""
+    if not date_str or str(date_str).strip() == '':
+        return None
+
+    date_str = str(date_str).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+
+    try:
+        year_match = re.search(r'(\d{4})', date_str)
+        if year_match:
+            year = int(year_match.group(1))
+            return datetime(year, 1, 1).date()
+    except (ValueError, IndexError):
+        pass
+
+    return None
+
+
+def expected_parse_date(date_str):
+    """DateParser 的预期结果：末尾带时刻时去掉时刻后按原实现解析，其余与原实现相同"""
+    if date_str:
+        date_str = str(date_str).strip()
+        time_match = TIME_SUFFIX.search(date_str)
+        if time_match and time_match.start() > 0:
+            return expected_parse_date(date_str[:time_match.start()])
+    return legacy_parse_date(date_str)
+
+
+def make_samples(count, seed=42):
+    """生成采集时间样本：以一种格式为主，混合其他格式、重复值和无效值"""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        year, month, day = rng.randint(1950, 2024), rng.randint(1, 12), rng.randint(1, 28)
+        roll = rng.random()
+        if roll < 0.6:
+            samples.append(f'{year}-{month:02d}-{day:02d}')
+        elif roll < 0.7:
+            samples.append(f'{year}年{month}月{day}日')
+        elif roll < 0.8:
+            samples.append(f'{day:02d}/{month:02d}/{year}')
+        elif roll < 0.85:
+            samples.append(f'{year}.{month}')
+        elif roll < 0.9:
+            samples.append(f'约{year}年春')
+        elif roll < 0.95:
+            samples.append('2023-02-30')
+        elif roll < 0.97:
+            samples.append(f'{year}-{month:02d}-{day:02d} {rng.randint(0, 23)}:{rng.randint(0, 59):02d}:00')
+        else:
+            samples.append('')
+    return samples
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    samples = make_samples(count)
+
+    parser = DateParser()
+    mismatches = [s for s in samples if parser(s) != expected_parse_date(s)]
+    if mismatches:
+        print(f'结果不一致: {mismatches[:10]}')
+        sys.exit(1)
+    changed = sorted({s for s in samples if parser(s) != legacy_parse_date(s)})
+    if changed:
+        print(f'带时刻的日期与原实现结果不同（预期）: {len(changed)} 个，如 {changed[0]!r} -> '
+              f'{parser(changed[0])}（原实现 {legacy_parse_date(changed[0])}）')
+
+    def run_legacy():
+        for s in samples:
+            legacy_parse_date(s)
+
+    def run_cold():
+        # 新建解析器，不复用缓存
+        parse = DateParser()
+        for s in samples:
+            parse(s)
+
+    def run_warm():
+        for s in samples:
+            parser(s)
+
+    print(f'样本数: {count}，不同取值: {len(set(samples))}')
+    for name, func in [('strptime 逐个尝试', run_legacy),
+                       ('DateParser（冷缓存）', run_cold),
+                       ('DateParser（热缓存）', run_warm)]:
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print(f'{name:<20} {seconds * 1000:8.1f} ms  {count / seconds:12.0f} 次/秒')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""JSON 序列化基准：对比 ORM 实例 + to_dict() 与 Core 行 + RowEncoder
+
+对每个资源按主键分块读取全部记录并编码为 JSON 数组（与 /api/plants 流式输出相同），
+检查两种方式输出的文本完全一致，输出各自的 行/秒。可用 --fields 只输出部分字段。
+
+用法: python benchmarks/bench_serialize.py [--repeat 3] [--fields scientificName,family]
+（使用 DATABASE_URL 指定的数据库）
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import PlantResource, InsectResource  # noqa: E402
+from app.pagination import iter_keyset, stream_json_array, dumps  # noqa: E402
+from app.serialize import RowEncoder  # noqa: E402
+
+
+def orm_json(model, fields):
+    """原实现：加载 ORM 实例，to_dict() 后逐条 dumps"""
+    query = model.query.options(model.load_options(fields))
+    return ''.join(stream_json_array(iter_keyset(query, model),
+                                     lambda item: dumps(item.to_dict(fields))))
+
+
+def row_json(model, fields):
+    """Core 行元组经 RowEncoder 直接编码"""
+    encoder = RowEncoder(model, fields)
+    query = model.query.with_entities(*encoder.columns)
+    return ''.join(stream_json_array(iter_keyset(query, model), encoder.encode))
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--fields', default='', help='逗号分隔的接口字段名（默认全部）')
+    args = parser.parse_args()
+
+    app = create_app()
+    failed = False
+    with app.test_request_context():
+        for model in (PlantResource, InsectResource):
+            try:
+                fields = model.parse_fields(args.fields)
+            except ValueError as e:
+                print(f'{model.__tablename__}: 跳过（{e}）')
+                continue
+            count = model.query.count()
+            if not count:
+                continue
+            orm_seconds, expected = best_of(args.repeat, orm_json, model, fields)
+            row_seconds, result = best_of(args.repeat, row_json, model, fields)
+            status = 'OK'
+            if result != expected:
+                status = '输出不一致'
+                failed = True
+            print(f'{model.__tablename__}: {count} 条，{len(expected) / 1024 / 1024:.1f} MB  {status}')
+            print(f'  ORM + to_dict   {orm_seconds:7.2f} 秒  {count / orm_seconds:10.0f} 行/秒')
+            print(f'  Core + 编码器    {row_seconds:7.2f} 秒  {count / row_seconds:10.0f} 行/秒  '
+                  f'({orm_seconds / row_seconds:.1f} 倍)')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""列表页筛选查询的执行计划检查
+
+依次请求 /plants、/insects 的各种筛选组合及地理范围查询，记录实际执行的 SQL，
+对查询资源表的语句执行 EXPLAIN。发现全表扫描时以状态码 1 退出。
+
+用法: python benchmarks/explain_filters.py
+（使用 DATABASE_URL 指定的数据库，SQLite 或 MySQL）
+"""
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models import PlantResource, InsectResource  # noqa: E402
+
+TABLES = (PlantResource.__tablename__, InsectResource.__tablename__)
+
+
+def first_value(column, default):
+    """取字段的一个实际取值作为筛选条件，空表时使用默认值"""
+    value = db.session.query(column).filter(column.isnot(None), column != '').limit(1).scalar()
+    return value or default
+
+
+def scenarios():
+    """列表页的筛选组合"""
+    family = first_value(PlantResource.family, 'Rosaceae')
+    country = first_value(PlantResource.country, '中国')
+    insect_family = first_value(InsectResource.family_name, '蜜蜂科')
+    province = first_value(InsectResource.province, '湖北省')
+    dates = {'collection_date_start': '2000-01-01', 'collection_date_end': '2020-12-31'}
+    latitude = first_value(InsectResource.latitude, 30.5)
+    longitude = first_value(InsectResource.longitude, 114.3)
+    bbox = f'{longitude - 0.2},{latitude - 0.2},{longitude + 0.2},{latitude + 0.2}'
+    near = {'lat': latitude, 'lon': longitude, 'radius': 20000}
+
+    return [
+        ('/plants', {'family': family}),
+        ('/plants', {'country': country}),
+        ('/plants', {'family': family, 'country': country}),
+        ('/insects', {'family': insect_family}),
+        ('/insects', {'province': province}),
+        ('/insects', {'family': insect_family, 'province': province}),
+        ('/insects', dates),
+        ('/insects', dict(dates, province=province)),
+        ('/insects', dict(dates, family=insect_family, province=province)),
+        # 深度翻页（游标）
+        ('/plants', {'family': family, 'after': 1}),
+        ('/insects', {'province': province, 'after': 1}),
+        ('/insects', {'province': province, 'before': 1000000}),
+        # 地理范围查询
+        ('/api/plants/within', {'bbox': bbox}),
+        ('/api/insects/within', {'bbox': bbox, 'cursor': 1}),
+        ('/api/insects/within', near),
+    ]
+
+
+def capture_selects(client, url, params):
+    """请求页面并记录执行的 SELECT 语句"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url, query_string=params)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return response.status_code, statements
+
+
+def full_scans(statement, parameters):
+    """执行 EXPLAIN，返回其中对资源表的全表扫描"""
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as conn:
+        if dialect == 'sqlite':
+            rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+            pattern = re.compile(r'SCAN ({})\b'.format('|'.join(TABLES)))
+            return [row[-1] for row in rows
+                    if pattern.match(row[-1]) and 'INDEX' not in row[-1]]
+        if dialect == 'mysql':
+            rows = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings().all()
+            return [f"{row['table']}: type=ALL" for row in rows
+                    if row['table'] in TABLES and row['type'] == 'ALL']
+    raise SystemExit(f'不支持的数据库: {dialect}')
+
+
+def main():
+    app = create_app()
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        for url, params in scenarios():
+            # 第一次请求预热筛选项缓存，只检查第二次请求的查询
+            client.get(url, query_string=params)
+            status, statements = capture_selects(client, url, params)
+
+            label = f"{url}?{'&'.join(f'{k}={v}' for k, v in params.items())}"
+            scans = [scan for statement, parameters in statements
+                     if any(table in statement for table in TABLES)
+                     for scan in full_scans(statement, parameters)]
+            if status != 200 or scans:
+                failures += 1
+                print(f'✗ {label} (HTTP {status})')
+                for scan in scans:
+                    print(f'    全表扫描: {scan}')
+            else:
+                print(f'✓ {label} ({len(statements)} 条查询)')
+
+    if failures:
+        print(f'{failures} 个筛选组合存在全表扫描')
+        sys.exit(1)
+    print('所有筛选组合均使用索引')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,426 @@
+"""合成数据生成器：生成与 plants.csv、昆虫 CSV 格式相同的任意规模测试数据
+
+植物的分类组合、生境、生活型、采集人等取值取自 plants.csv 的实际数据，各科的记录数
+按排名服从 Zipf 分布（少数大科占多数记录），约 15% 的记录未鉴定到科；昆虫使用常见目、科
+和生成的属名。省份按 Zipf 分布（湖北省最多），经纬度在省会附近随机分布；采集日期集中在
+近二三十年，按月份呈季节分布。相同的 --seed 生成完全相同的文件。
+
+用法: python benchmarks/generate_data.py --rows 100k [--resource all] [--out-dir .] [--seed 42]
+（--rows 可写作 100000、100k、1M、10M，输出 plants-100k.csv、insects-100k.csv）
+"""
+import argparse
+import csv
+import datetime
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import InsectResource, import_columns  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 每次生成的行数（各字段按块批量抽样）
+CHUNK_SIZE = 10000
+
+# (省份, 省代码, 省会, 纬度, 经度)，按记录数从多到少排列
+PROVINCES = [
+    ('湖北省', '420000', '武汉市', 30.59, 114.31),
+    ('云南省', '530000', '昆明市', 25.04, 102.71),
+    ('四川省', '510000', '成都市', 30.57, 104.07),
+    ('湖南省', '430000', '长沙市', 28.23, 112.94),
+    ('广西壮族自治区', '450000', '南宁市', 22.82, 108.37),
+    ('贵州省', '520000', '贵阳市', 26.65, 106.63),
+    ('广东省', '440000', '广州市', 23.13, 113.26),
+    ('江西省', '360000', '南昌市', 28.68, 115.86),
+    ('安徽省', '340000', '合肥市', 31.82, 117.23),
+    ('浙江省', '330000', '杭州市', 30.27, 120.16),
+    ('福建省', '350000', '福州市', 26.07, 119.30),
+    ('陕西省', '610000', '西安市', 34.34, 108.94),
+    ('河南省', '410000', '郑州市', 34.75, 113.63),
+    ('西藏自治区', '540000', '拉萨市', 29.65, 91.14),
+    ('重庆市', '500000', '重庆市', 29.56, 106.55),
+    ('海南省', '460000', '海口市', 20.04, 110.20),
+    ('甘肃省', '620000', '兰州市', 36.06, 103.83),
+    ('江苏省', '320000', '南京市', 32.06, 118.80),
+    ('山东省', '370000', '济南市', 36.65, 117.12),
+    ('河北省', '130000', '石家庄市', 38.04, 114.51),
+    ('山西省', '140000', '太原市', 37.87, 112.55),
+    ('吉林省', '220000', '长春市', 43.82, 125.32),
+    ('黑龙江省', '230000', '哈尔滨市', 45.80, 126.53),
+    ('辽宁省', '210000', '沈阳市', 41.80, 123.43),
+    ('内蒙古自治区', '150000', '呼和浩特市', 40.84, 111.75),
+    ('新疆维吾尔自治区', '650000', '乌鲁木齐市', 43.83, 87.62),
+    ('青海省', '630000', '西宁市', 36.62, 101.78),
+    ('宁夏回族自治区', '640000', '银川市', 38.49, 106.23),
+    ('北京市', '110000', '北京市', 39.90, 116.41),
+    ('上海市', '310000', '上海市', 31.23, 121.47),
+    ('天津市', '120000', '天津市', 39.13, 117.20),
+    ('台湾省', '710000', '台北市', 25.03, 121.57),
+]
+
+# 少量国外记录：(国家, 省/州, 城市, 纬度, 经度)
+FOREIGN = [
+    ('越南', 'Lào Cai', 'Sa Pa', 22.34, 103.84),
+    ('老挝', 'Luang Namtha', 'Luang Namtha', 20.95, 101.40),
+    ('缅甸', 'Kachin', 'Myitkyina', 25.38, 97.40),
+    ('Egypt', 'Ad Daqahlîyah', 'Mansoura', 31.04, 31.38),
+]
+
+# 各月采集记录的相对数量（生长季最多）
+MONTH_WEIGHTS = [1, 1, 3, 6, 9, 10, 10, 9, 7, 4, 2, 1]
+
+# 昆虫的目：(目, 目名称, [(科, 中文科名), ...])
+INSECT_ORDERS = [
+    ('Coleoptera', '鞘翅目', [
+        ('Carabidae', '步甲科'), ('Scarabaeidae', '金龟科'), ('Cerambycidae', '天牛科'),
+        ('Chrysomelidae', '叶甲科'), ('Curculionidae', '象甲科'), ('Coccinellidae', '瓢虫科'),
+        ('Staphylinidae', '隐翅虫科'), ('Tenebrionidae', '拟步甲科')]),
+    ('Lepidoptera', '鳞翅目', [
+        ('Noctuidae', '夜蛾科'), ('Geometridae', '尺蛾科'), ('Nymphalidae', '蛱蝶科'),
+        ('Crambidae', '草螟科'), ('Sphingidae', '天蛾科'), ('Papilionidae', '凤蝶科'),
+        ('Pieridae', '粉蝶科'), ('Erebidae', '目夜蛾科')]),
+    ('Hymenoptera', '膜翅目', [
+        ('Formicidae', '蚁科'), ('Apidae', '蜜蜂科'), ('Vespidae', '胡蜂科'),
+        ('Ichneumonidae', '姬蜂科'), ('Braconidae', '茧蜂科')]),
+    ('Diptera', '双翅目', [
+        ('Syrphidae', '食蚜蝇科'), ('Tachinidae', '寄蝇科'), ('Culicidae', '蚊科'),
+        ('Muscidae', '蝇科'), ('Tipulidae', '大蚊科')]),
+    ('Hemiptera', '半翅目', [
+        ('Cicadidae', '蝉科'), ('Pentatomidae', '蝽科'), ('Aphididae', '蚜科'),
+        ('Cicadellidae', '叶蝉科'), ('Miridae', '盲蝽科')]),
+    ('Orthoptera', '直翅目', [
+        ('Acrididae', '蝗科'), ('Tettigoniidae', '螽斯科'), ('Gryllidae', '蟋蟀科')]),
+    ('Odonata', '蜻蜓目', [('Libellulidae', '蜻科'), ('Coenagrionidae', '蟌科')]),
+    ('Mantodea', '螳螂目', [('Mantidae', '螳科')]),
+]
+
+GENUS_SYLLABLES = ['Pro', 'Eu', 'Neo', 'Para', 'Chry', 'Cal', 'Lep', 'Pha', 'Ther', 'Xan',
+                   'Sym', 'Ana', 'Meta', 'Oro', 'Lyc', 'Dor', 'Hyp', 'Ste', 'Cor', 'Tri']
+GENUS_SUFFIXES = ['ocera', 'ops', 'omyia', 'us', 'ella', 'odes', 'ina', 'opsis', 'ides', 'ia']
+EPITHETS = [('sinensis', '中华'), ('chinensis', '中国'), ('japonicus', '日本'),
+            ('maculatus', '斑'), ('nigra', '黑'), ('rufus', '红'), ('flavus', '黄'),
+            ('major', '大'), ('minor', '小'), ('yunnanensis', '云南'), ('hubeiensis', '湖北'),
+            ('formosanus', '台湾'), ('bimaculatus', '双斑'), ('striatus', '条纹'),
+            ('montanus', '山地'), ('orientalis', '东方'), ('davidi', '大卫'), ('elegans', '丽')]
+
+INSECT_HABITATS = ['林缘', '灌丛', '草地', '农田', '溪边', '阔叶林', '针叶林', '竹林',
+                   '果园', '灯下', '湿地', '路边']
+HOST_PLANTS = ['水稻', '玉米', '柑橘', '松', '栎', '杨', '柳', '桑', '茶', '竹', '油菜', '苹果']
+INSECT_COLLECTORS = ['张伟', '王芳', '李娜', '刘洋', '陈杰', '杨磊', '赵静', '黄强']
+INSTITUTIONS = [('中国科学院动物研究所', 'IZCAS'), ('华中农业大学', 'HZAU'),
+                ('西北农林科技大学', 'NWAFU'), ('中山大学', 'SYSU')]
+
+
+def parse_rows(value):
+    """100000 / 100k / 1M / 10M -> 行数"""
+    text = str(value).strip().lower()
+    scale = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    if scale > 1:
+        text = text[:-1]
+    try:
+        rows = int(float(text) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'无效的行数: {value}')
+    if rows < 1:
+        raise argparse.ArgumentTypeError(f'行数需大于 0: {value}')
+    return rows
+
+
+def format_rows(rows):
+    """行数 -> 文件名中的规模（100k、1M、10M）"""
+    for suffix, scale in (('M', 1000000), ('k', 1000)):
+        if rows >= scale and rows % scale == 0:
+            return f'{rows // scale}{suffix}'
+    return str(rows)
+
+
+def zipf_weights(count, exponent=1.0):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+class Sampler:
+    """按权重批量抽样（预先计算累计权重）"""
+
+    def __init__(self, rng, values, weights=None):
+        self.rng = rng
+        self.values = list(values)
+        self.cum_weights = list(accumulate(weights)) if weights is not None else None
+
+    def take(self, count):
+        if self.cum_weights is None:
+            return [self.values[index] for index in
+                    (int(self.rng.random() * len(self.values)) for _ in range(count))]
+        return self.rng.choices(self.values, cum_weights=self.cum_weights, k=count)
+
+
+def empirical(rng, values):
+    """按实际出现次数抽样"""
+    counts = Counter(values)
+    return Sampler(rng, counts.keys(), counts.values())
+
+
+class Places:
+    """省份和经纬度：国内省份按 Zipf 分布，约 1% 为国外记录"""
+
+    def __init__(self, rng, foreign_share=0.01):
+        self.rng = rng
+        places = [('中国',) + province for province in PROVINCES]
+        weights = [weight * (1 - foreign_share) / sum(zipf_weights(len(PROVINCES)))
+                   for weight in zipf_weights(len(PROVINCES))]
+        places += [(country, province, '', city, latitude, longitude)
+                   for country, province, city, latitude, longitude in FOREIGN]
+        weights += [foreign_share / len(FOREIGN)] * len(FOREIGN)
+        self.sampler = Sampler(rng, places, weights)
+
+    def take(self, count):
+        """[(国家, 省份, 省代码, 城市, 纬度, 经度), ...]，约 3% 没有经纬度"""
+        gauss = self.rng.gauss
+        random_value = self.rng.random
+        result = []
+        for country, province, code, city, latitude, longitude in self.sampler.take(count):
+            if random_value() < 0.03:
+                result.append((country, province, code, city, '', ''))
+            else:
+                result.append((country, province, code, city,
+                               f'{latitude + gauss(0, 1.2):.6f}', f'{longitude + gauss(0, 1.5):.6f}'))
+        return result
+
+
+class Dates:
+    """采集日期：1950 年起逐年增多（约 15 年翻 e 倍），按月份呈季节分布"""
+
+    def __init__(self, rng, first_year=1950, last_year=2024):
+        self.rng = rng
+        years = range(first_year, last_year + 1)
+        self.years = Sampler(rng, years, [math.exp((year - first_year) / 15) for year in years])
+        self.months = Sampler(rng, range(1, 13), MONTH_WEIGHTS)
+
+    def take(self, count):
+        randint = self.rng.randint
+        return [datetime.datetime(year, month, randint(1, 28), randint(7, 18), randint(0, 59))
+                for year, month in zip(self.years.take(count), self.months.take(count))]
+
+
+def elevations(rng, count):
+    """海拔（米）：对数正态分布，约 5% 为空"""
+    return ['' if rng.random() < 0.05 else str(min(int(rng.lognormvariate(6, 0.9)), 5500))
+            for _ in range(count)]
+
+
+def plant_rows(rng, rows, source):
+    """按 plants.csv 的取值分布生成植物记录"""
+    with open(source, encoding='utf-8-sig', newline='') as file:
+        sample = list(csv.DictReader(file))
+    header = list(sample[0].keys())
+
+    taxon_keys = ['classification', 'kingdom', 'chineseKingdomName', 'family', 'chineseFamilyName',
+                  'genus', 'chineseGenusName', 'scientificName', 'vernacularName']
+    by_family = defaultdict(Counter)
+    unidentified = Counter()
+    for record in sample:
+        taxon = tuple(record[key] for key in taxon_keys)
+        if record['family']:
+            by_family[record['family']][taxon] += 1
+        else:
+            unidentified[taxon] += 1
+    # 各科按实际记录数排名，记录数服从 Zipf 分布；科内各种按实际次数抽样
+    families = sorted(by_family, key=lambda family: (-sum(by_family[family].values()), family))
+    family_sampler = Sampler(rng, families, zipf_weights(len(families)))
+    species = {family: Sampler(rng, by_family[family].keys(), by_family[family].values())
+               for family in families}
+    unidentified_sampler = Sampler(rng, unidentified.keys(), unidentified.values())
+
+    habitats = empirical(rng, [record['habitat'] for record in sample])
+    habits = empirical(rng, [record['habit'] for record in sample])
+    collectors = empirical(rng, [(record['recordedBy'], record['identifiedBy']) for record in sample])
+    localities = empirical(rng, [record['locality'] for record in sample])
+    places = Places(rng)
+    dates = Dates(rng)
+
+    number = 0
+    while number < rows:
+        count = min(CHUNK_SIZE, rows - number)
+        family_column = family_sampler.take(count)
+        for (family, habitat, habit, (recorded_by, identified_by), locality, place, date,
+             elevation) in zip(family_column, habitats.take(count), habits.take(count),
+                               collectors.take(count), localities.take(count), places.take(count),
+                               dates.take(count), elevations(rng, count)):
+            number += 1
+            if rng.random() < 0.15:
+                taxon = unidentified_sampler.take(1)[0]
+                identified_by = ''
+            else:
+                taxon = species[family].take(1)[0]
+            country, province, _, city, latitude, longitude = place
+            record = dict(zip(taxon_keys, taxon))
+            record.update({
+                'recordedBy': recorded_by,
+                'recordNumber': f'SYN{number:08d}',
+                'eventDate': '' if rng.random() < 0.02 else date.strftime('%Y-%m-%d %H:%M:%S'),
+                'country': country,
+                'stateProvince': province,
+                'city': city,
+                'county': city,
+                'locality': locality,
+                'decimalLatitude': latitude,
+                'decimalLongitude': longitude,
+                'minimumElevationInMeters': elevation,
+                'habitat': habitat,
+                'habit': habit,
+                'identificationID': str(number) if identified_by else '',
+                'identifiedBy': identified_by,
+            })
+            yield header if number == 1 else None, [record.get(key, '') for key in header]
+
+
+def insect_taxa(rng):
+    """[(目, 目名称, 科, 中文科名, 属, 种本名, 中名), ...] 及各自的权重
+
+    每科生成若干属（大科的属更多），每属 1～6 种；各科的记录数按 Zipf 分布
+    """
+    taxa = []
+    weights = []
+    families = [(order, order_name, family, family_name)
+                for order, order_name, order_families in INSECT_ORDERS
+                for family, family_name in order_families]
+    rng.shuffle(families)
+    for rank, (order, order_name, family, family_name) in enumerate(families, 1):
+        family_weight = 1 / rank
+        genera = max(2, 40 // rank)
+        family_taxa = []
+        for index in range(genera):
+            genus = rng.choice(GENUS_SYLLABLES) + rng.choice(GENUS_SUFFIXES)
+            if index:
+                genus = f'{genus}{chr(ord("a") + index % 26)}'
+            for epithet, prefix in rng.sample(EPITHETS, rng.randint(1, 6)):
+                family_taxa.append((order, order_name, family, family_name, genus, epithet,
+                                    f'{prefix}{family_name[:-1]}'))
+        for item in family_taxa:
+            taxa.append(item)
+            weights.append(family_weight / len(family_taxa))
+    return taxa, weights
+
+
+def insect_rows(rng, rows):
+    """按常见目、科生成昆虫记录，表头为各列的中文说明（与导入格式相同）"""
+    columns = import_columns(InsectResource)
+    comments = {column.key: column.comment for column in InsectResource.__table__.columns}
+    header = [comments[name] for name in columns]
+
+    taxa, weights = insect_taxa(rng)
+    taxon_sampler = Sampler(rng, taxa, weights)
+    habitats = Sampler(rng, INSECT_HABITATS, zipf_weights(len(INSECT_HABITATS), 0.7))
+    hosts = Sampler(rng, HOST_PLANTS)
+    collectors = Sampler(rng, INSECT_COLLECTORS, zipf_weights(len(INSECT_COLLECTORS)))
+    institutions = Sampler(rng, INSTITUTIONS, zipf_weights(len(INSTITUTIONS)))
+    places = Places(rng)
+    dates = Dates(rng)
+
+    number = 0
+    while number < rows:
+        count = min(CHUNK_SIZE, rows - number)
+        for (taxon, habitat, host, collector, institution, place, date,
+             elevation) in zip(taxon_sampler.take(count), habitats.take(count), hosts.take(count),
+                               collectors.take(count), institutions.take(count),
+                               places.take(count), dates.take(count), elevations(rng, count)):
+            number += 1
+            order, order_name, family, family_name, genus, epithet, chinese_name = taxon
+            country, province, province_code, city, latitude, longitude = place
+            identified = rng.random() >= 0.1
+            sequenced = rng.random() < 0.1
+            record = {
+                'serial_number': str(number),
+                'sequencing_status': '已测序' if sequenced else '未测序',
+                'original_id': f'INS{number:08d}',
+                'chinese_name': chinese_name if identified else '',
+                'phylum': 'Arthropoda',
+                'phylum_name': '节肢动物门',
+                'class_': 'Insecta',
+                'class_name': '昆虫纲',
+                'order': order,
+                'order_name': order_name,
+                'chinese_family_name': family_name,
+                'family_name': family,
+                'genus_name': genus if identified else '',
+                'species_name': epithet if identified else '',
+                'resource_code': f'{institution[1]}-{number:08d}',
+                'country': country,
+                'province': province,
+                'province_code': province_code,
+                'county': city,
+                'locality': f'{city}郊外',
+                'longitude': longitude,
+                'latitude': latitude,
+                'altitude': elevation,
+                'habitat': habitat,
+                'host': host if rng.random() < 0.3 else '',
+                'preservation_institution': institution[0],
+                'institution_code': institution[1],
+                'collector': collector,
+                'collection_date': '' if rng.random() < 0.02 else date.strftime('%Y-%m-%d'),
+                'collection_number': f'C{number:08d}',
+                'specimen_number': f'{institution[1]}{number:08d}',
+                'identifier': collector if identified else '',
+                'identification_date': ((date + datetime.timedelta(days=rng.randint(7, 400)))
+                                        .strftime('%Y-%m-%d') if identified else ''),
+                'specimen_attribute': '馆藏标本',
+                'preservation_method': '针插' if order != 'Odonata' else '浸制',
+                'physical_state': '完好',
+                'sharing_method': '公益共享',
+                'access_method': '实物借阅',
+                'sequencing_date': date.strftime('%Y-%m-%d') if sequenced else '',
+            }
+            yield header if number == 1 else None, [record.get(name, '') for name in columns]
+
+
+def generate(resource, rows, path, seed=42, source=None):
+    """生成 resource（plants / insects）的 CSV 文件（UTF-8 带 BOM，与 plants.csv 相同），返回行数"""
+    rng = random.Random(f'{seed}:{resource}')
+    if resource == 'plants':
+        records = plant_rows(rng, rows, source or os.path.join(ROOT, 'plants.csv'))
+    elif resource == 'insects':
+        records = insect_rows(rng, rows)
+    else:
+        raise ValueError(f'未知资源: {resource}')
+
+    with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+        writer = csv.writer(file)
+        for header, values in records:
+            if header is not None:
+                writer.writerow(header)
+            writer.writerow(values)
+    return rows
+
+
+def output_path(directory, resource, rows, seed=42):
+    suffix = '' if seed == 42 else f'-s{seed}'
+    return os.path.join(directory, f'{resource}-{format_rows(rows)}{suffix}.csv')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=parse_rows, required=True, help='每个资源的行数（如 100k、1M、10M）')
+    parser.add_argument('--resource', choices=('all', 'plants', 'insects'), default='all')
+    parser.add_argument('--out-dir', default='.')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    resources = ('plants', 'insects') if args.resource == 'all' else (args.resource,)
+    for resource in resources:
+        path = output_path(args.out_dir, resource, args.rows, args.seed)
+        start = time.perf_counter()
+        generate(resource, args.rows, path, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f'{path}: {args.rows} 行，{os.path.getsize(path) / 1024 / 1024:.1f} MB，'
+              f'{elapsed:.1f} 秒')
+
+
+if __name__ == '__main__':
+    main()
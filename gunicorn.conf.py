@@ -0,0 +1,25 @@
+# gunicorn 配置（gunicorn -c gunicorn.conf.py）
+#
+# preload_app：应用只在主进程中创建并预热一次，工作进程直接 fork，
+# 启动时不再重复导入模块和创建应用，已加载的模块和快照以写时复制共享。
+import os
+
+wsgi_app = 'app:create_app()'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+preload_app = True
+
+
+def when_ready(server):
+    """主进程加载应用后、fork 工作进程前预热"""
+    from app.commands import warm_up
+    warm_up(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    """工作进程丢弃从主进程继承的连接池（不关闭连接，主进程仍持有）和运行指标"""
+    from app import db
+    from app.metrics import metrics
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
+    metrics.reset()
@@ -0,0 +1,45 @@
+"""add image derivatives
+
+新增图像派生图表 image_derivatives：记录昆虫图像原图对应的缩略图、预览图路径和尺寸，
+派生图按内容命名写入 static/derived/，由 nginx 按不可变资源缓存。
+
+已有图像的派生图在下次批量导入后生成，或在 flask shell 中执行 image_store.build_all()。
+这里只建表（init_db 的 db.create_all() 可能已经建好）。
+
+Revision ID: 5b1d7e6c2a90
+Revises: cf5fd2a0cf4f
+Create Date: 2026-10-18 17:32:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1d7e6c2a90'
+down_revision = 'cf5fd2a0cf4f'
+branch_labels = None
+depends_on = None
+
+
+def has_table(table_name):
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade():
+    if not has_table('image_derivatives'):
+        op.create_table(
+            'image_derivatives',
+            sa.Column('source', sa.String(length=500), nullable=False),
+            sa.Column('variant', sa.String(length=20), nullable=False),
+            sa.Column('path', sa.String(length=100), nullable=False),
+            sa.Column('width', sa.Integer(), nullable=False),
+            sa.Column('height', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('source', 'variant'),
+        )
+
+
+def downgrade():
+    if has_table('image_derivatives'):
+        op.drop_table('image_derivatives')
@@ -0,0 +1,53 @@
+"""add filter indexes
+
+为列表页的筛选条件组合添加索引：
+植物按 科 / 国家 / 科+国家 筛选，昆虫按 科 / 省份 等值筛选后再按采集时间范围筛选。
+
+数据表由 init_db 的 db.create_all() 创建（新建的表已包含这些索引），
+因此这里只为已存在且缺少索引的表补建索引。
+
+Revision ID: 63c20d029fc4
+Revises: 
+Create Date: 2026-10-18 13:58:48.824159
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '63c20d029fc4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('plant_resources', 'ix_plant_family_country', ['family', 'country']),
+    ('plant_resources', 'ix_plant_country', ['country']),
+    ('insect_resources', 'ix_insect_family_province_date', ['family_name', 'province', 'collection_date']),
+    ('insect_resources', 'ix_insect_province_date', ['province', 'collection_date']),
+    ('insect_resources', 'ix_insect_collection_date', ['collection_date']),
+]
+
+
+def existing_indexes(table):
+    """返回表上已有的索引名，表不存在时返回 None"""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    for table, name, columns in INDEXES:
+        existing = existing_indexes(table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        existing = existing_indexes(table)
+        if existing and name in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,111 @@
+"""convert date columns
+
+将昆虫的采集/鉴定/上报/测序时间和植物的 eventDate 由 String(50) 改为 Date，
+使采集时间范围筛选可以走索引范围扫描。
+
+改类型前先用 parse_date 将已有取值按主键分批回填为 YYYY-MM-DD（无法解析的置为 NULL），
+SQLite 与 MySQL 都能直接把这种格式的字符串转换为日期。
+
+Revision ID: 8fd7a0ef8f00
+Revises: 63c20d029fc4
+Create Date: 2026-10-18 14:02:11.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import parse_date
+
+
+# revision identifiers, used by Alembic.
+revision = '8fd7a0ef8f00'
+down_revision = '63c20d029fc4'
+branch_labels = None
+depends_on = None
+
+
+DATE_COLUMNS = {
+    'insect_resources': {
+        'collection_date': '采集时间',
+        'identification_date': '鉴定时间',
+        'report_date': '上报时间',
+        'sequencing_date': '测序时间',
+    },
+    'plant_resources': {
+        'event_date': None,
+    },
+}
+
+# 回填时每批处理的记录数
+BATCH_SIZE = 1000
+
+
+def normalize(value):
+    parsed = parse_date(value)
+    return parsed.isoformat() if parsed else None
+
+
+def backfill(table_name, column_name):
+    """按主键分批把字符串日期规范化为 YYYY-MM-DD"""
+    conn = op.get_bind()
+    table = sa.table(table_name, sa.column('id', sa.Integer), sa.column(column_name, sa.String))
+    column = table.c[column_name]
+    statement = (table.update()
+                 .where(table.c.id == sa.bindparam('_id'))
+                 .values({column_name: sa.bindparam('_value')}))
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, column)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [{'_id': row_id, '_value': normalize(value)}
+                   for row_id, value in rows if normalize(value) != value]
+        if updates:
+            conn.execute(statement, updates)
+        last_id = rows[-1][0]
+
+
+def has_table(table_name):
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def change_type(table_name, columns, existing_type, new_type):
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite 批量迁移在类型亲和性变化时会以 CAST(... AS DATE) 复制数据，
+        # 而 DATE 的亲和性为 NUMERIC，'2023-11-01' 会被转换为 2023。
+        # 这里直接以新类型反射这些列并重建表，数据原样复制
+        reflect_args = [sa.Column(column_name, new_type, comment=comment)
+                        for column_name, comment in columns.items()]
+        with op.batch_alter_table(table_name, recreate='always', reflect_args=reflect_args):
+            pass
+        return
+
+    with op.batch_alter_table(table_name) as batch_op:
+        for column_name, comment in columns.items():
+            batch_op.alter_column(column_name,
+                                  existing_type=existing_type,
+                                  type_=new_type,
+                                  existing_comment=comment,
+                                  existing_nullable=True)
+
+
+def upgrade():
+    for table_name, columns in DATE_COLUMNS.items():
+        if not has_table(table_name):
+            continue
+        for column_name in columns:
+            backfill(table_name, column_name)
+        change_type(table_name, columns, sa.String(length=50), sa.Date())
+
+
+def downgrade():
+    for table_name, columns in DATE_COLUMNS.items():
+        if not has_table(table_name):
+            continue
+        change_type(table_name, columns, sa.Date(), sa.String(length=50))
@@ -0,0 +1,55 @@
+"""add import jobs
+
+新增后台导入任务表 import_jobs：管理员上传 CSV 后由独立进程分批导入，
+记录状态、进度（最后提交的行号）和成功/失败条数，支持取消和从中断处继续。
+
+这里只建表（init_db 的 db.create_all() 可能已经建好）。
+
+Revision ID: 9c4e2f71d3b8
+Revises: 5b1d7e6c2a90
+Create Date: 2026-10-18 18:05:12.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e2f71d3b8'
+down_revision = '5b1d7e6c2a90'
+branch_labels = None
+depends_on = None
+
+
+def has_table(table_name):
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade():
+    if not has_table('import_jobs'):
+        op.create_table(
+            'import_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('resource', sa.String(length=100), nullable=False),
+            sa.Column('path', sa.String(length=500), nullable=False),
+            sa.Column('encoding', sa.String(length=20), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('total_lines', sa.Integer(), nullable=True),
+            sa.Column('last_line', sa.Integer(), nullable=False),
+            sa.Column('start_line', sa.Integer(), nullable=False),
+            sa.Column('inserted', sa.Integer(), nullable=False),
+            sa.Column('rejected', sa.Integer(), nullable=False),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_import_jobs_status', 'import_jobs', ['status'])
+
+
+def downgrade():
+    if has_table('import_jobs'):
+        op.drop_index('ix_import_jobs_status', table_name='import_jobs')
+        op.drop_table('import_jobs')
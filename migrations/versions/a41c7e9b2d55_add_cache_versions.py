@@ -0,0 +1,40 @@
+"""add cache versions
+
+新增缓存版本号表 cache_versions：每个资源一行，写操作递增版本号，
+使各进程中以旧版本号缓存的列表、筛选项和计数失效。
+
+这里只建表（init_db 的 db.create_all() 可能已经建好），版本号从 0 开始按需插入。
+
+Revision ID: a41c7e9b2d55
+Revises: d27a8c3f5e61
+Create Date: 2026-10-18 21:05:12.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c7e9b2d55'
+down_revision = 'd27a8c3f5e61'
+branch_labels = None
+depends_on = None
+
+
+def has_table(table_name):
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade():
+    if not has_table('cache_versions'):
+        op.create_table(
+            'cache_versions',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+
+
+def downgrade():
+    if has_table('cache_versions'):
+        op.drop_table('cache_versions')
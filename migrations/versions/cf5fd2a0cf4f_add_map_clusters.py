@@ -0,0 +1,44 @@
+"""add map clusters
+
+新增地图聚合表 map_clusters：按 geohash 前缀长度（层级）保存每个格子的记录数和经纬度之和，
+供 /api/map/clusters 直接读取。
+
+聚合数据在首次请求时按 geohash 全量构建，这里只建表（init_db 的 db.create_all() 可能已经建好）。
+
+Revision ID: cf5fd2a0cf4f
+Revises: fbdc7c230319
+Create Date: 2026-10-18 16:47:05.281936
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cf5fd2a0cf4f'
+down_revision = 'fbdc7c230319'
+branch_labels = None
+depends_on = None
+
+
+def has_table(table_name):
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade():
+    if not has_table('map_clusters'):
+        op.create_table(
+            'map_clusters',
+            sa.Column('resource', sa.String(length=100), nullable=False),
+            sa.Column('precision', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('cell', sa.String(length=12), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('latitude_sum', sa.Float(), nullable=False),
+            sa.Column('longitude_sum', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('resource', 'precision', 'cell'),
+        )
+
+
+def downgrade():
+    if has_table('map_clusters'):
+        op.drop_table('map_clusters')
@@ -0,0 +1,47 @@
+"""add taxon nodes
+
+新增分类树表 taxon_nodes：按资源保存各级分类阶元（植物 界-科-属-种，昆虫 门-纲-目-科-属-种）
+每个节点的记录数，供 /api/taxonomy 逐级展开时按 parent 直接读取子节点。
+
+分类树在首次请求时全量构建，这里只建表（init_db 的 db.create_all() 可能已经建好）。
+
+Revision ID: d27a8c3f5e61
+Revises: 9c4e2f71d3b8
+Create Date: 2026-10-18 19:12:40.118205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd27a8c3f5e61'
+down_revision = '9c4e2f71d3b8'
+branch_labels = None
+depends_on = None
+
+
+def has_table(table_name):
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade():
+    if not has_table('taxon_nodes'):
+        op.create_table(
+            'taxon_nodes',
+            sa.Column('resource', sa.String(length=100), nullable=False),
+            sa.Column('path', sa.String(length=600), nullable=False),
+            sa.Column('parent', sa.String(length=600), nullable=True),
+            sa.Column('depth', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=200), nullable=False),
+            sa.Column('alias', sa.String(length=200), nullable=True),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('resource', 'path'),
+        )
+        op.create_index('ix_taxon_nodes_parent', 'taxon_nodes', ['resource', 'parent'])
+
+
+def downgrade():
+    if has_table('taxon_nodes'):
+        op.drop_index('ix_taxon_nodes_parent', table_name='taxon_nodes')
+        op.drop_table('taxon_nodes')
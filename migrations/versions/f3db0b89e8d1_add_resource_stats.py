@@ -0,0 +1,56 @@
+"""add resource stats
+
+新增统计快照表 resource_stats 和取值计数表 field_value_counts，
+供首页和 /api/stats 直接读取，不再每次统计全表。
+
+快照在首次读取时全量计算，这里只建表（init_db 的 db.create_all() 可能已经建好）。
+
+Revision ID: f3db0b89e8d1
+Revises: 8fd7a0ef8f00
+Create Date: 2026-10-18 15:21:37.104522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3db0b89e8d1'
+down_revision = '8fd7a0ef8f00'
+branch_labels = None
+depends_on = None
+
+
+def has_table(table_name):
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade():
+    if not has_table('resource_stats'):
+        op.create_table(
+            'resource_stats',
+            sa.Column('resource', sa.String(length=100), nullable=False),
+            sa.Column('total', sa.Integer(), nullable=False),
+            sa.Column('families', sa.Integer(), nullable=False),
+            sa.Column('countries', sa.Integer(), nullable=False),
+            sa.Column('provinces', sa.Integer(), nullable=False),
+            sa.Column('genera', sa.Integer(), nullable=False),
+            sa.Column('recomputed_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('resource'),
+        )
+    if not has_table('field_value_counts'):
+        op.create_table(
+            'field_value_counts',
+            sa.Column('resource', sa.String(length=100), nullable=False),
+            sa.Column('field', sa.String(length=100), nullable=False),
+            sa.Column('value', sa.String(length=100), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('resource', 'field', 'value'),
+        )
+
+
+def downgrade():
+    for table_name in ('field_value_counts', 'resource_stats'):
+        if has_table(table_name):
+            op.drop_table(table_name)
@@ -0,0 +1,89 @@
+"""add geohash columns
+
+为植物和昆虫记录新增由经纬度计算的 geohash 列及索引，
+供 /api/plants/within、/api/insects/within 按范围查询时走索引区间扫描。
+
+新增列后按主键分批为已有记录回填 geohash。
+
+Revision ID: fbdc7c230319
+Revises: f3db0b89e8d1
+Create Date: 2026-10-18 16:08:52.617340
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.geohash import encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision = 'fbdc7c230319'
+down_revision = 'f3db0b89e8d1'
+branch_labels = None
+depends_on = None
+
+
+# 表 -> (索引名, 纬度列, 经度列)
+GEO_COLUMNS = {
+    'plant_resources': ('ix_plant_geohash', 'decimal_latitude', 'decimal_longitude'),
+    'insect_resources': ('ix_insect_geohash', 'latitude', 'longitude'),
+}
+
+# 回填时每批处理的记录数
+BATCH_SIZE = 1000
+
+
+def backfill(table_name, latitude_name, longitude_name):
+    """按主键分批计算已有记录的 geohash"""
+    conn = op.get_bind()
+    table = sa.table(table_name,
+                     sa.column('id', sa.Integer),
+                     sa.column(latitude_name, sa.Float),
+                     sa.column(longitude_name, sa.Float),
+                     sa.column('geohash', sa.String))
+    statement = (table.update()
+                 .where(table.c.id == sa.bindparam('_id'))
+                 .values(geohash=sa.bindparam('_geohash')))
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, table.c[latitude_name], table.c[longitude_name])
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [{'_id': row_id, '_geohash': encode_geohash(latitude, longitude)}
+                   for row_id, latitude, longitude in rows
+                   if latitude is not None and longitude is not None]
+        if updates:
+            conn.execute(statement, updates)
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table_name, (index_name, latitude_name, longitude_name) in GEO_COLUMNS.items():
+        if not inspector.has_table(table_name):
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table_name)}
+        if 'geohash' not in columns:
+            op.add_column(table_name, sa.Column('geohash', sa.String(length=12), nullable=True))
+            backfill(table_name, latitude_name, longitude_name)
+        indexes = {index['name'] for index in inspector.get_indexes(table_name)}
+        if index_name not in indexes:
+            op.create_index(index_name, table_name, ['geohash'])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table_name, (index_name, _, _) in GEO_COLUMNS.items():
+        if not inspector.has_table(table_name):
+            continue
+        indexes = {index['name'] for index in inspector.get_indexes(table_name)}
+        if index_name in indexes:
+            op.drop_index(index_name, table_name=table_name)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column('geohash')